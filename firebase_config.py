@@ -1,19 +1,9 @@
 # myproject/firebase_config.py
-import firebase_admin
-from firebase_admin import credentials
-import os
-from django.conf import settings
+# Kept for backwards compatibility. The SDK is initialized lazily, on first use,
+# by api.firebase_auth.get_firebase_app(); importing this module costs nothing.
 
-def initialize_firebase_admin():
-    # Best practice: Load credentials from environment variables or a secure path
-    # For local development, you can point to the file path directly.
-    cred_path = os.path.join(settings.BASE_DIR, './src/group-study-review-drf-server/firebase/serviceAccountKey.json')
-    cred = credentials.Certificate(cred_path)
 
-    try:
-        firebase_admin.get_app()
-    except ValueError:
-        firebase_admin.initialize_app(cred)
+def initialize_firebase_admin():
+    from api.firebase_auth import get_firebase_app
 
-# Call the function to ensure it's initialized on startup
-initialize_firebase_admin()
\ No newline at end of file
+    return get_firebase_app()
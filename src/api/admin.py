@@ -1,3 +1,12 @@
 from django.contrib import admin
 
+from .models import RequestProfile
+
 # Register your models here.
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ["started_at", "method", "route_name", "status_code", "duration_ms", "query_count"]
+    list_filter = ["route_name", "method", "status_code"]
+    ordering = ["-started_at"]
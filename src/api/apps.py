@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Signal receivers that keep TaskStats up to date.
+        from . import class_stats  # noqa: F401
+        # Registers the background job handlers (and the receivers that queue them).
+        from . import job_handlers  # noqa: F401
+        # Signal receivers that append to the sync change log.
+        from . import sync  # noqa: F401
+        # System check that the throttle buckets are shared between workers.
+        from . import throttling  # noqa: F401
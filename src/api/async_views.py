@@ -0,0 +1,352 @@
+"""
+Native async counterparts of the hot read endpoints and of the Firebase login.
+
+These are plain Django async views (DRF's APIView is sync-only). Under ASGI they
+run on the event loop, so a worker is never parked on Firebase verification or
+on the database. Every query goes through Django's async ORM and all relations
+the serializers touch are prefetched up front, so serialization itself never
+hits the database from the event loop.
+
+    POST /api/async/login/                      - Firebase login
+    GET  /api/async/me/                         - Current user's profile
+    GET  /api/async/class/                      - Classes of the current user
+    GET  /api/async/class/{class_code}/         - Class details
+    GET  /api/async/class/{class_code}/tasks/   - Active / completed tasks of a class
+    GET  /api/async/tasks/{task_id}/            - Task details
+    GET  /api/class/{class_code}/events/        - Server-Sent Events stream of the class
+    POST /api/batch/                            - Several GET requests in one (api.batch)
+"""
+
+# ================== Standard Library ==================
+import asyncio
+import json
+import math
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+# ================== DRF ===============================
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+# ================== Third-Party =======================
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+# ================== Local / App Imports =================
+from . import events
+from .batch import BatchError, parse_batch, run_batch
+from .firebase_auth import averify_firebase_token
+from .models import Class, Task, User
+from .serializers import ClassDetailSerializer, TaskSerializer, UserSerializer
+from .throttling import acheck_rate_limit
+from .utils import generate_tokens_for_user
+
+CLASS_DETAIL_SELECT = ("created_by",)
+CLASS_DETAIL_PREFETCH = ("members", "experts", "admins", "tasks__submissions")
+
+_jwt_auth = JWTAuthentication()
+
+
+# ================== HELPER FUNCTIONS ==================
+def _json(data, status_code=status.HTTP_200_OK):
+    return JsonResponse(data, status=status_code, encoder=JSONEncoder, safe=False)
+
+
+def _error(detail, status_code):
+    return _json({"detail": detail}, status_code)
+
+
+def _unauthenticated():
+    return _error(
+        "Authentication credentials were not provided.",
+        status.HTTP_401_UNAUTHORIZED,
+    )
+
+
+async def _aget_authenticated_user(request, allow_query_token=False, prefetch=()):
+    """
+    Async version of DRF's JWTAuthentication. Token validation is pure CPU work;
+    only the user lookup touches the database, and it goes through the async ORM.
+    Returns None when the request carries no valid access token.
+
+    With `allow_query_token`, a request without an Authorization header may pass
+    the token as ?access_token= (browsers' EventSource cannot set headers).
+    `prefetch` lists relations of the user to load with it.
+    """
+    header = _jwt_auth.get_header(request)
+    if header is not None:
+        raw_token = _jwt_auth.get_raw_token(header)
+    elif allow_query_token:
+        raw_token = request.GET.get("access_token")
+    else:
+        raw_token = None
+    if raw_token is None:
+        return None
+    try:
+        validated_token = _jwt_auth.get_validated_token(raw_token)
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+    try:
+        user = await User.objects.prefetch_related(*prefetch).aget(
+            **{jwt_settings.USER_ID_FIELD: user_id}
+        )
+    except User.DoesNotExist:
+        return None
+    return user if user.is_active else None
+
+
+def _membership_filter(user):
+    return Q(members=user) | Q(experts=user) | Q(admins=user)
+
+
+async def _ais_class_member(user, class_id):
+    return await (
+        Class.objects.filter(_membership_filter(user), pk=class_id).aexists()
+    )
+
+
+def _read_login_payload(request):
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+    return request.POST
+
+
+#! ==================== AUTH ====================
+@csrf_exempt
+@require_POST
+async def login_view(request):
+    wait = await acheck_rate_limit("login", request)
+    if wait:
+        response = _error("Request was throttled.", status.HTTP_429_TOO_MANY_REQUESTS)
+        response["Retry-After"] = str(math.ceil(wait))
+        return response
+
+    firebase_token = _read_login_payload(request).get("token")
+
+    if not firebase_token:
+        return _json(
+            {"error": "Firebase token is required"}, status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        decoded_token = await averify_firebase_token(firebase_token)
+        firebase_uid = decoded_token["uid"]
+        email = decoded_token.get("email")
+        username = decoded_token.get("name", email)
+    except Exception as e:
+        return _json(
+            {"error": f"Invalid Firebase token: {str(e)}"},
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    user, created = await User.objects.aget_or_create(
+        firebase_uid=firebase_uid, defaults={"email": email, "username": username}
+    )
+    if created:
+        user.set_unusable_password()
+        await user.asave()
+
+    # UserSerializer walks user.submissions (with `user` as a plain pk), which
+    # must be prefetched here: a lazy query from the event loop raises
+    # SynchronousOnlyOperation.
+    user = await User.objects.prefetch_related("submissions").aget(pk=user.pk)
+
+    tokens = generate_tokens_for_user(user)
+    response = _json({"authToken": tokens["access"], "user": UserSerializer(user).data})
+    response.set_cookie(
+        key="refresh_token",
+        value=tokens["refresh"],
+        httponly=True,
+        secure=False,  # Set to False for local HTTP development
+        samesite="Lax",
+    )
+    return response
+
+
+#! ==================== USER ====================
+@require_GET
+async def profile_view(request):
+    # UserSerializer walks user.submissions (see login_view).
+    user = await _aget_authenticated_user(request, prefetch=["submissions"])
+    if user is None:
+        return _unauthenticated()
+    return _json(UserSerializer(user).data)
+
+
+#! ==================== CLASS ====================
+@require_GET
+async def class_list_view(request):
+    user = await _aget_authenticated_user(request)
+    if user is None:
+        return _unauthenticated()
+
+    queryset = (
+        Class.objects.filter(_membership_filter(user), deletion_requested_at__isnull=True)
+        .distinct()
+        .select_related(*CLASS_DETAIL_SELECT)
+        .prefetch_related(*CLASS_DETAIL_PREFETCH)
+    )
+    classes = [class_obj async for class_obj in queryset]
+    return _json(ClassDetailSerializer(classes, many=True).data)
+
+
+@require_GET
+async def class_detail_view(request, class_code):
+    user = await _aget_authenticated_user(request)
+    if user is None:
+        return _unauthenticated()
+
+    try:
+        class_obj = await (
+            Class.objects.select_related(*CLASS_DETAIL_SELECT)
+            .prefetch_related(*CLASS_DETAIL_PREFETCH)
+            .aget(class_code=class_code, deletion_requested_at__isnull=True)
+        )
+    except Class.DoesNotExist:
+        return _error("Not found.", status.HTTP_404_NOT_FOUND)
+    return _json(ClassDetailSerializer(class_obj).data)
+
+
+@require_GET
+async def class_tasks_view(request, class_code):
+    user = await _aget_authenticated_user(request)
+    if user is None:
+        return _unauthenticated()
+
+    try:
+        class_obj = await Class.objects.only("id").aget(class_code=class_code, deletion_requested_at__isnull=True)
+    except Class.DoesNotExist:
+        return _error("Not found.", status.HTTP_404_NOT_FOUND)
+
+    if not await _ais_class_member(user, class_obj.pk):
+        return _error(
+            "You are not a member of this class.", status.HTTP_403_FORBIDDEN
+        )
+
+    now = timezone.now()
+    queryset = Task.objects.filter(class_obj=class_obj).prefetch_related("submissions")
+    active_tasks = [task async for task in queryset.filter(dueDate__gte=now)]
+    completed_tasks = [task async for task in queryset.filter(dueDate__lt=now)]
+
+    return _json(
+        {
+            "active_tasks": TaskSerializer(active_tasks, many=True).data,
+            "completed_tasks": TaskSerializer(completed_tasks, many=True).data,
+        }
+    )
+
+
+#! ==================== TASK ====================
+@require_GET
+async def task_detail_view(request, pk):
+    user = await _aget_authenticated_user(request)
+    if user is None:
+        return _unauthenticated()
+
+    try:
+        task = await Task.objects.prefetch_related("submissions").aget(
+            pk=pk, class_obj__deletion_requested_at__isnull=True
+        )
+    except Task.DoesNotExist:
+        return _error("Not found.", status.HTTP_404_NOT_FOUND)
+
+    if not await _ais_class_member(user, task.class_obj_id):
+        return _error(
+            "You do not have permission to perform this action.",
+            status.HTTP_403_FORBIDDEN,
+        )
+    return _json(TaskSerializer(task).data)
+
+
+#! ==================== CLASS EVENTS ====================
+@require_GET
+async def class_events_view(request, class_code):
+    """
+    Server-Sent Events stream of a class: task.created, submission.added,
+    role.changed and task.deadline_passed events, one JSON object per `data:`
+    line. A keepalive comment is sent when the class is quiet. After a
+    stream.overflow event the stream ends; refetch the class and reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI every open stream would pin a worker thread for its lifetime.
+        return _error(
+            "The event stream is only served by the ASGI application.",
+            status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+    user = await _aget_authenticated_user(request, allow_query_token=True)
+    if user is None:
+        return _unauthenticated()
+
+    try:
+        class_obj = await Class.objects.only("id").aget(class_code=class_code, deletion_requested_at__isnull=True)
+    except Class.DoesNotExist:
+        return _error("Not found.", status.HTTP_404_NOT_FOUND)
+
+    if not await _ais_class_member(user, class_obj.pk):
+        return _error(
+            "You are not a member of this class.", status.HTTP_403_FORBIDDEN
+        )
+
+    response = StreamingHttpResponse(
+        _event_stream(class_obj.pk), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let nginx buffer the stream.
+    return response
+
+
+async def _event_stream(class_id):
+    # Subscribing inside the generator ties the subscription to the stream's
+    # lifetime: the finally block runs when the client disconnects.
+    subscription = events.broker.subscribe(class_id)
+    config = settings.CLASS_EVENTS
+    try:
+        yield f"retry: {config['RETRY_MS']}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), timeout=config["KEEPALIVE_SECONDS"]
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield (
+                f"id: {event['id']}\nevent: {event['type']}\n"
+                f"data: {events.encode_event(event)}\n\n"
+            )
+            if event["type"] == events.STREAM_OVERFLOW:
+                return
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+#! ==================== BATCH ====================
+@csrf_exempt
+@require_POST
+async def batch_view(request):
+    user = await _aget_authenticated_user(request)
+    if user is None:
+        return _unauthenticated()
+    try:
+        items = parse_batch(request.body)
+    except BatchError as e:
+        return _error(str(e), status.HTTP_400_BAD_REQUEST)
+    return HttpResponse(await run_batch(request, user, items), content_type="application/json")
+
+
+# A batch must not contain another batch.
+batch_view.batchable = False
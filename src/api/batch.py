@@ -0,0 +1,185 @@
+"""
+Batched GET sub-requests (POST /api/batch/, see `async_views.batch_view`).
+
+A page load of the SPA needs /api/me/, /api/class/ and, per class, its tasks
+and their submissions: dozens of round-trips on a slow mobile connection.
+A batch runs those GETs inside one HTTP request:
+
+    POST /api/batch/
+    {"requests": [{"id": "me", "path": "/api/me/"},
+                  {"id": "classes", "path": "/api/class/?page=2"}]}
+
+    {"responses": [{"id": "me", "status": 200, "body": {...}}, ...]}
+
+- Each sub-request is resolved with the URL conf and handed to its view, so it
+  answers exactly like the standalone endpoint (permissions, pagination...).
+  Only GETs under /api/ are allowed, at most BATCH["MAX_REQUESTS"] of them.
+- Authentication happens once: DRF views get the batch's user as a forced
+  user instead of re-validating the token and reloading the user, and every
+  sub-request shares the batch's `request_cache` (e.g. `user_class_ids`).
+- Under ASGI the sub-requests run concurrently, up to BATCH["CONCURRENCY"]
+  at a time, each sync view in its own thread (and DB connection). Under WSGI
+  they run one after the other on the request's thread.
+- Sub-requests bypass the middleware: they are not counted separately in the
+  metrics or query budgets, only as part of the batch request.
+- Streamed responses (`?stream=1` lists, the class export, SSE) are answered
+  400: a batch buffers every body, which is what streaming avoids.
+"""
+
+# ================== Standard Library ==================
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+# ================== Local / App Imports =================
+from .utils import request_cache
+
+logger = logging.getLogger(__name__)
+
+# Request headers a sub-request does not inherit from the batch request.
+_BODY_META = ("CONTENT_LENGTH", "CONTENT_TYPE", "HTTP_CONTENT_LENGTH", "HTTP_CONTENT_TYPE")
+
+
+_STREAM_REJECTED = (400, json.dumps({"detail": "Streams cannot be batched."}).encode())
+
+
+class BatchError(ValueError):
+    """The batch itself is malformed (answered 400 as a whole)."""
+
+
+def _batch_setting(name):
+    return settings.BATCH[name]
+
+
+# ================== PARSING ==================
+def parse_batch(body):
+    """Validates a batch request body. Returns [(id, path, query string), ...]."""
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise BatchError("The request body must be JSON.") from None
+    items = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError('"requests" must be a non-empty list.')
+    if len(items) > _batch_setting("MAX_REQUESTS"):
+        raise BatchError(f"At most {_batch_setting('MAX_REQUESTS')} requests per batch.")
+
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise BatchError(f'requests[{index}] must be an object with a "path".')
+        if item.get("method", "GET").upper() != "GET":
+            raise BatchError(f"requests[{index}]: only GET requests can be batched.")
+        url = urlsplit(item["path"])
+        if url.scheme or url.netloc or not url.path.startswith("/api/"):
+            raise BatchError(f"requests[{index}]: the path must start with /api/.")
+        parsed.append((item.get("id", index), url.path, url.query))
+    return parsed
+
+
+# ================== RUNNING ==================
+def _sub_request(parent, path, query, user):
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.META = {key: value for key, value in parent.META.items() if key not in _BODY_META}
+    request.META.update(
+        REQUEST_METHOD="GET",
+        PATH_INFO=path,
+        QUERY_STRING=query,
+        HTTP_ACCEPT="application/json",
+    )
+    request.GET = QueryDict(query)
+    request.COOKIES = parent.COOKIES
+    request.user = user
+    # Picked up by DRF's Request: skips the authentication classes.
+    request._force_auth_user = user
+    request._request_cache = request_cache(parent)
+    return request
+
+
+def _response_body(response):
+    """The response content as JSON bytes (non-JSON content becomes a JSON string)."""
+    if hasattr(response, "render"):
+        response.render()
+    if response.get("Content-Type", "").startswith("application/json") and response.content:
+        return response.content
+    return json.dumps(response.content.decode(response.charset or "utf-8", "replace")).encode()
+
+
+def _run_sync_view(view, request, args, kwargs, close_connections):
+    try:
+        response = view(request, *args, **kwargs)
+        if response.streaming:
+            # Not iterated: the stream's generator has not run, nothing to release.
+            return _STREAM_REJECTED
+        return response.status_code, _response_body(response)
+    finally:
+        if close_connections:
+            # This pool thread's connections would otherwise stay open until it is reused.
+            connections.close_all()
+
+
+async def _run_one(parent, user, path, query, concurrent):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return 404, json.dumps({"detail": "Not found."}).encode()
+    if getattr(match.func, "batchable", True) is False:
+        return 400, json.dumps({"detail": "This endpoint cannot be batched."}).encode()
+
+    request = _sub_request(parent, path, query, user)
+    request.resolver_match = match
+    try:
+        if iscoroutinefunction(match.func):
+            response = await match.func(request, *match.args, **match.kwargs)
+            if response.streaming:
+                return _STREAM_REJECTED
+            return response.status_code, _response_body(response)
+        return await sync_to_async(_run_sync_view, thread_sensitive=not concurrent)(
+            match.func, request, match.args, match.kwargs, concurrent
+        )
+    except Http404:
+        return 404, json.dumps({"detail": "Not found."}).encode()
+    except Exception:
+        logger.exception("Batched request to %s failed", path)
+        return 500, json.dumps({"detail": "Internal server error."}).encode()
+
+
+async def run_batch(request, user, items):
+    """Runs the parsed sub-requests. Returns the JSON response body (bytes)."""
+    concurrent = isinstance(request, ASGIRequest)
+    if concurrent:
+        semaphore = asyncio.Semaphore(_batch_setting("CONCURRENCY"))
+
+        async def limited(path, query):
+            async with semaphore:
+                return await _run_one(request, user, path, query, concurrent=True)
+
+        results = await asyncio.gather(*(limited(path, query) for _, path, query in items))
+    else:
+        results = [
+            await _run_one(request, user, path, query, concurrent=False)
+            for _, path, query in items
+        ]
+
+    # Bodies are already JSON: splice them in instead of decoding and re-encoding.
+    parts = [
+        b'{"id":%s,"status":%d,"body":%s}' % (json.dumps(item_id).encode(), status_code, body)
+        for (item_id, _, _), (status_code, body) in zip(items, results)
+    ]
+    return b'{"responses":[' + b",".join(parts) + b"]}"
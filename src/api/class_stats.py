@@ -0,0 +1,295 @@
+"""
+Incrementally maintained class analytics (`TaskStats`, one row per task).
+
+Every write that changes a task's numbers applies a delta to its row instead
+of recomputing anything: a submission adds (or removes) its on-time/late
+count, its upvotes and its upvote-histogram bucket; feedback adds (or removes)
+one to the feedback count. Receivers on the Task / Submission / Feedback
+signals apply the deltas, so the API, the admin and the shell are all covered.
+
+Deltas are applied under a row lock (SELECT ... FOR UPDATE) in the writer's
+transaction, so concurrent writers to the same task serialize on that row and
+the stats commit or roll back together with the write. Bulk operations
+(bulk_create, queryset.update/delete) bypass signals: run
+`manage.py rebuild_class_stats` after them, or whenever the numbers drift.
+"""
+
+# ================== Standard Library ==================
+from collections import defaultdict
+from itertools import chain
+
+# ================== Django ============================
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .jobs import enqueue
+from .models import Class, Feedback, Submission, Task, TaskStats
+from .partitioning import iter_archived, iter_archived_submissions, live_user_ids
+
+# Background job (api.job_handlers) that runs rebuild_class_stats.
+REBUILD_CLASS_STATS_JOB = "stats.rebuild_class"
+HISTOGRAM_TOP_BUCKET = 10
+COUNTER_FIELDS = (
+    "submission_count",
+    "on_time_count",
+    "late_count",
+    "user_upvote_count",
+    "expert_upvote_count",
+    "feedback_count",
+)
+
+_SUBMISSION_SNAPSHOT_FIELDS = {"task", "submitted_at", "user_upvotes", "expert_upvotes"}
+
+
+def upvote_bucket(total):
+    return f"{HISTOGRAM_TOP_BUCKET}+" if total >= HISTOGRAM_TOP_BUCKET else str(total)
+
+
+def submission_delta(submitted_at, due_date, user_upvotes, expert_upvotes):
+    """What one submission contributes to its task's stats. Upvotes are counts."""
+    on_time = submitted_at is None or submitted_at <= due_date
+    return {
+        "submission_count": 1,
+        "on_time_count": int(on_time),
+        "late_count": int(not on_time),
+        "user_upvote_count": user_upvotes,
+        "expert_upvote_count": expert_upvotes,
+        "histogram": {upvote_bucket(user_upvotes + expert_upvotes): 1},
+    }
+
+
+# ================== APPLYING DELTAS ==================
+def apply_delta(task_id, delta, sign=1, create=True):
+    """
+    Adds (sign=1) or subtracts (sign=-1) a delta to the task's stats row.
+    Removals never create a row: during a task's cascade delete the row may
+    already be gone, and recreating it would point at a deleted task.
+    """
+    with transaction.atomic():
+        stats = TaskStats.objects.select_for_update().filter(task_id=task_id).first()
+        if stats is None:
+            if not create:
+                return
+            class_id = Task.objects.filter(pk=task_id).values_list("class_obj_id", flat=True).first()
+            if class_id is None:
+                return
+            stats, _ = TaskStats.objects.get_or_create(task_id=task_id, defaults={"class_obj_id": class_id})
+            stats = TaskStats.objects.select_for_update().get(pk=stats.pk)
+
+        for field in COUNTER_FIELDS:
+            if field in delta:
+                setattr(stats, field, max(0, getattr(stats, field) + sign * delta[field]))
+        histogram = dict(stats.upvote_histogram)
+        for bucket, count in delta.get("histogram", {}).items():
+            histogram[bucket] = max(0, histogram.get(bucket, 0) + sign * count)
+        stats.upvote_histogram = {bucket: n for bucket, n in histogram.items() if n}
+        stats.save()
+
+
+def _due_date(task_id, submission=None):
+    # Views save submissions with their task loaded: no query then.
+    if submission is not None and submission.task_id == task_id and Submission.task.is_cached(submission):
+        return submission.task.dueDate
+    return Task.objects.filter(pk=task_id).values_list("dueDate", flat=True).first()
+
+
+# ================== REBUILD ==================
+def rebuild_class_stats(class_id):
+    """
+    Recomputes every task row of a class from scratch, archived months
+    included (those of users deleted since are skipped). Returns the task count.
+    """
+    tasks = dict(Task.objects.filter(class_obj_id=class_id).values_list("id", "dueDate"))
+    created_at = Class.objects.filter(pk=class_id).values_list("created_at", flat=True).first()
+    rows = {
+        task_id: TaskStats(task_id=task_id, class_obj_id=class_id, upvote_histogram={})
+        for task_id in tasks
+    }
+
+    live = Submission.objects.filter(task__class_obj_id=class_id).values_list(
+        "task_id", "submitted_at", "user_upvotes", "expert_upvotes"
+    )
+    # Archived submissions (api.partitioning) by id, for their feedback below.
+    archived = {
+        submission.pk: submission
+        for submission in iter_archived_submissions(tasks, since=created_at)
+    }
+    submissions = chain(
+        live.iterator(chunk_size=5000),
+        (
+            (s.task_id, s.submitted_at, s.user_upvotes, s.expert_upvotes)
+            for s in archived.values()
+        ),
+    )
+    histograms = defaultdict(lambda: defaultdict(int))
+    for task_id, submitted_at, user_upvotes, expert_upvotes in submissions:
+        delta = submission_delta(
+            submitted_at, tasks[task_id], len(user_upvotes or ()), len(expert_upvotes or ())
+        )
+        row = rows[task_id]
+        for field in COUNTER_FIELDS:
+            if field in delta:
+                setattr(row, field, getattr(row, field) + delta[field])
+        for bucket, count in delta["histogram"].items():
+            histograms[task_id][bucket] += count
+
+    feedback_counts = (
+        Feedback.objects.filter(submission__task__class_obj_id=class_id)
+        .values("submission__task_id")
+        .annotate(n=Count("id"))
+        .values_list("submission__task_id", "n")
+    )
+    for task_id, count in feedback_counts:
+        rows[task_id].feedback_count = count
+    # Feedback on archived submissions: live rows have no submission row to join
+    # above, and archived rows only belong to archived submissions (feedback is
+    # newer than its submission and both tables share one retention window).
+    if archived:
+        oldest = min(submission.submitted_at for submission in archived.values())
+        archived_feedback = [
+            feedback
+            for feedback in iter_archived(Feedback, since=oldest)
+            if feedback.submission_id in archived
+        ]
+        users = live_user_ids({feedback.user_id for feedback in archived_feedback})
+        feedback_submission_ids = chain(
+            Feedback.objects.filter(submission_id__in=list(archived)).values_list(
+                "submission_id", flat=True
+            ),
+            (f.submission_id for f in archived_feedback if f.user_id in users),
+        )
+        for submission_id in feedback_submission_ids:
+            rows[archived[submission_id].task_id].feedback_count += 1
+    for task_id, histogram in histograms.items():
+        rows[task_id].upvote_histogram = dict(histogram)
+
+    with transaction.atomic():
+        TaskStats.objects.filter(class_obj_id=class_id).delete()
+        TaskStats.objects.bulk_create(rows.values())
+    return len(rows)
+
+
+def rebuild_task_stats(task_id):
+    class_id = Task.objects.filter(pk=task_id).values_list("class_obj_id", flat=True).first()
+    if class_id is not None:
+        rebuild_class_stats(class_id)
+
+
+# ================== SIGNAL RECEIVERS ==================
+# The state before an update is read in pre_save, on the update path only:
+# snapshotting in post_init would tax every instance the app ever loads.
+@receiver(pre_save, sender=Task)
+def _snapshot_task(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or (update_fields is not None and "dueDate" not in update_fields):
+        return
+    instance._stats_due_date = _due_date(instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def _task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        TaskStats.objects.get_or_create(task=instance, defaults={"class_obj_id": instance.class_obj_id})
+    elif getattr(instance, "_stats_due_date", instance.dueDate) != instance.dueDate:
+        # On-time vs. late depends on the due date: recount this class, off the request.
+        enqueue(REBUILD_CLASS_STATS_JOB, {"class_id": str(instance.class_obj_id)})
+    instance.__dict__.pop("_stats_due_date", None)
+
+
+@receiver(pre_save, sender=Submission)
+def _snapshot_submission(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and _SUBMISSION_SNAPSHOT_FIELDS.isdisjoint(update_fields):
+        # The stored contribution cannot change.
+        instance._stats_snapshot = _submission_state(instance)
+        return
+    row = (
+        Submission.objects.filter(pk=instance.pk)
+        .values_list("task_id", "submitted_at", "user_upvotes", "expert_upvotes")
+        .first()
+    )
+    if row is not None:
+        task_id, submitted_at, user_upvotes, expert_upvotes = row
+        instance._stats_snapshot = (
+            task_id, submitted_at, len(user_upvotes or ()), len(expert_upvotes or ())
+        )
+
+
+def _submission_state(submission):
+    return (
+        submission.task_id,
+        submission.submitted_at,
+        len(submission.user_upvotes or ()),
+        len(submission.expert_upvotes or ()),
+    )
+
+
+@receiver(post_save, sender=Submission)
+def _submission_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    state = _submission_state(instance)
+    previous = None if created else getattr(instance, "_stats_snapshot", None)
+    if not created and previous is None:
+        # The old contribution is unknown (no row was found before the save).
+        rebuild_task_stats(instance.task_id)
+    elif previous != state:
+        if previous is not None:
+            old_task_id, old_submitted_at, old_user_upvotes, old_expert_upvotes = previous
+            old_delta = submission_delta(
+                old_submitted_at,
+                _due_date(old_task_id, instance),
+                old_user_upvotes,
+                old_expert_upvotes,
+            )
+            apply_delta(old_task_id, old_delta, sign=-1, create=False)
+        task_id, submitted_at, user_upvotes, expert_upvotes = state
+        apply_delta(
+            task_id,
+            submission_delta(submitted_at, _due_date(task_id, instance), user_upvotes, expert_upvotes),
+        )
+    instance.__dict__.pop("_stats_snapshot", None)
+
+
+@receiver(post_delete, sender=Submission)
+def _submission_deleted(sender, instance, **kwargs):
+    task_id, submitted_at, user_upvotes, expert_upvotes = _submission_state(instance)
+    due_date = _due_date(task_id)
+    if due_date is None:
+        return  # The task itself is gone, and its stats row with it.
+    apply_delta(
+        task_id,
+        submission_delta(submitted_at, due_date, user_upvotes, expert_upvotes),
+        sign=-1,
+        create=False,
+    )
+
+
+def _feedback_task_id(feedback):
+    return Submission.objects.filter(pk=feedback.submission_id).values_list("task_id", flat=True).first()
+
+
+@receiver(post_save, sender=Feedback)
+def _feedback_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        task_id = _feedback_task_id(instance)
+        if task_id is not None:
+            apply_delta(task_id, {"feedback_count": 1})
+
+
+@receiver(post_delete, sender=Feedback)
+def _feedback_deleted(sender, instance, **kwargs):
+    task_id = _feedback_task_id(instance)
+    if task_id is not None:
+        apply_delta(task_id, {"feedback_count": 1}, sign=-1, create=False)
@@ -0,0 +1,50 @@
+# ================== Standard Library ==================
+import os
+import time
+
+# ================== Django ============================
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+#
+
+
+def get_pool_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    Returns the connection pool statistics of *this* worker process.
+
+    Each gunicorn worker owns its own pool, so the numbers are per process;
+    `pid` tells them apart when scraping several workers. When pooling is
+    disabled (or the backend has no pool, e.g. SQLite) `pooled` is False and
+    `stats` is empty.
+    """
+    connection = connections[alias]
+    pool = getattr(connection, "pool", None)
+    return {
+        "pid": os.getpid(),
+        "alias": alias,
+        "vendor": connection.vendor,
+        "pooled": pool is not None,
+        "stats": pool.get_stats() if pool is not None else {},
+    }
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """
+    Runs a trivial query against the database and reports how long it took.
+    Never raises: a failing database is reported as `ok: False`.
+    """
+    start = time.perf_counter()
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 3)}
@@ -0,0 +1,132 @@
+"""
+Primary / read-replica routing.
+
+- Writes always go to the primary (`default`).
+- Reads go to a random replica from `settings.DATABASE_REPLICAS`, but only while
+  `ReplicaRoutingMiddleware` has marked the current request as replica-safe:
+  a GET/HEAD/OPTIONS request whose client has not written recently.
+- Everything else (unsafe requests, management commands, shells, reads inside a
+  transaction) stays on the primary.
+
+Read-your-writes: after a successful unsafe request (submit, join, change_role,
+...) the client is pinned to the primary for `REPLICA_STICKY_SECONDS`, using a
+cookie plus a cache marker keyed by user id (for clients that drop cookies).
+"""
+
+# ================== Standard Library ==================
+import random
+from contextvars import ContextVar
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+# ================== DRF ===============================
+from rest_framework.permissions import SAFE_METHODS
+
+# ================== Third-Party =======================
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+# ================== Local / App Imports =================
+#
+
+STICKY_COOKIE_NAME = "db_primary_pin"
+STICKY_CACHE_KEY = "db-primary-pin:{user_id}"
+
+# True -> every read goes to the primary. Only the middleware ever flips it off.
+_use_primary = ContextVar("use_primary_db", default=True)
+
+
+def get_replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = get_replica_aliases()
+        if not replicas or _use_primary.get():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see that transaction's writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication, never through migrate.
+        if db in get_replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Decides per request whether reads may be served by a replica, and pins
+    clients to the primary for a short window after they write.
+    """
+
+    def process_request(self, request):
+        if get_replica_aliases():
+            _use_primary.set(
+                request.method not in SAFE_METHODS
+                or self._is_pinned_to_primary(request)
+            )
+
+    def process_response(self, request, response):
+        if not get_replica_aliases():
+            return response
+        # Worker threads are reused across requests; never leak replica mode.
+        _use_primary.set(True)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self._pin_to_primary(request, response)
+        return response
+
+    def _is_pinned_to_primary(self, request):
+        if STICKY_COOKIE_NAME in request.COOKIES:
+            return True
+        user_id = self._user_id_from_token(request)
+        return bool(user_id) and bool(cache.get(STICKY_CACHE_KEY.format(user_id=user_id)))
+
+    def _pin_to_primary(self, request, response):
+        window = settings.REPLICA_STICKY_SECONDS
+        response.set_cookie(
+            STICKY_COOKIE_NAME,
+            "1",
+            max_age=window,
+            httponly=True,
+            secure=settings.SECURE_COOKIES,
+            samesite="Lax",
+        )
+        # DRF copies the authenticated user back onto the Django request.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(STICKY_CACHE_KEY.format(user_id=user.pk), True, timeout=window)
+
+    @staticmethod
+    def _user_id_from_token(request):
+        """
+        Reads the user id claim from the bearer token without verifying it.
+        This only picks which database serves the reads (the view still
+        authenticates the token), so a forged token can at most force
+        primary reads for its sender.
+        """
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        parts = header.split()
+        if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+            return None
+        try:
+            return AccessToken(parts[1], verify=False).get(jwt_settings.USER_ID_CLAIM)
+        except TokenError:
+            return None
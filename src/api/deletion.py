@@ -0,0 +1,232 @@
+"""
+Background, chunked cascade deletion of users and classes.
+
+`Model.delete()` runs Django's delete collector, which loads every related
+Task, Submission, Feedback and Invitation into memory and deletes them in one
+transaction: for a big class that blocks the request for tens of seconds and
+holds locks the whole time. Instead:
+
+1. `request_deletion(obj)` marks the root row (`deletion_requested_at`; users
+   are also deactivated, which ends their sessions, and the classes they
+   created are marked too, as they cascade), creates a `DeletionJob`
+   and queues it on the job queue (`api.jobs`), all in the request's
+   transaction. The API hides marked rows.
+2. `run_deletion_job(job_id)` walks a deletion plan derived from the models'
+   CASCADE / SET_NULL relations, deepest tables first. Each step removes the
+   rows under the root in primary key order, CHUNK_SIZE at a time, with one
+   set-based `DELETE ... WHERE pk IN (...)` (or `UPDATE ... SET fk = NULL`)
+   per chunk and its own short transaction. The root row goes last.
+3. Progress (`step`, rows `deleted` per model, `heartbeat_at`) is saved after
+   every chunk. Steps are idempotent, so a job that crashed is resumed: by
+   the queue's retry, or by `manage.py process_deletions`, which picks up
+   pending jobs and running jobs whose heartbeat is older than
+   STALE_AFTER_SECONDS.
+
+Chunks bypass model signals, so the class stats of classes that lose rows
+without being deleted themselves (a deleted user's submissions elsewhere) are
+rebuilt at the end of the job.
+"""
+
+# ================== Standard Library ==================
+import logging
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+# ================== Django ============================
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .class_stats import rebuild_class_stats
+from .jobs import enqueue
+from .models import Class, DeletionJob, Task, User
+from .sync import record_deletions
+
+logger = logging.getLogger(__name__)
+
+# One step of a deletion plan: rows of `model` matching {lookup: root pk}
+# are deleted ("delete") or have `field` cleared ("set_null").
+DeletionStep = namedtuple("DeletionStep", ["action", "model", "lookup", "field"])
+
+MAX_PLAN_DEPTH = 8
+# Background job (api.job_handlers) that runs run_deletion_job.
+DELETION_JOB = "deletion.run"
+
+
+def _deletion_setting(name):
+    return settings.DELETION[name]
+
+
+# ================== PLAN ==================
+def deletion_plan(model):
+    """
+    The steps that delete everything under a `model` row, children before
+    parents. Derived from the reverse relations, so it follows model changes.
+    """
+    steps = []
+    _plan_relations(model, "", steps, depth=0)
+    return steps
+
+
+def _plan_relations(model, path, steps, depth):
+    if depth >= MAX_PLAN_DEPTH:
+        raise RuntimeError(f"Deletion plan of {model._meta.label} is too deep (cyclic relations?)")
+    for relation in model._meta.get_fields(include_hidden=True):
+        # Reverse foreign keys / one-to-ones, including those of M2M through tables.
+        if not (relation.auto_created and not relation.concrete):
+            continue
+        if not (relation.one_to_many or relation.one_to_one):
+            continue
+        related = relation.related_model
+        field = relation.field
+        lookup = f"{field.name}__{path}" if path else field.name
+        on_delete = relation.on_delete
+        if on_delete is models.CASCADE:
+            _plan_relations(related, lookup, steps, depth + 1)
+            steps.append(DeletionStep("delete", related, lookup, None))
+        elif on_delete is models.SET_NULL:
+            steps.append(DeletionStep("set_null", related, lookup, field.name))
+        elif on_delete in (models.PROTECT, models.RESTRICT):
+            raise RuntimeError(
+                f"{related._meta.label}.{field.name} protects {model._meta.label} rows from deletion"
+            )
+        # DO_NOTHING, SET_DEFAULT, SET(...): left to the database / not used here.
+
+
+def _run_chunk(step, root_pk, chunk_size, tombstones=False):
+    """
+    Deletes (or detaches) one chunk of the step's rows. Returns the rows
+    affected. With `tombstones`, deleted tasks / submissions and role rows are
+    recorded for the sync feed (`api.sync`).
+    """
+    manager = step.model._base_manager
+    # Detached rows (set_null) no longer match the lookup, so both actions drain the step.
+    matching = manager.filter(**{step.lookup: root_pk})
+    pks = list(matching.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+    if not pks:
+        return 0
+    with transaction.atomic():
+        chunk = manager.filter(pk__in=pks)
+        if step.action == "set_null":
+            return chunk.update(**{step.field: None})
+        if tombstones:
+            record_deletions(step.model, pks)
+        # A plain DELETE: no collector, no signals; the plan already handled the children.
+        return chunk._raw_delete(chunk.db)
+
+
+# ================== REQUESTING ==================
+def request_deletion(obj):
+    """Marks a user or class as being deleted and queues its DeletionJob. Returns the job."""
+    now = timezone.now()
+    with transaction.atomic():
+        obj.deletion_requested_at = now
+        update_fields = ["deletion_requested_at"]
+        if isinstance(obj, User):
+            obj.is_active = False
+            update_fields.append("is_active")
+            # The user's classes cascade with them (Class.created_by): hide them
+            # now rather than while they are deleted chunk by chunk.
+            Class.objects.filter(created_by=obj, deletion_requested_at__isnull=True).update(
+                deletion_requested_at=now
+            )
+        obj.save(update_fields=update_fields)
+        job = DeletionJob.objects.create(
+            target_model=obj._meta.label_lower, target_id=str(obj.pk)
+        )
+        enqueue(DELETION_JOB, {"deletion_job_id": str(job.pk)})
+    return job
+
+
+# ================== RUNNING ==================
+def resumable_jobs():
+    stale_before = timezone.now() - timedelta(seconds=_deletion_setting("STALE_AFTER_SECONDS"))
+    return DeletionJob.objects.filter(
+        Q(status=DeletionJob.STATUS_PENDING)
+        | Q(status=DeletionJob.STATUS_RUNNING, heartbeat_at__lt=stale_before)
+    ).order_by("created_at")
+
+
+def _claim(job_id):
+    """Atomically takes a pending or stale job, so only one runner works on it."""
+    claimed = resumable_jobs().filter(pk=job_id).update(
+        status=DeletionJob.STATUS_RUNNING,
+        heartbeat_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+    return DeletionJob.objects.get(pk=job_id) if claimed else None
+
+
+def _affected_class_ids(model, root_pk):
+    """Classes that will lose submissions or feedback without being deleted themselves."""
+    if model is not User:
+        return []
+    class_ids = (
+        Task.objects.filter(
+            Q(submissions__user_id=root_pk) | Q(submissions__feedbacks__user_id=root_pk)
+        )
+        .order_by()
+        .values_list("class_obj_id", flat=True)
+        .distinct()
+    )
+    return [str(pk) for pk in class_ids]
+
+
+def run_deletion_job(job_id, progress=None):
+    """
+    Runs (or resumes) a job to completion. `progress(job)` is called after each
+    chunk. Returns the job, or None when another runner holds it.
+    """
+    job = _claim(job_id)
+    if job is None:
+        return None
+
+    chunk_size = _deletion_setting("CHUNK_SIZE")
+    try:
+        model = apps.get_model(job.target_model)
+        root_pk = model._meta.pk.to_python(job.target_id)
+        if "class_ids" not in job.context:
+            job.context["class_ids"] = _affected_class_ids(model, root_pk)
+            job.save(update_fields=["context"])
+
+        steps = deletion_plan(model)
+        while job.step < len(steps):
+            step = steps[job.step]
+            # Everything under a deleted class leaves the sync feed with the class itself.
+            affected = _run_chunk(step, root_pk, chunk_size, tombstones=model is not Class)
+            if affected:
+                label = step.model._meta.label_lower
+                job.deleted[label] = job.deleted.get(label, 0) + affected
+            else:
+                job.step += 1
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=["step", "deleted", "heartbeat_at"])
+            if progress:
+                progress(job)
+
+        # Nothing is left under the root, so the collector has nothing to load.
+        model._base_manager.filter(pk=root_pk).delete()
+        for class_id in job.context["class_ids"]:
+            if Class.objects.filter(pk=class_id).exists():
+                rebuild_class_stats(class_id)
+
+        job.status = DeletionJob.STATUS_DONE
+        job.finished_at = timezone.now()
+        job.error = ""
+        job.save(update_fields=["status", "finished_at", "error"])
+    except Exception:
+        logger.exception("Deletion job %s failed", job_id)
+        job.status = DeletionJob.STATUS_FAILED
+        job.error = traceback.format_exc()[-4000:]
+        job.save(update_fields=["status", "error"])
+    return job
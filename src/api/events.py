@@ -0,0 +1,216 @@
+"""
+Real-time class events.
+
+Viewset actions publish typed events (task created, submission added, role
+changed, deadline passed) with `publish_class_event`. Connected clients receive
+them over Server-Sent Events from `GET /api/class/{class_code}/events/` (see
+async_views.class_events_view), instead of polling class detail and task lists.
+
+Fan-out has two layers:
+
+- `EventBroker`: in-process pub/sub. Each open stream holds a `Subscription`
+  with a bounded asyncio queue. A client that falls QUEUE_SIZE events behind is
+  not allowed to grow memory: its queue is dropped and replaced by a single
+  "stream.overflow" event, after which the stream closes and the client should
+  refetch and reconnect.
+- A backend (settings.CLASS_EVENTS["BACKEND"]) carries events between
+  processes. `LocalBackend` delivers within the process only (development,
+  tests, a single ASGI worker). `PostgresNotifyBackend` uses LISTEN/NOTIFY so
+  every worker sees events published by any other worker or command.
+
+Events are only published once the surrounding transaction commits.
+"""
+
+# ================== Standard Library ==================
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+# ================== Django ============================
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# ================== DRF ===============================
+from rest_framework.utils.encoders import JSONEncoder
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+#
+
+logger = logging.getLogger(__name__)
+
+TASK_CREATED = "task.created"
+SUBMISSION_ADDED = "submission.added"
+ROLE_CHANGED = "role.changed"
+DEADLINE_PASSED = "task.deadline_passed"
+STREAM_OVERFLOW = "stream.overflow"
+
+
+def _events_setting(name):
+    return settings.CLASS_EVENTS[name]
+
+
+def encode_event(event):
+    return json.dumps(event, cls=JSONEncoder)
+
+
+# ================== IN-PROCESS PUB/SUB ==================
+class Subscription:
+    """
+    One open stream. Created on the event loop that serves the stream; events
+    may be offered from any thread (sync views, the NOTIFY listener).
+    """
+
+    def __init__(self, class_id, maxsize):
+        self.class_id = class_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop is closed; the stream is gone and will unsubscribe.
+            pass
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_make_event(self.class_id, STREAM_OVERFLOW, {}))
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, class_id):
+        subscription = Subscription(str(class_id), _events_setting("QUEUE_SIZE"))
+        with self._lock:
+            self._subscriptions[subscription.class_id].add(subscription)
+        get_backend().start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.class_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.class_id]
+
+    def deliver(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(event["class_id"], ()))
+        for subscription in subscriptions:
+            subscription.offer(event)
+
+    def subscriber_count(self, class_id=None):
+        with self._lock:
+            if class_id is not None:
+                return len(self._subscriptions.get(str(class_id), ()))
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+
+broker = EventBroker()
+
+
+# ================== BACKENDS ==================
+class LocalBackend:
+    """Delivers to subscribers of this process only."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def start(self):
+        pass
+
+    def publish(self, event):
+        transaction.on_commit(lambda: self.deliver(event))
+
+
+class PostgresNotifyBackend:
+    """
+    Cross-process fan-out over Postgres LISTEN/NOTIFY. NOTIFY is transactional,
+    so events are delivered when the publishing transaction commits. Each
+    process runs one listener thread on its own connection, started when its
+    first stream subscribes.
+    """
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self.channel = _events_setting("PG_CHANNEL")
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._listen_forever, name="class-events-listener", daemon=True).start()
+
+    def publish(self, event):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, encode_event(event)])
+
+    def _listen_forever(self):
+        import psycopg
+
+        params = connections[DEFAULT_DB_ALIAS].get_connection_params()
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{self.channel}"')
+                    for notify in conn.notifies():
+                        self.deliver(json.loads(notify.payload))
+            except Exception:
+                logger.warning("Class event listener lost its connection; retrying", exc_info=True)
+                time.sleep(1)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(_events_setting("BACKEND"))(broker.deliver)
+    return _backend
+
+
+# ================== PUBLISHING ==================
+def _make_event(class_id, event_type, data):
+    return {
+        "id": uuid.uuid4().hex,
+        "type": event_type,
+        "class_id": str(class_id),
+        "at": timezone.now().isoformat(),
+        "data": data,
+    }
+
+
+def publish_class_event(class_id, event_type, data):
+    """Publishes an event to every stream of the class, after the current transaction commits."""
+    get_backend().publish(_make_event(class_id, event_type, data))
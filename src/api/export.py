@@ -0,0 +1,206 @@
+"""
+Streaming roster / gradebook export of a class (GET /api/class/{code}/export/).
+
+One row per roster user and task of the class, for grading:
+
+    user_id, username, email, role, task_id, task_title, due_date,
+    status (on_time / late / missing), submitted_at, document,
+    user_upvotes, expert_upvotes
+
+as CSV (`?format=csv`, the default) or gzip-compressed NDJSON
+(`?format=ndjson`), written while it is read:
+
+- the roster is walked by username with a server-side cursor
+  (`iterator(chunk_size=...)`), EXPORT["CHUNK_SIZE"] users at a time;
+- the submissions of a chunk of users come from one query, with the upvote
+  counts computed in SQL so the upvoter lists are never loaded;
+- the gzip stream is flushed after every chunk, so NDJSON rows reach the
+  client as they are produced.
+
+Memory is bounded by CHUNK_SIZE users times the tasks of the class (loaded
+once, up front), and the first bytes go out before the roster is read, so
+neither depends on the size of the class. Submissions of archived months
+(api.partitioning) are the exception: they are read from the archive files
+once, up front, and kept for the whole export.
+"""
+
+# ================== Standard Library ==================
+import csv
+import io
+import zlib
+from itertools import islice
+
+# ================== Django ============================
+from django.conf import settings
+from django.db.models import Case, CharField, Exists, OuterRef, Value, When
+
+# ================== DRF ===============================
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .models import Class, Submission, Task, User
+from .partitioning import iter_archived_submissions
+from .submission_matrix import JSONArrayLength
+
+COLUMNS = (
+    "user_id",
+    "username",
+    "email",
+    "role",
+    "task_id",
+    "task_title",
+    "due_date",
+    "status",
+    "submitted_at",
+    "document",
+    "user_upvotes",
+    "expert_upvotes",
+)
+
+
+def _export_setting(name):
+    return settings.EXPORT[name]
+
+
+# ================== ROWS ==================
+def roster_queryset(class_obj):
+    """
+    Users with a role in the class, annotated with it (the highest one), by
+    username. The roster (the union of the role tables' rows for the class)
+    drives the query, so only its users are looked up and probed for a role.
+    """
+    roles = [
+        role.through.objects.filter(class_id=class_obj.pk)
+        for role in (Class.admins, Class.experts, Class.members)
+    ]
+    roster = roles[0].values("user_id").union(*(role.values("user_id") for role in roles[1:]))
+
+    def holds(role):
+        return Exists(role.filter(user_id=OuterRef("pk")))
+
+    return (
+        User.objects.filter(pk__in=roster)
+        .annotate(
+            role=Case(
+                When(holds(roles[0]), then=Value("admin")),
+                When(holds(roles[1]), then=Value("expert")),
+                default=Value("member"),
+                output_field=CharField(),
+            )
+        )
+        .order_by("username", "pk")
+        .values_list("pk", "username", "email", "role")
+    )
+
+
+def _submissions_of(class_obj, user_ids):
+    """{(user_id, task_id): (submitted_at, document, user upvotes, expert upvotes)}."""
+    rows = Submission.objects.filter(task__class_obj=class_obj, user_id__in=user_ids).values_list(
+        "user_id",
+        "task_id",
+        "submitted_at",
+        "document",
+        JSONArrayLength("user_upvotes"),
+        JSONArrayLength("expert_upvotes"),
+    )
+    return {(user_id, task_id): rest for user_id, task_id, *rest in rows}
+
+
+def _archived_submissions_of(class_obj, task_ids):
+    """As _submissions_of, for every user, from the archived months (api.partitioning)."""
+    return {
+        (s.user_id, s.task_id): (
+            s.submitted_at,
+            s.document,
+            len(s.user_upvotes or ()),
+            len(s.expert_upvotes or ()),
+        )
+        for s in iter_archived_submissions(task_ids, since=class_obj.created_at)
+    }
+
+
+def iter_row_chunks(class_obj):
+    """Yields lists of export rows (tuples in COLUMNS order), one list per chunk of users."""
+    chunk_size = _export_setting("CHUNK_SIZE")
+    tasks = list(
+        Task.objects.filter(class_obj=class_obj).order_by("dueDate").values_list(
+            "pk", "title", "dueDate"
+        )
+    )
+    archived = _archived_submissions_of(class_obj, [task[0] for task in tasks])
+    users = roster_queryset(class_obj).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(users, chunk_size)):
+        submissions = _submissions_of(class_obj, [user[0] for user in chunk]) if tasks else {}
+        rows = []
+        for user_id, username, email, role in chunk:
+            for task_id, title, due_date in tasks:
+                submission = submissions.get((user_id, task_id)) or archived.get((user_id, task_id))
+                if submission is None:
+                    status, submission = "missing", (None, "", 0, 0)
+                else:
+                    status = "on_time" if submission[0] <= due_date else "late"
+                rows.append(
+                    (user_id, username, email, role, task_id, title, due_date, status, *submission)
+                )
+        yield rows
+
+
+# ================== ENCODING ==================
+def _csv_value(value, encoder=JSONEncoder()):
+    """Dates and UUIDs formatted as in the JSON responses; None as an empty cell."""
+    if value is None:
+        return ""
+    return value if isinstance(value, (str, int)) else encoder.default(value)
+
+
+def iter_csv(row_chunks):
+    """CSV text, the header first, then one piece per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(COLUMNS)
+    yield flush()
+    for rows in row_chunks:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield flush()
+
+
+def iter_ndjson_gzip(row_chunks):
+    """Gzip-compressed NDJSON bytes, the gzip header first, then flushed after each chunk."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    yield compressor.flush(zlib.Z_SYNC_FLUSH)
+    for rows in row_chunks:
+        lines = "".join(encoder.encode(dict(zip(COLUMNS, row))) + "\n" for row in rows)
+        yield compressor.compress(lines.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+# ================== RENDERERS ==================
+class _ExportRenderer(BaseRenderer):
+    """Selects the export format; the rows are streamed by the view, errors are rendered as JSON."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class CSVExportRenderer(_ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONExportRenderer(_ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
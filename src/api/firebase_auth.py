@@ -0,0 +1,86 @@
+"""
+Firebase ID token verification.
+
+The Admin SDK is imported and initialized on first use rather than at settings
+import: it costs a few hundred milliseconds that migrations, management
+commands and freshly booted workers would otherwise pay without ever
+verifying a token.
+"""
+
+# ================== Standard Library ==================
+import logging
+import threading
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+from asgiref.sync import sync_to_async
+
+# ================== Local / App Imports =================
+#
+
+logger = logging.getLogger(__name__)
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_firebase_app():
+    """
+    Returns the Firebase Admin app, initializing it on the first call.
+    Thread-safe: concurrent first logins initialize it exactly once.
+    Raises ImproperlyConfigured while the service account key is missing.
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = _initialize_app()
+    return _app
+
+
+def _initialize_app():
+    import firebase_admin
+    from firebase_admin import credentials
+
+    try:
+        # Already initialized elsewhere in this process (e.g. a shell session).
+        return firebase_admin.get_app()
+    except ValueError:
+        pass
+
+    key_path = settings.SERVICE_ACCOUNT_KEY_PATH
+    if not key_path.exists():
+        raise ImproperlyConfigured(f"Firebase service account key not found at: {key_path}")
+    app = firebase_admin.initialize_app(credentials.Certificate(key_path))
+    logger.info("Firebase Admin SDK initialized.")
+    return app
+
+
+def verify_firebase_token(firebase_token):
+    """
+    Verifies a Firebase ID token and returns the decoded claims.
+    Raises whatever the Firebase SDK raises for invalid or expired tokens.
+    """
+    from firebase_admin import auth
+
+    return auth.verify_id_token(firebase_token, app=get_firebase_app())
+
+
+async def averify_firebase_token(firebase_token):
+    """
+    Async counterpart of `verify_firebase_token`.
+
+    The Firebase SDK only ships a blocking verifier (it may fetch Google's public
+    certificates over the network), so we run it in the default thread pool with
+    `thread_sensitive=False`. That keeps the event loop free: a single ASGI worker
+    can have many slow logins in flight at the same time.
+    """
+    return await sync_to_async(verify_firebase_token, thread_sensitive=False)(
+        firebase_token
+    )
@@ -0,0 +1,84 @@
+"""
+Time-ordered primary keys.
+
+`uuid7()` returns RFC 9562 version 7 UUIDs: a 48-bit Unix timestamp in
+milliseconds, then a 12-bit counter, then 62 random bits. Keys generated
+later sort later, so inserts append to the right edge of the primary key
+B-tree instead of landing on random pages (no page splits, a small hot set
+of index pages in cache). They are ordinary `uuid.UUID` values and fit the
+existing uuid columns unchanged.
+
+Within one process keys are strictly increasing: several keys in the same
+millisecond take consecutive counter values (RFC 9562 §6.2, method 1), and a
+counter overflow or a clock step backwards borrows from the next millisecond.
+"""
+
+# ================== Standard Library ==================
+import os
+import threading
+import time
+import uuid
+
+# ================== Django ============================
+#
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+#
+
+_COUNTER_BITS = 12
+_COUNTER_MAX = (1 << _COUNTER_BITS) - 1
+# The counter starts at a random value below this, leaving room to count up.
+_COUNTER_SEED_MAX = 1 << (_COUNTER_BITS - 1)
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    global _last_ms, _counter
+
+    rand = int.from_bytes(os.urandom(10), "big")
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = rand >> 64 & (_COUNTER_SEED_MAX - 1)
+        elif _counter < _COUNTER_MAX:
+            _counter += 1
+        else:
+            _last_ms += 1
+            _counter = 0
+        timestamp_ms, counter = _last_ms, _counter
+
+    return _pack(timestamp_ms, counter, rand)
+
+
+def uuid7_at(timestamp_ms, rand):
+    """
+    A version 7 UUID for a given Unix time in milliseconds, e.g. to key rows
+    backdated to that time. The 74 bits after the timestamp come from `rand`
+    (an int, e.g. `random.Random(seed).getrandbits(74)`), so keys of the same
+    millisecond are unordered.
+    """
+    return _pack(timestamp_ms, rand >> 62 & _COUNTER_MAX, rand)
+
+
+def _pack(timestamp_ms, counter, rand):
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76  # version
+    value |= counter << 64
+    value |= 0b10 << 62  # variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
+
+
+def uuid7_timestamp_ms(value):
+    """Unix time in milliseconds embedded in a version 7 UUID."""
+    return value.int >> 80
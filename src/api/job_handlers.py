@@ -0,0 +1,103 @@
+"""
+Background job handlers (see `api.jobs`). Imported by `ApiConfig.ready()` so
+every process knows the same job names.
+
+Handlers take JSON-able keyword arguments and must be safe to run twice: a
+job is retried after a failure, and requeued if its worker dies mid-run.
+"""
+
+# ================== Standard Library ==================
+from datetime import datetime
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from . import events
+from .class_stats import REBUILD_CLASS_STATS_JOB, rebuild_class_stats
+from .deletion import DELETION_JOB, run_deletion_job
+from .jobs import enqueue, job
+from .models import DeletionJob, Invitation, Task
+
+TASK_DEADLINE_JOB = "tasks.deadline_passed"
+DELIVER_INVITATION_JOB = "invitations.deliver"
+
+
+@job(DELETION_JOB)
+def run_deletion(deletion_job_id):
+    # A retry resumes the deletion from its last completed chunk.
+    DeletionJob.objects.filter(
+        pk=deletion_job_id, status=DeletionJob.STATUS_FAILED
+    ).update(status=DeletionJob.STATUS_PENDING)
+    deletion_job = run_deletion_job(deletion_job_id)
+    if deletion_job is not None and deletion_job.status == DeletionJob.STATUS_FAILED:
+        raise RuntimeError(f"Deletion job {deletion_job_id} failed:\n{deletion_job.error}")
+
+
+@job(REBUILD_CLASS_STATS_JOB)
+def rebuild_stats(class_id):
+    rebuild_class_stats(class_id)
+
+
+@job(TASK_DEADLINE_JOB)
+def publish_task_deadline(task_id, due_date):
+    """
+    Queued for a task's due date when it is created or rescheduled. A job left
+    over from an earlier due date finds the date changed and does nothing.
+    """
+    task = Task.objects.filter(pk=task_id).values("class_obj_id", "title", "dueDate").first()
+    if task is None or task["dueDate"] != datetime.fromisoformat(due_date):
+        return
+    events.publish_class_event(
+        task["class_obj_id"],
+        events.DEADLINE_PASSED,
+        {"task_id": task_id, "title": task["title"], "due_date": task["dueDate"]},
+    )
+
+
+@job(DELIVER_INVITATION_JOB)
+def deliver_invitation(invitation_id):
+    invitation = (
+        Invitation.objects.select_related("class_obj", "invited_by")
+        .filter(pk=invitation_id, status="pending", expires_at__gt=timezone.now())
+        .first()
+    )
+    if invitation is None:
+        return
+    send_mail(
+        subject=f"You're invited to join {invitation.class_obj.class_name}",
+        message=(
+            f"{invitation.invited_by.username} invited you to the class "
+            f"\"{invitation.class_obj.class_name}\".\n\n"
+            f"Join with the class code {invitation.class_obj.class_code} "
+            f"before {invitation.expires_at:%Y-%m-%d %H:%M} UTC."
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[invitation.email],
+    )
+
+
+# ================== ENQUEUEING ==================
+def schedule_task_deadline(task):
+    """Queues the deadline event of a task for its due date."""
+    enqueue(
+        TASK_DEADLINE_JOB,
+        {"task_id": str(task.pk), "due_date": task.dueDate.isoformat()},
+        run_at=task.dueDate,
+    )
+
+
+@receiver(post_save, sender=Invitation)
+def _invitation_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(DELIVER_INVITATION_JOB, {"invitation_id": str(instance.pk)}, priority=10)
@@ -0,0 +1,267 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows of the `jobs` table in the application database, so there is
+no broker to run and a job enqueued inside a transaction only becomes
+visible if that transaction commits.
+
+- Handlers are plain functions registered by name with `@job("name")`
+  (see `api.job_handlers`); `enqueue(name, payload, priority=, run_at=)`
+  queues a call with the payload as keyword arguments.
+- Workers (`manage.py run_worker`) claim due jobs, highest priority first,
+  with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number of workers share
+  the queue without blocking each other. SQLite has no row locks; there the
+  claim is guarded by a conditional UPDATE instead, which is enough for tests
+  and development.
+- A failing job is retried with exponential backoff (plus jitter) until it
+  has run `max_attempts` times, then marked failed with its traceback.
+- While a job runs, its worker renews the lock (`locked_at`) every
+  HEARTBEAT_SECONDS. A job whose worker died is requeued once its lock is
+  older than VISIBILITY_TIMEOUT_SECONDS, so handlers must be safe to run
+  twice. Outcomes are only recorded by the worker still holding the lock: a
+  worker that lost its job (e.g. after a long stall) leaves it alone.
+
+Run counts, run time and queue delay per job name are exported to Prometheus
+(`api.metrics`).
+"""
+
+# ================== Standard Library ==================
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+# ================== Django ============================
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .metrics import JOB_DURATION, JOB_QUEUE_DELAY, JOBS_PROCESSED
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def _jobs_setting(name):
+    return settings.JOBS[name]
+
+
+# ================== REGISTRY ==================
+def job(name, max_attempts=None):
+    """Registers a function as the handler of jobs called `name`."""
+
+    def register(func):
+        if name in _registry:
+            raise ValueError(f"Job handler '{name}' is already registered")
+        func.job_name = name
+        func.max_attempts = max_attempts
+        _registry[name] = func
+        return func
+
+    return register
+
+
+def get_handler(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No job handler registered as '{name}'") from None
+
+
+def registered_jobs():
+    return sorted(_registry)
+
+
+# ================== ENQUEUEING ==================
+def enqueue(name, payload=None, *, priority=0, run_at=None, delay=None, max_attempts=None):
+    """
+    Queues a job. It runs at `run_at` (or `delay` seconds from now, or as soon
+    as possible), with the payload as keyword arguments of the handler.
+    """
+    handler = get_handler(name)
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts or handler.max_attempts or _jobs_setting("MAX_ATTEMPTS"),
+    )
+
+
+# ================== CLAIMING ==================
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim(worker, names=None, limit=1):
+    """Takes up to `limit` due jobs for `worker`, marking them running. Returns them."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lte=now)
+    if names:
+        due = due.filter(name__in=names)
+    due = due.order_by("-priority", "run_at")
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(due.select_for_update(skip_locked=True).values_list("pk", flat=True)[:limit])
+            Job.objects.filter(pk__in=pks).update(
+                status=Job.STATUS_RUNNING, locked_by=worker, locked_at=now
+            )
+    else:
+        # No row locks (SQLite): two workers may pick the same row, and only one
+        # of the conditional updates succeeds. Each statement commits on its own,
+        # so no transaction has to upgrade a read lock to a write lock.
+        pks = [
+            pk
+            for pk in due.values_list("pk", flat=True)[:limit]
+            if Job.objects.filter(pk=pk, status=Job.STATUS_QUEUED).update(
+                status=Job.STATUS_RUNNING, locked_by=worker, locked_at=now
+            )
+        ]
+    return list(Job.objects.filter(pk__in=pks).order_by("-priority", "run_at"))
+
+
+def requeue_stale(now=None):
+    """Requeues running jobs whose worker stopped renewing its lock. Returns the count."""
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=_jobs_setting("VISIBILITY_TIMEOUT_SECONDS"))
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=stale_before).update(
+        status=Job.STATUS_QUEUED, locked_by="", locked_at=None, run_at=now
+    )
+
+
+def purge_finished(now=None):
+    """Deletes done and failed jobs older than KEEP_FINISHED_DAYS. Returns the count."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=_jobs_setting("KEEP_FINISHED_DAYS"))
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.STATUS_DONE, Job.STATUS_FAILED], finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def renew_lock(job_obj):
+    """Bumps the lock of a running job, if its worker still holds it. Returns whether it does."""
+    return bool(
+        Job.objects.filter(
+            pk=job_obj.pk, status=Job.STATUS_RUNNING, locked_by=job_obj.locked_by
+        ).update(locked_at=timezone.now())
+    )
+
+
+@contextmanager
+def _heartbeat(job_obj):
+    """Renews the job's lock from a background thread while the block runs."""
+    stopped = threading.Event()
+    interval = _jobs_setting("HEARTBEAT_SECONDS")
+
+    def beat():
+        try:
+            while not stopped.wait(interval) and renew_lock(job_obj):
+                pass
+        except DatabaseError:
+            logger.exception("Renewing the lock of job %s failed", job_obj.pk)
+        finally:
+            connection.close()  # this thread's own connection
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_obj.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+# ================== RUNNING ==================
+def backoff_seconds(attempts):
+    base = _jobs_setting("BACKOFF_SECONDS") * 2 ** (attempts - 1)
+    delay = min(base, _jobs_setting("BACKOFF_MAX_SECONDS"))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def execute(job_obj):
+    """
+    Runs a claimed job and records the outcome: "done", "retried", "failed",
+    or "lost" if the job was requeued meanwhile and the outcome is dropped.
+    """
+    started = timezone.now()
+    JOB_QUEUE_DELAY.labels(job_obj.name).observe(
+        max((started - job_obj.run_at).total_seconds(), 0)
+    )
+    job_obj.attempts += 1
+    held = Job.objects.filter(
+        pk=job_obj.pk, status=Job.STATUS_RUNNING, locked_by=job_obj.locked_by
+    )
+    start = time.perf_counter()
+    try:
+        with _heartbeat(job_obj):
+            get_handler(job_obj.name)(**job_obj.payload)
+    except Exception:
+        error = traceback.format_exc()[-4000:]
+        logger.warning("Job %s (%s) failed, attempt %d", job_obj.pk, job_obj.name, job_obj.attempts)
+        if job_obj.attempts < job_obj.max_attempts:
+            outcome = "retried"
+            updated = held.update(
+                status=Job.STATUS_QUEUED,
+                attempts=job_obj.attempts,
+                last_error=error,
+                run_at=timezone.now() + timedelta(seconds=backoff_seconds(job_obj.attempts)),
+                locked_by="",
+                locked_at=None,
+            )
+        else:
+            outcome = "failed"
+            updated = held.update(
+                status=Job.STATUS_FAILED,
+                attempts=job_obj.attempts,
+                last_error=error,
+                finished_at=timezone.now(),
+            )
+    else:
+        outcome = "done"
+        updated = held.update(
+            status=Job.STATUS_DONE, attempts=job_obj.attempts, finished_at=timezone.now()
+        )
+    finally:
+        JOB_DURATION.labels(job_obj.name).observe(time.perf_counter() - start)
+    if not updated:
+        logger.warning(
+            "Job %s (%s) was requeued while it ran, outcome dropped", job_obj.pk, job_obj.name
+        )
+        outcome = "lost"
+    JOBS_PROCESSED.labels(job_obj.name, outcome).inc()
+    return outcome
+
+
+def run_pending(names=None, limit=None):
+    """
+    Runs due jobs in this thread until none are left (or `limit` ran), e.g. in
+    tests or a one-off command. Returns the number of jobs run.
+    """
+    worker = worker_id()
+    count = 0
+    while limit is None or count < limit:
+        claimed = claim(worker, names=names)
+        if not claimed:
+            break
+        for job_obj in claimed:
+            execute(job_obj)
+            count += 1
+    return count
@@ -0,0 +1,127 @@
+# src/api/management/commands/benchmark_async_login.py
+
+import asyncio
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client, override_settings
+
+from api.models import User
+
+BENCH_FIREBASE_UID = "benchmark-firebase-uid"
+BENCH_EMAIL = "benchmark-login@example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares login throughput of the sync view (WSGI, one thread per request) "
+        "against the async view (ASGI, one event loop) with simulated Firebase latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Logins per run.")
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Simulated Firebase verification latency in seconds.",
+        )
+        parser.add_argument(
+            "--wsgi-threads",
+            type=int,
+            default=4,
+            help="Worker threads for the WSGI run (gunicorn --threads equivalent).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=100,
+            help="Logins kept in flight at once on the ASGI event loop.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        User.objects.get_or_create(
+            firebase_uid=BENCH_FIREBASE_UID,
+            defaults={"email": BENCH_EMAIL, "username": BENCH_EMAIL},
+        )
+
+        latency = options["latency"]
+
+        def fake_verify(token):
+            # Stands in for the blocking round-trip to Google's certificate endpoint.
+            time.sleep(latency)
+            return {"uid": BENCH_FIREBASE_UID, "email": BENCH_EMAIL}
+
+        # The login rate limit (api.throttling) would answer most of the run with 429s;
+        # the benchmark measures the views, so the buckets are switched off.
+        with mock.patch("api.views.verify_firebase_token", fake_verify), mock.patch(
+            "api.firebase_auth.verify_firebase_token", fake_verify
+        ), override_settings(THROTTLES={**settings.THROTTLES, "BUCKETS": {}}):
+            wsgi = self._run_wsgi(options["requests"], options["wsgi_threads"])
+            asgi = asyncio.run(self._run_asgi(options["requests"], options["concurrency"]))
+
+        results = {
+            "requests": options["requests"],
+            "latency_s": latency,
+            "wsgi": wsgi,
+            "asgi": asgi,
+            "speedup": round(asgi["rps"] / wsgi["rps"], 2) if wsgi["rps"] else None,
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for name in ("wsgi", "asgi"):
+            run = results[name]
+            self.stdout.write(
+                f"{name.upper()}: {run['ok']}/{results['requests']} ok in "
+                f"{run['seconds']:.2f}s ({run['rps']:.1f} req/s)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"ASGI speedup: {results['speedup']}x"))
+
+    def _run_wsgi(self, total, threads):
+        def login(_):
+            try:
+                response = Client().post(
+                    "/api/login/", {"token": "bench"}, content_type="application/json"
+                )
+                return response.status_code
+            finally:
+                close_old_connections()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(login, range(total)))
+        return self._summarize("WSGI", statuses, time.perf_counter() - start)
+
+    async def _run_asgi(self, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                response = await client.post(
+                    "/api/async/login/", {"token": "bench"}, content_type="application/json"
+                )
+                return response.status_code
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(login() for _ in range(total)))
+        return self._summarize("ASGI", statuses, time.perf_counter() - start)
+
+    @staticmethod
+    def _summarize(name, statuses, seconds):
+        # Failed logins are fast: counting them would inflate the throughput.
+        failed = Counter(code for code in statuses if code != 200)
+        if failed:
+            raise CommandError(f"{name} run: {sum(failed.values())} logins failed {dict(failed)}")
+        ok = len(statuses)
+        return {"ok": ok, "seconds": round(seconds, 3), "rps": round(ok / seconds, 1)}
@@ -0,0 +1,103 @@
+# src/api/management/commands/benchmark_db_connections.py
+
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import ConnectionHandler
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures per-request database latency with a fresh connection per request, "
+        "persistent connections and the psycopg3 pool, using the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=500, help="Simulated requests per mode."
+        )
+        parser.add_argument(
+            "--database", default="default", help="Database alias to copy settings from."
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if options["database"] not in settings.DATABASES:
+            raise CommandError(f"Unknown database alias '{options['database']}'.")
+
+        base = dict(settings.DATABASES[options["database"]])
+        base_options = {k: v for k, v in base.get("OPTIONS", {}).items() if k != "pool"}
+        pool_options = {**settings.DB_POOL_OPTIONS, "min_size": 1}
+
+        # Each mode gets its own alias: Django keys pools by alias, so reusing
+        # "default" here would hand out the application's real pool.
+        modes = {
+            "fresh": {**base, "CONN_MAX_AGE": 0, "OPTIONS": base_options},
+            "persistent": {
+                **base,
+                "CONN_MAX_AGE": None,
+                "CONN_HEALTH_CHECKS": True,
+                "OPTIONS": base_options,
+            },
+        }
+        if base["ENGINE"] == "django.db.backends.postgresql":
+            modes["pooled"] = {
+                **base,
+                "CONN_MAX_AGE": 0,
+                "OPTIONS": {**base_options, "pool": pool_options},
+            }
+        else:
+            self.stdout.write(
+                self.style.NOTICE(
+                    f"{base['ENGINE']} has no connection pool; skipping the pooled mode."
+                )
+            )
+
+        handler = ConnectionHandler(
+            {
+                "default": base,  # ConnectionHandler insists on a default alias.
+                **{f"benchmark_{name}": config for name, config in modes.items()},
+            }
+        )
+        results = {}
+        for name in modes:
+            connection = handler[f"benchmark_{name}"]
+            try:
+                results[name] = self._measure(connection, options["iterations"])
+            finally:
+                connection.close()
+                if hasattr(connection, "close_pool"):
+                    connection.close_pool()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<11} p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms "
+                f"mean={result['mean_ms']:.3f}ms"
+            )
+
+    def _measure(self, connection, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            # Same hook Django runs on request_finished: closes the connection
+            # (or hands it back to the pool) unless it is allowed to persist.
+            connection.close_if_unusable_or_obsolete()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        return {
+            "iterations": iterations,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+        }
@@ -0,0 +1,262 @@
+# src/api/management/commands/benchmark_endpoints.py
+
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from api.models import Class, Feedback, Submission, Task, User
+from api.query_budget import QueryRecorder
+from api.utils import generate_tokens_for_user
+
+BENCH_FIREBASE_UID = "benchmark-endpoints-uid"
+
+# populate_db options per scale; the name is the approximate submission count.
+SCALES = {
+    "small": {"users": 300, "classes": 10, "max_roster": 100, "tasks_per_class": 10},
+    "100k": {
+        "users": 20_000,
+        "classes": 500,
+        "max_roster": 2_000,
+        "tasks_per_class": 20,
+    },
+    "10m": {
+        "users": 500_000,
+        "classes": 20_000,
+        "max_roster": 10_000,
+        "min_roster": 20,
+        "tasks_per_class": 30,
+    },
+}
+
+ENDPOINTS = [
+    "login",
+    "me",
+    "class_list",
+    "class_detail",
+    "class_tasks",
+    "submit",
+    "list_submissions",
+    "user_search",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds data at a given scale and measures latency, query count and memory "
+        "of the hot API endpoints in-process through the Django test client. "
+        "Prints (or writes) the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small")
+        parser.add_argument(
+            "--no-seed",
+            action="store_true",
+            help="Benchmark the data already in the database instead of reseeding.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--iterations", type=int, default=50, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per endpoint.")
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=ENDPOINTS,
+            default=ENDPOINTS,
+            help="Subset of endpoints to run.",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if not options["no_seed"]:
+            self.stderr.write(f"Seeding '{options['scale']}' dataset...")
+            call_command(
+                "populate_db",
+                clear=True,
+                seed=options["seed"],
+                stdout=self.stderr,
+                **SCALES[options["scale"]],
+            )
+
+        subject = self._pick_subject()
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {subject['token']}")
+
+        def fake_verify(token):
+            return {"uid": BENCH_FIREBASE_UID, "email": subject["user"].email}
+
+        results = {}
+        # Every endpoint runs far more often than its rate limit allows (api.throttling);
+        # the benchmark measures the endpoints, so the buckets are switched off.
+        with mock.patch(
+            "api.views.verify_firebase_token", fake_verify
+        ), override_settings(THROTTLES={**settings.THROTTLES, "BUCKETS": {}}):
+            for name in options["endpoints"]:
+                self.stderr.write(f"  {name}...")
+                results[name] = self._benchmark(
+                    client, *self._request_for(name, subject), options
+                )
+
+        report = {
+            "scale": "existing" if options["no_seed"] else options["scale"],
+            "seed": options["seed"],
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "generated_at": timezone.now().isoformat(),
+            "iterations": options["iterations"],
+            "dataset": {
+                model._meta.db_table: model.objects.count()
+                for model in (User, Class, Task, Submission, Feedback)
+            },
+            "subject": {
+                "class_code": subject["class"].class_code,
+                "members": subject["members"],
+                "task_id": str(subject["task"].pk),
+            },
+            "endpoints": results,
+        }
+
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(payload)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    # ================== SUBJECT ==================
+    def _pick_subject(self):
+        """
+        Benchmarks the worst realistic case: a member of the class with the
+        most members who has not yet submitted to one of its active tasks, so
+        that submit succeeds.
+        """
+        now = timezone.now()
+        classes = Class.objects.annotate(roster_size=Count("members")).order_by(
+            "-roster_size", "pk"
+        )
+        for class_obj in classes.iterator():
+            task = class_obj.tasks.filter(dueDate__gt=now).order_by("dueDate").first()
+            if task is None:
+                continue
+            user = (
+                class_obj.members.exclude(submissions__task=task).order_by("pk").first()
+            )
+            if user is None:
+                continue
+            User.objects.filter(firebase_uid=BENCH_FIREBASE_UID).exclude(pk=user.pk).update(
+                firebase_uid=None
+            )
+            User.objects.filter(pk=user.pk).update(firebase_uid=BENCH_FIREBASE_UID)
+            return {
+                "user": user,
+                "token": generate_tokens_for_user(user)["access"],
+                "class": class_obj,
+                "members": class_obj.roster_size,
+                "task": task,
+            }
+        raise CommandError(
+            "No class with an active task and a member who has not submitted; "
+            "seed data first (drop --no-seed)."
+        )
+
+    # ================== REQUESTS ==================
+    @staticmethod
+    def _request_for(name, subject):
+        """(method, path, body, rollback) for one endpoint."""
+        code = subject["class"].class_code
+        task_id = subject["task"].pk
+        return {
+            "login": ("post", "/api/login/", {"token": "bench"}, False),
+            "me": ("get", "/api/me/", None, False),
+            "class_list": ("get", "/api/class/", None, False),
+            "class_detail": ("get", f"/api/class/{code}/", None, False),
+            "class_tasks": ("get", f"/api/class/{code}/tasks/", None, False),
+            # Each submit is rolled back so every iteration creates the same row.
+            "submit": (
+                "post",
+                f"/api/tasks/{task_id}/submit/",
+                {"document": "https://files.example.com/benchmark.pdf"},
+                True,
+            ),
+            "list_submissions": ("get", f"/api/tasks/{task_id}/submissions/", None, False),
+            "user_search": ("get", "/api/users/", {"search": subject["user"].username}, False),
+        }[name]
+
+    def _send(self, client, method, path, body, rollback):
+        if method == "get":
+            send = lambda: client.get(path, body)  # noqa: E731
+        else:
+            send = lambda: client.post(path, body, content_type="application/json")  # noqa: E731
+        if not rollback:
+            response = send()
+        else:
+            with transaction.atomic():
+                response = send()
+                transaction.set_rollback(True)
+        # Timing error responses would measure the wrong thing.
+        if not 200 <= response.status_code < 300:
+            raise CommandError(
+                f"{method.upper()} {path} answered {response.status_code}: "
+                f"{response.content[:300].decode(errors='replace')}"
+            )
+        return response
+
+    # ================== MEASUREMENT ==================
+    def _benchmark(self, client, method, path, body, rollback, options):
+        for _ in range(options["warmup"]):
+            self._send(client, method, path, body, rollback)
+
+        latencies, query_counts, db_times = [], [], []
+        for _ in range(options["iterations"]):
+            recorder = QueryRecorder().start()
+            start = time.perf_counter()
+            response = self._send(client, method, path, body, rollback)
+            latencies.append((time.perf_counter() - start) * 1000)
+            stats = recorder.stop()
+            query_counts.append(stats.count)
+            db_times.append(stats.db_time_ms)
+
+        # Memory is traced in a separate request: tracemalloc would skew the timings.
+        tracemalloc.start()
+        self._send(client, method, path, body, rollback)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "method": method.upper(),
+            "path": path,
+            "status": response.status_code,
+            "response_bytes": len(response.content),
+            "latency_ms": _summarize(latencies),
+            "db_time_ms": _summarize(db_times),
+            "queries": {"min": min(query_counts), "max": max(query_counts)},
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+
+def _summarize(samples):
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+    return {
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "min": round(ordered[0], 3),
+        "max": round(ordered[-1], 3),
+    }
@@ -0,0 +1,128 @@
+# src/api/management/commands/benchmark_uuid_keys.py
+
+import json
+import platform
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from api.ids import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares random (uuid4) and time-ordered (uuid7) primary keys: inserts the same "
+        "number of rows into scratch tables in committed batches and reports insert "
+        "throughput and primary key index size. Prints (or writes) the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1_000,
+            help="Rows per INSERT transaction, like a burst of submissions.",
+        )
+        parser.add_argument(
+            "--generators", nargs="+", choices=GENERATORS, default=list(GENERATORS)
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--rows and --batch-size must be positive.")
+
+        results = {}
+        for name in options["generators"]:
+            self.stderr.write(f"Inserting {options['rows']:,} rows keyed by {name}...")
+            results[name] = self._run(name, GENERATORS[name], options["rows"], options["batch_size"])
+
+        report = {
+            "vendor": connection.vendor,
+            "python": platform.python_version(),
+            "rows": options["rows"],
+            "batch_size": options["batch_size"],
+            "results": results,
+        }
+        if {"uuid4", "uuid7"} <= results.keys():
+            v4, v7 = results["uuid4"], results["uuid7"]
+            report["uuid7_vs_uuid4"] = {
+                "insert_speedup": round(v7["rows_per_s"] / v4["rows_per_s"], 2),
+                "index_size_ratio": (
+                    round(v7["index_bytes"] / v4["index_bytes"], 2)
+                    if v4["index_bytes"] and v7["index_bytes"]
+                    else None
+                ),
+            }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _run(self, name, generate, rows, batch_size):
+        table = f"bench_pk_{name}"
+        quoted = connection.ops.quote_name(table)
+        id_field = models.UUIDField()
+        id_type = id_field.db_type(connection)
+
+        started = time.perf_counter()
+        ids = [generate() for _ in range(rows)]
+        generate_seconds = time.perf_counter() - started
+        values = [id_field.get_db_prep_value(pk, connection) for pk in ids]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {quoted}")
+            cursor.execute(
+                f"CREATE TABLE {quoted} (id {id_type} NOT NULL PRIMARY KEY, payload varchar(64) NOT NULL)"
+            )
+        try:
+            insert = f"INSERT INTO {quoted} (id, payload) VALUES (%s, %s)"
+            started = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                batch = values[offset : offset + batch_size]
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(insert, [(pk, "x" * 64) for pk in batch])
+            insert_seconds = time.perf_counter() - started
+
+            index_bytes, table_bytes = self._sizes(table)
+            return {
+                "generate_seconds": round(generate_seconds, 3),
+                "insert_seconds": round(insert_seconds, 3),
+                "rows_per_s": round(rows / insert_seconds),
+                "index_bytes": index_bytes,
+                "table_bytes": table_bytes,
+            }
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {quoted}")
+
+    @staticmethod
+    def _sizes(table):
+        """(primary key index bytes, table bytes), or None where the backend can't tell."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT pg_relation_size(%s::regclass), pg_relation_size(%s::regclass)",
+                    [f"{table}_pkey", table],
+                )
+                return cursor.fetchone()
+            if connection.vendor == "sqlite":
+                try:
+                    cursor.execute(
+                        "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN (%s, %s) GROUP BY name",
+                        [f"sqlite_autoindex_{table}_1", table],
+                    )
+                except Exception:
+                    return None, None  # SQLite built without the dbstat table.
+                sizes = dict(cursor.fetchall())
+                return sizes.get(f"sqlite_autoindex_{table}_1"), sizes.get(table)
+        return None, None
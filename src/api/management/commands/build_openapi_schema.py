@@ -0,0 +1,30 @@
+# src/api/management/commands/build_openapi_schema.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.openapi_schema import artifact_path, code_version, write_schema_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the OpenAPI schema once and writes it as a versioned artifact "
+        "(OPENAPI_SCHEMA_DIR/openapi-<code version>.json) for /api/schema/ to serve. "
+        "Run it at build time, after the code is in place."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file", help="Write to this path instead of the versioned artifact path."
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        path = write_schema_artifact(options["file"] or artifact_path())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Schema for code version {code_version()} written to {path} "
+                f"in {time.perf_counter() - start:.1f}s."
+            )
+        )
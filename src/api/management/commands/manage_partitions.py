@@ -0,0 +1,71 @@
+# src/api/management/commands/manage_partitions.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.partitioning import (
+    PARTITIONED_TABLES,
+    archivable_partitions,
+    archive_partition,
+    ensure_partitions,
+    is_partitioned,
+    partitioning_supported,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly partitions of submissions and feedbacks ahead of time and "
+        "archives months past the retention window to compressed files (Postgres only). "
+        "Meant to run daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables", nargs="+", choices=PARTITIONED_TABLES, default=list(PARTITIONED_TABLES)
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.PARTITIONING["MONTHS_AHEAD"],
+            help="Future months to create partitions for.",
+        )
+        parser.add_argument(
+            "--archive-after-months",
+            type=int,
+            default=settings.PARTITIONING["ARCHIVE_AFTER_MONTHS"],
+            help="Archive partitions of months that ended more than this many months ago.",
+        )
+        parser.add_argument("--no-archive", action="store_true", help="Only create partitions.")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report what would be archived; change nothing."
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning_supported():
+            self.stdout.write("Partitioning needs Postgres; nothing to do.")
+            return
+        if options["months_ahead"] < 0 or options["archive_after_months"] < 1:
+            raise CommandError("--months-ahead must be >= 0 and --archive-after-months >= 1.")
+
+        for table in options["tables"]:
+            if not is_partitioned(table):
+                raise CommandError(f"'{table}' is not partitioned; run the migrations first.")
+
+            if not options["dry_run"]:
+                created = ensure_partitions(table, options["months_ahead"])
+                for name in created:
+                    self.stdout.write(f"Created {name}")
+
+            if options["no_archive"]:
+                continue
+            for month, name in archivable_partitions(table, options["archive_after_months"]):
+                if options["dry_run"]:
+                    self.stdout.write(f"Would archive {name}")
+                    continue
+                record = archive_partition(table, month)
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Archived {record.partition_name}: {record.row_count:,} rows -> {record.path}"
+                    )
+                )
@@ -1,40 +1,416 @@
+# src/api/management/commands/populate_db.py
+
+import math
 import random
-from decimal import Decimal
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import chain
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.ids import uuid7_at
+from api.models import (
+    ChangeLogEntry,
+    Class,
+    DeletionJob,
+    Feedback,
+    Invitation,
+    Job,
+    Submission,
+    Task,
+    TaskStats,
+    User,
+)
+
+INVITATION_STATUSES = ["pending", "accepted", "declined", "expired"]
 
-from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from django.utils import lorem_ipsum
-from api.models import User, Product, Order, OrderItem
 
 class Command(BaseCommand):
-    help = 'Creates application data'
-
-    def handle(self, *args, **kwargs):
-        # get or create superuser
-        user = User.objects.filter(username='admin').first()
-        if not user:
-            user = User.objects.create_superuser(username='admin', password='test')
-
-        # create products - name, desc, price, stock, image
-        products = [
-            Product(name="A Scanner Darkly", description=lorem_ipsum.paragraph(), price=Decimal('12.99'), stock=4),
-            Product(name="Coffee Machine", description=lorem_ipsum.paragraph(), price=Decimal('70.99'), stock=6),
-            Product(name="Velvet Underground & Nico", description=lorem_ipsum.paragraph(), price=Decimal('15.99'), stock=11),
-            Product(name="Enter the Wu-Tang (36 Chambers)", description=lorem_ipsum.paragraph(), price=Decimal('17.99'), stock=2),
-            Product(name="Digital Camera", description=lorem_ipsum.paragraph(), price=Decimal('350.99'), stock=4),
-            Product(name="Watch", description=lorem_ipsum.paragraph(), price=Decimal('500.05'), stock=0),
+    help = (
+        "Generates synthetic users, classes (Zipf-distributed rosters), tasks, "
+        "submissions, upvotes, feedback and invitations for performance testing. "
+        "Output is deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--classes", type=int, default=50)
+        parser.add_argument(
+            "--max-roster",
+            type=int,
+            default=500,
+            help="Roster size of the most popular class; others follow a Zipf curve.",
+        )
+        parser.add_argument("--min-roster", type=int, default=3)
+        parser.add_argument(
+            "--zipf-s", type=float, default=1.1, help="Zipf exponent of roster sizes."
+        )
+        parser.add_argument(
+            "--expert-ratio", type=float, default=0.05, help="Share of a roster who are experts."
+        )
+        parser.add_argument(
+            "--admin-ratio", type=float, default=0.02, help="Share of a roster who are admins."
+        )
+        parser.add_argument("--tasks-per-class", type=int, default=10)
+        parser.add_argument(
+            "--submission-rate",
+            type=float,
+            default=0.7,
+            help="Share of a class's roster that submits to each task.",
+        )
+        parser.add_argument(
+            "--max-upvotes", type=int, default=10, help="Upper bound of upvotes per submission."
+        )
+        parser.add_argument(
+            "--feedback-per-submission",
+            type=float,
+            default=0.5,
+            help="Average number of feedback entries per submission.",
+        )
+        parser.add_argument("--invitations-per-class", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Always use bulk_create, even on Postgres where COPY is available.",
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete all existing app data first."
+        )
+        parser.add_argument(
+            "--no-stats",
+            action="store_true",
+            help="Skip rebuilding the class stats (bulk loads bypass the incremental updates).",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < options["min_roster"]:
+            raise CommandError("--users must be at least --min-roster.")
+
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.batch_size = options["batch_size"]
+        self.use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        started = time.perf_counter()
+
+        if options["clear"]:
+            self._clear()
+
+        loader = _BatchLoader(self, self.batch_size, self.use_copy)
+        with _auto_timestamps_disabled():
+            user_ids = []
+            for user in self._generate_users():
+                loader.add(user)
+                user_ids.append(user.pk)
+            rosters = self._build_rosters(user_ids)
+            for obj in chain(
+                self._generate_classes(rosters),
+                self._generate_roles(rosters),
+                self._generate_class_work(rosters),
+                self._generate_invitations(rosters, user_ids),
+            ):
+                loader.add(obj)
+            loader.flush_all()
+
+        if not options["no_stats"]:
+            call_command("rebuild_class_stats", stdout=self.stdout)
+
+        elapsed = time.perf_counter() - started
+        rows = sum(loader.totals.values())
+        for label, count in loader.totals.items():
+            self.stdout.write(f"{label:<20} {count:>12,}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s, "
+                f"{'COPY' if self.use_copy else 'bulk_create'})."
+            )
+        )
+
+    # ================== HELPERS ==================
+    def _uuid(self, moment):
+        """A UUIDv7 key dated `moment`, like the one the row would have got when created."""
+        return uuid7_at(int(moment.timestamp() * 1000), self.rng.getrandbits(74))
+
+    def _moment(self, start, end):
+        span = (end - start).total_seconds()
+        return start + timedelta(seconds=self.rng.random() * max(span, 0))
+
+    def _clear(self):
+        self.stdout.write("Clearing existing data...")
+        # Jobs, deletion jobs and change log entries refer to the cleared rows by id.
+        # They go last: deleting the rest through the ORM (not Postgres) logs changes.
+        cleared = (
+            TaskStats,
+            Feedback,
+            Submission,
+            Invitation,
+            Task,
+            Class,
+            User,
+            DeletionJob,
+            Job,
+            ChangeLogEntry,
+        )
+        if connection.vendor == "postgresql":
+            tables = [model._meta.db_table for model in cleared]
+            with connection.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {', '.join(tables)} CASCADE")
+            return
+        for model in cleared:
+            model.objects.all().delete()
+
+    # ================== GENERATORS ==================
+    def _generate_users(self):
+        for i in range(self.options["users"]):
+            joined = self.now - timedelta(days=self.rng.uniform(0, 730))
+            yield User(
+                id=self._uuid(joined),
+                username=f"user{i:07d}",
+                email=f"user{i:07d}@example.com",
+                password="!",  # Unusable password, same as Firebase-created users.
+                date_joined=joined,
+                is_active=True,
+            )
+
+    def _build_rosters(self, user_ids):
+        """
+        Roster sizes follow a Zipf curve: the class ranked r gets
+        max_roster / r**s members (at least min_roster), assigned to classes
+        in random order. Each rostered user holds exactly one role.
+        """
+        opts = self.options
+        sizes = [
+            min(
+                len(user_ids),
+                max(opts["min_roster"], int(opts["max_roster"] / rank ** opts["zipf_s"])),
+            )
+            for rank in range(1, opts["classes"] + 1)
         ]
+        self.rng.shuffle(sizes)
+
+        rosters = []
+        for size in sizes:
+            people = self.rng.sample(user_ids, size)
+            n_admins = max(1, math.ceil(size * opts["admin_ratio"]))
+            n_experts = max(1, int(size * opts["expert_ratio"])) if size > 1 else 0
+            admins = people[:n_admins]
+            experts = people[n_admins : n_admins + n_experts]
+            members = people[n_admins + n_experts :]
+            created_at = self.now - timedelta(days=self.rng.uniform(30, 365))
+            rosters.append(
+                {
+                    "id": self._uuid(created_at),
+                    "created_at": created_at,
+                    "created_by": admins[0],
+                    "admins": admins,
+                    "experts": experts,
+                    "members": members,
+                    "staff": admins + experts,
+                    "everyone": people,
+                }
+            )
+        return rosters
+
+    def _generate_roles(self, rosters):
+        for field in ("members", "experts", "admins"):
+            through = getattr(Class, field).through
+            for roster in rosters:
+                for user_id in roster[field]:
+                    yield through(class_id=roster["id"], user_id=user_id)
+
+    def _generate_classes(self, rosters):
+        for i, roster in enumerate(rosters):
+            yield Class(
+                id=roster["id"],
+                class_name=f"Class {i}",
+                description=f"Synthetic class {i} with {len(roster['everyone'])} people.",
+                class_code=f"{i:07X}",
+                created_by_id=roster["created_by"],
+                created_at=roster["created_at"],
+                updated_at=roster["created_at"],
+            )
+
+    def _generate_class_work(self, rosters):
+        """
+        Tasks of every class, each followed by its submissions and their feedback.
+        Due dates spread from 60 days ago to 30 days ahead, so both active and
+        completed tasks exist. Nothing is kept in memory once yielded.
+        """
+        for roster in rosters:
+            for n in range(self.options["tasks_per_class"]):
+                due = self.now + timedelta(days=self.rng.uniform(-60, 30))
+                created = self._moment(roster["created_at"], min(due, self.now))
+                task = Task(
+                    id=self._uuid(created),
+                    class_obj_id=roster["id"],
+                    title=f"Task {n}",
+                    description="Synthetic task.",
+                    created_by_id=self.rng.choice(roster["staff"]),
+                    created_at=created,
+                    updated_at=created,
+                    dueDate=due,
+                )
+                yield task
+                yield from self._generate_submissions(roster, task)
+
+    def _generate_submissions(self, roster, task):
+        opts = self.options
+        people = roster["everyone"]
+        closes_at = min(task.dueDate, self.now)
+        count = min(len(people), round(len(people) * opts["submission_rate"]))
+        for user_id in self.rng.sample(people, count):
+            voters = self.rng.sample(
+                roster["members"],
+                min(len(roster["members"]), self.rng.randint(0, opts["max_upvotes"])),
+            )
+            expert_voters = self.rng.sample(
+                roster["experts"], min(len(roster["experts"]), self.rng.randint(0, 2))
+            )
+            submitted_at = self._moment(task.created_at, closes_at)
+            submission = Submission(
+                id=self._uuid(submitted_at),
+                task_id=task.id,
+                user_id=user_id,
+                submitted_at=submitted_at,
+                updated_at=submitted_at,
+                document=f"https://files.example.com/{task.id}/{user_id}.pdf",
+                user_upvotes=[str(v) for v in voters],
+                expert_upvotes=[str(v) for v in expert_voters],
+            )
+            yield submission
+
+            for _ in range(_poisson(self.rng, opts["feedback_per_submission"])):
+                created = self._moment(submission.submitted_at, self.now)
+                yield Feedback(
+                    id=self._uuid(created),
+                    submission_id=submission.id,
+                    user_id=self.rng.choice(people),
+                    content="Synthetic feedback.",
+                    created_at=created,
+                    is_edited=self.rng.random() < 0.1,
+                )
+
+    def _generate_invitations(self, rosters, user_ids):
+        for roster in rosters:
+            for _ in range(self.options["invitations_per_class"]):
+                invited = self.rng.choice(user_ids)
+                created = self.now - timedelta(days=self.rng.uniform(0, 30))
+                yield Invitation(
+                    id=self._uuid(created),
+                    class_obj_id=roster["id"],
+                    invited_by_id=self.rng.choice(roster["admins"]),
+                    invited_user_id=invited,
+                    email=f"invite-{invited}@example.com",
+                    status=self.rng.choice(INVITATION_STATUSES),
+                    token=uuid.UUID(int=self.rng.getrandbits(128), version=4).hex,
+                    expires_at=created + timedelta(days=7),
+                    created_at=created,
+                )
+
+
+class _BatchLoader:
+    """
+    Buffers generated rows per table and writes each table in batches, with
+    bulk_create or Postgres COPY. Flushing a table first flushes every table
+    it may reference, so each batch commits with its foreign keys in place.
+    """
+
+    ORDER = [
+        User,
+        Class,
+        Class.members.through,
+        Class.experts.through,
+        Class.admins.through,
+        Task,
+        Submission,
+        Feedback,
+        Invitation,
+    ]
+
+    def __init__(self, command, batch_size, use_copy):
+        self.command = command
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.buffers = {model: [] for model in self.ORDER}
+        self.totals = {}
+
+    def add(self, obj):
+        buffer = self.buffers[type(obj)]
+        buffer.append(obj)
+        if len(buffer) >= self.batch_size:
+            self._flush_through(type(obj))
+
+    def flush_all(self):
+        self._flush_through(self.ORDER[-1])
+        self.command.stdout.write("")
+
+    def _flush_through(self, last_model):
+        for model in self.ORDER[: self.ORDER.index(last_model) + 1]:
+            batch, self.buffers[model] = self.buffers[model], []
+            if not batch:
+                continue
+            with transaction.atomic():
+                if self.use_copy:
+                    _copy_rows(model, batch)
+                else:
+                    model.objects.bulk_create(batch, batch_size=self.batch_size)
+            label = model._meta.db_table
+            self.totals[label] = self.totals.get(label, 0) + len(batch)
+            self.command.stdout.write(f"  {label}: {self.totals[label]:,}", ending="\r")
+
+
+def _poisson(rng, mean):
+    # Knuth's method; fine for the small means used here.
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
 
-        # create products & re-fetch from DB
-        Product.objects.bulk_create(products)
-        products = Product.objects.all()
+def _copy_rows(model, objs):
+    """Loads model instances with Postgres COPY (psycopg3), bypassing INSERT parsing."""
+    # Auto-increment keys (the role through tables) are left to their sequence.
+    fields = [
+        f for f in model._meta.concrete_fields
+        if not (f.primary_key and getattr(objs[0], f.attname) is None)
+    ]
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for obj in objs:
+                copy.write_row(
+                    [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields]
+                )
 
 
-        # create some dummy orders tied to the superuser
-        for _ in range(3):
-            # create an Order with 2 order items
-            order = Order.objects.create(user=user)
-            for product in random.sample(list(products), 2):
-                OrderItem.objects.create(
-                    order=order, product=product, quantity=random.randint(1,3)
-                )
\ No newline at end of file
+@contextmanager
+def _auto_timestamps_disabled():
+    """
+    bulk_create runs pre_save, which would overwrite the generated created_at /
+    submitted_at values with "now". Switch auto_now / auto_now_add off while
+    loading so the timestamps stay spread out over time.
+    """
+    fields = [
+        field
+        for model in (Class, Task, Submission, Feedback, Invitation)
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,51 @@
+# src/api/management/commands/process_deletions.py
+
+from django.core.management.base import BaseCommand
+
+from api.deletion import resumable_jobs, run_deletion_job
+from api.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs pending background deletions and resumes those whose runner stopped "
+        "(crashed process, restarted worker). Safe to run at any time, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="Also retry jobs that failed."
+        )
+        parser.add_argument(
+            "--quiet-progress", action="store_true", help="Only report finished jobs."
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            DeletionJob.objects.filter(status=DeletionJob.STATUS_FAILED).update(
+                status=DeletionJob.STATUS_PENDING
+            )
+
+        progress = None if options["quiet_progress"] else self._progress
+        job_ids = list(resumable_jobs().values_list("pk", flat=True))
+        if not job_ids:
+            self.stdout.write("No deletions to run.")
+        for job_id in job_ids:
+            job = run_deletion_job(job_id, progress=progress)
+            if job is None:
+                self.stdout.write(f"Job {job_id} is being run elsewhere; skipped.")
+            elif job.status == DeletionJob.STATUS_DONE:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Deleted {job.target_model} {job.target_id}: "
+                        f"{sum(job.deleted.values()):,} related rows"
+                    )
+                )
+            else:
+                self.stderr.write(f"Job {job_id} failed:\n{job.error}")
+
+    def _progress(self, job):
+        self.stdout.write(
+            f"  {job.target_model} {job.target_id}: step {job.step}, "
+            f"{sum(job.deleted.values()):,} rows so far"
+        )
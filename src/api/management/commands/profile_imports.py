@@ -0,0 +1,127 @@
+# src/api/management/commands/profile_imports.py
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+# What a fresh process imports before it can do its job.
+TARGETS = {
+    # Every management command / migration.
+    "setup": "import django; django.setup()",
+    # A gunicorn worker ready to serve its first request.
+    "wsgi": (
+        "import importlib; "
+        "app = importlib.import_module('group-study-review-drf-server.wsgi'); "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures cold-start import time in a fresh interpreter (python -X importtime) "
+        "and reports the slowest modules and top-level packages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=TARGETS, default="wsgi")
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Fresh processes to run; per-module times are the minimum over runs.",
+        )
+        parser.add_argument("--limit", type=int, default=20, help="Rows per table.")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "self"], default="cumulative"
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        modules = {}
+        wall_times = []
+        for _ in range(options["runs"]):
+            wall_ms, timings = self._run(TARGETS[options["target"]])
+            wall_times.append(wall_ms)
+            for name, timing in timings.items():
+                best = modules.setdefault(name, timing)
+                best["self_ms"] = min(best["self_ms"], timing["self_ms"])
+                best["cumulative_ms"] = min(best["cumulative_ms"], timing["cumulative_ms"])
+
+        packages = {}
+        for name, timing in modules.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + timing["self_ms"]
+
+        key = f"{options['sort']}_ms"
+        results = {
+            "target": options["target"],
+            "runs": options["runs"],
+            "wall_ms": round(min(wall_times), 1),
+            "import_ms": round(
+                sum(t["cumulative_ms"] for t in modules.values() if t["depth"] == 0), 1
+            ),
+            "modules": [
+                {"module": name, **timing}
+                for name, timing in sorted(
+                    modules.items(), key=lambda item: item[1][key], reverse=True
+                )[: options["limit"]]
+            ],
+            "packages": [
+                {"package": name, "self_ms": round(ms, 1)}
+                for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[
+                    : options["limit"]
+                ]
+            ],
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"Target '{results['target']}': {results['wall_ms']:.0f} ms wall, "
+            f"{results['import_ms']:.0f} ms importing (best of {results['runs']})\n"
+        )
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for row in results["modules"]:
+            self.stdout.write(
+                f"{row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {row['module']}"
+            )
+        self.stdout.write(f"\n{'self ms':>14}  package")
+        for row in results["packages"]:
+            self.stdout.write(f"{row['self_ms']:>14.1f}  {row['package']}")
+
+    @staticmethod
+    def _run(code):
+        # DJANGO_SETTINGS_MODULE is inherited from manage.py's environment.
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            env=os.environ.copy(),
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise CommandError(f"Import run failed:\n{proc.stderr[-2000:]}")
+
+        timings = {}
+        for line in proc.stderr.splitlines():
+            match = _IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, indent, name = match.groups()
+            timings[name] = {
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            }
+        return wall_ms, timings
@@ -0,0 +1,40 @@
+# src/api/management/commands/rebuild_class_stats.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.class_stats import rebuild_class_stats
+from api.models import Class
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-task class stats (TaskStats) from submissions and feedback. "
+        "Run it after bulk loads or to repair drift; each class is rebuilt in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "class_codes", nargs="*", help="Only rebuild these classes (default: all)."
+        )
+
+    def handle(self, *args, **options):
+        classes = Class.objects.order_by("pk")
+        if options["class_codes"]:
+            classes = classes.filter(class_code__in=options["class_codes"])
+            missing = set(options["class_codes"]) - set(classes.values_list("class_code", flat=True))
+            if missing:
+                raise CommandError(f"Unknown class code(s): {', '.join(sorted(missing))}")
+
+        start = time.perf_counter()
+        class_count = task_count = 0
+        for class_id in classes.values_list("pk", flat=True).iterator():
+            task_count += rebuild_class_stats(class_id)
+            class_count += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt stats of {task_count} task(s) in {class_count} class(es) "
+                f"in {time.perf_counter() - start:.1f}s."
+            )
+        )
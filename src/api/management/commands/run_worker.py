@@ -0,0 +1,141 @@
+# src/api/management/commands/run_worker.py
+
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from api.jobs import claim, execute, purge_finished, registered_jobs, requeue_stale, worker_id
+from api.sync import purge_change_log
+
+# How often one of the threads requeues stale jobs and purges old jobs and
+# sync change log entries.
+MAINTENANCE_INTERVAL_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs background jobs from the database queue (api.jobs) with N worker threads. "
+        "Start as many worker processes as needed; they share the queue without blocking "
+        "each other. Stops gracefully on SIGINT/SIGTERM after the running jobs finish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4, help="Worker threads.")
+        parser.add_argument(
+            "--jobs", nargs="+", metavar="NAME", help="Only run these job names (default: all)."
+        )
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit once no job is due instead of polling."
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS["POLL_INTERVAL_SECONDS"],
+            help="Seconds an idle thread waits before polling again.",
+        )
+        parser.add_argument(
+            "--report-interval",
+            type=float,
+            default=30,
+            help="Seconds between throughput reports (0 disables them).",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        unknown = set(options["jobs"] or ()) - set(registered_jobs())
+        if unknown:
+            raise CommandError(f"Unknown job name(s): {', '.join(sorted(unknown))}")
+
+        self.options = options
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.outcomes = {"done": 0, "retried": 0, "failed": 0, "lost": 0}
+        self.last_maintenance = float("-inf")
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._stop)
+
+        self.stdout.write(
+            f"Worker started: {options['concurrency']} thread(s), jobs: "
+            f"{', '.join(options['jobs'] or registered_jobs())}"
+        )
+        threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(options["concurrency"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        last_report, last_total = started, 0
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+            interval = options["report_interval"]
+            if interval and time.perf_counter() - last_report >= interval:
+                last_total = self._report(last_report, last_total)
+                last_report = time.perf_counter()
+
+        elapsed = time.perf_counter() - started
+        total = sum(self.outcomes.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Worker stopped: {total:,} job(s) in {elapsed:.1f}s "
+                f"({total / elapsed if elapsed else 0:.1f}/s) - {self._outcome_summary()}"
+            )
+        )
+
+    def _stop(self, signum, frame):
+        self.stdout.write("Stopping after the running jobs finish...")
+        self.stopping.set()
+
+    def _work(self):
+        worker = worker_id()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    self._maintain()
+                    claimed = claim(worker, names=self.options["jobs"])
+                except DatabaseError as exc:
+                    # Dropped connection, failover...: reconnect on the next poll.
+                    self.stderr.write(f"Claiming jobs failed, retrying: {exc}")
+                    connection.close()
+                    self.stopping.wait(self.options["poll_interval"])
+                    continue
+                if not claimed:
+                    if self.options["burst"]:
+                        return
+                    self.stopping.wait(self.options["poll_interval"])
+                    continue
+                for job_obj in claimed:
+                    outcome = execute(job_obj)
+                    with self.lock:
+                        self.outcomes[outcome] += 1
+        finally:
+            connection.close()
+
+    def _maintain(self):
+        with self.lock:
+            if time.monotonic() - self.last_maintenance < MAINTENANCE_INTERVAL_SECONDS:
+                return
+            self.last_maintenance = time.monotonic()
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} job(s) left running by a dead worker.")
+        purge_finished()
+        purge_change_log()
+
+    def _report(self, since, previous_total):
+        with self.lock:
+            total = sum(self.outcomes.values())
+        rate = (total - previous_total) / max(time.perf_counter() - since, 1e-9)
+        self.stdout.write(f"{rate:.1f} jobs/s - {self._outcome_summary()}")
+        return total
+
+    def _outcome_summary(self):
+        with self.lock:
+            return ", ".join(f"{name} {count:,}" for name, count in self.outcomes.items())
@@ -0,0 +1,29 @@
+# src/api/management/commands/schedule_deadline_events.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.job_handlers import TASK_DEADLINE_JOB, schedule_task_deadline
+from api.models import Job, Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Queues the task.deadline_passed job of every task due in the future that has none "
+        "for its current due date, e.g. tasks created before the job queue existed. Tasks "
+        "schedule their own job when created or rescheduled; running this again is a no-op."
+    )
+
+    def handle(self, *args, **options):
+        queued = {
+            (payload.get("task_id"), payload.get("due_date"))
+            for payload in Job.objects.filter(
+                name=TASK_DEADLINE_JOB, status=Job.STATUS_QUEUED
+            ).values_list("payload", flat=True)
+        }
+        count = 0
+        for task in Task.objects.filter(dueDate__gt=timezone.now()).only("pk", "dueDate").iterator():
+            if (str(task.pk), task.dueDate.isoformat()) not in queued:
+                schedule_task_deadline(task)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {count} deadline job(s)."))
@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for the API.
+
+Every request is observed per route name (URL name, e.g. "class-detail") and
+method: total latency, time spent in the database, time spent rendering the
+response body, response size and a status-code counter. `record_cache_lookup`
+feeds the cache hit/miss counters used for hit ratios.
+
+prometheus_client keeps per-metric child objects, so the hot path is a dict
+lookup plus an atomic increment; there is no global lock. Under gunicorn set
+PROMETHEUS_MULTIPROC_DIR to a writable, empty directory before the workers
+start: each process then writes its samples to memory-mapped files in that
+directory and `/metrics` aggregates all of them (see gunicorn.conf.py for the
+hook that cleans up after dead workers).
+"""
+
+# ================== Standard Library ==================
+import os
+import time
+
+# ================== Django ============================
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.deprecation import MiddlewareMixin
+
+# ================== DRF ===============================
+from rest_framework.renderers import JSONRenderer
+
+# ================== Third-Party =======================
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# ================== Local / App Imports =================
+#
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Total request latency.",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL per request.",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_RENDER_TIME = Histogram(
+    "http_request_serialization_duration_seconds",
+    "Time spent rendering the response body (JSON encoding).",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size.",
+    ["route", "method"],
+    buckets=SIZE_BUCKETS,
+)
+RESPONSES = Counter(
+    "http_responses_total",
+    "Responses by status code.",
+    ["route", "method", "status"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Application cache lookups by result (hit/miss).",
+    ["cache", "result"],
+)
+THROTTLED_REQUESTS = Counter(
+    "throttled_requests_total",
+    "Requests rejected by a rate limit (api.throttling), by scope and bucket.",
+    ["scope", "bucket"],
+)
+
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total",
+    "Background jobs run, by outcome (done / retried / failed / lost).",
+    ["job", "outcome"],
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Background job run time.",
+    ["job"],
+    buckets=LATENCY_BUCKETS + (30, 60, 300),
+)
+JOB_QUEUE_DELAY = Histogram(
+    "job_queue_delay_seconds",
+    "Time from a job's run_at until a worker started it.",
+    ["job"],
+    buckets=LATENCY_BUCKETS + (30, 60, 300),
+)
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_LOOKUPS.labels(cache_name, "hit" if hit else "miss").inc()
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports how long encoding took back to the middleware."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            request = (renderer_context or {}).get("request")
+            if request is not None:
+                # Stored on the underlying Django request, which the middleware sees.
+                django_request = getattr(request, "_request", request)
+                django_request.metrics_render_seconds = time.perf_counter() - start
+
+
+class _DatabaseTimer:
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class PrometheusMetricsMiddleware(MiddlewareMixin):
+    """
+    Built on MiddlewareMixin so it runs natively under WSGI and ASGI. Under ASGI
+    both hooks run in the request's thread-sensitive thread, the same thread
+    the async ORM uses, so the SQL timer sees the request's queries.
+    """
+
+    def process_request(self, request):
+        request._metrics_start = time.perf_counter()
+        db_timer = _DatabaseTimer()
+        request._metrics_db_timer = db_timer
+        request._metrics_connections = [connections[alias] for alias in connections]
+        for connection in request._metrics_connections:
+            connection.execute_wrappers.append(db_timer)
+
+    def process_response(self, request, response):
+        db_timer = getattr(request, "_metrics_db_timer", None)
+        if db_timer is None:
+            return response
+        for connection in request._metrics_connections:
+            connection.execute_wrappers.remove(db_timer)
+
+        match = request.resolver_match
+        route = (match.view_name or match.route) if match else UNMATCHED_ROUTE
+        method = request.method
+
+        REQUEST_LATENCY.labels(route, method).observe(
+            time.perf_counter() - request._metrics_start
+        )
+        REQUEST_DB_TIME.labels(route, method).observe(db_timer.seconds)
+        render_seconds = getattr(request, "metrics_render_seconds", None)
+        if render_seconds is not None:
+            REQUEST_RENDER_TIME.labels(route, method).observe(render_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route, method).observe(len(response.content))
+        RESPONSES.labels(route, method, str(response.status_code)).inc()
+        return response
+
+
+def metrics_view(request):
+    """
+    GET /metrics - Prometheus exposition format. When METRICS_TOKEN is set the
+    scraper must send `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.META.get("HTTP_AUTHORIZATION") != f"Bearer {token}":
+        return HttpResponseForbidden()
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
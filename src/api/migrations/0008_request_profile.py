@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:44
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_remove_task_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('route_name', models.CharField(blank=True, max_length=255)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2048)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('started_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField()),
+                ('db_time_ms', models.FloatField(default=0)),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('queries', models.JSONField(blank=True, default=list)),
+                ('python_profile', models.TextField(blank=True)),
+            ],
+            options={
+                'db_table': 'request_profiles',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
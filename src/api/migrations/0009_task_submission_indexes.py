@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'task'], name='submissions_user_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['class_obj', 'dueDate'], name='tasks_class_due_idx'),
+        ),
+    ]
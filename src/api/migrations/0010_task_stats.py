@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_task_submission_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.task')),
+                ('submission_count', models.PositiveIntegerField(default=0)),
+                ('on_time_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('user_upvote_count', models.PositiveIntegerField(default=0)),
+                ('expert_upvote_count', models.PositiveIntegerField(default=0)),
+                ('upvote_histogram', models.JSONField(blank=True, default=dict)),
+                ('feedback_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to='api.class')),
+            ],
+            options={
+                'db_table': 'task_stats',
+            },
+        ),
+    ]
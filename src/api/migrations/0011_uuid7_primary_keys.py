@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:08
+
+import api.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_task_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='class',
+            name='id',
+            field=models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='id',
+            field=models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='invitation',
+            name='id',
+            field=models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='id',
+            field=models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='id',
+            field=models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:11
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Partitioned table -> partition key column (see api.partitioning).
+PARTITIONED_TABLES = {
+    "submissions": "submitted_at",
+    "feedbacks": "created_at",
+}
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _months(first, last):
+    month = datetime.date(first.year, first.month, 1)
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def _rebuild_table(cursor, table, partition_column=None):
+    """
+    Recreates `table` with the same columns, data, indexes and foreign keys,
+    either range-partitioned by month on `partition_column` (primary key
+    (id, partition_column), as Postgres requires) or as a plain table.
+    """
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+        [table, f"{table}_pkey"],
+    )
+    index_defs = [row[0] for row in cursor.fetchall()]
+
+    old = f"{table}_rebuild"
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+    partition_by = f' PARTITION BY RANGE ("{partition_column}")' if partition_column else ""
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}'
+    )
+
+    if partition_column:
+        cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+        cursor.execute(f'SELECT min("{partition_column}") AT TIME ZONE \'UTC\' FROM "{old}"')
+        oldest = cursor.fetchone()[0]
+        today = datetime.date.today()
+        first = min(oldest.date(), today) if oldest else today
+        for month in _months(first, _add_months(today, MONTHS_AHEAD)):
+            end = _add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE "{table}_y{month.year:04d}m{month.month:02d}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+            )
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    cursor.execute(f'DROP TABLE "{old}"')
+
+    primary_key = f'"id", "{partition_column}"' if partition_column else '"id"'
+    cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ({primary_key})')
+    for index_def in index_defs:
+        cursor.execute(index_def)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            _rebuild_table(cursor, table, column)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            _rebuild_table(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=63)),
+                ('partition_name', models.CharField(max_length=63, unique=True)),
+                ('range_start', models.DateTimeField()),
+                ('range_end', models.DateTimeField()),
+                ('path', models.CharField(max_length=1024)),
+                ('row_count', models.PositiveBigIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'archived_partitions',
+                'ordering': ['table_name', 'range_start'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='submission',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='feedbacks', to='api.submission'),
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
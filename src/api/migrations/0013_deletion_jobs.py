@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:15
+
+import api.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_partition_submissions_feedbacks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.UUIDField(default=api.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('target_model', models.CharField(max_length=100)),
+                ('target_id', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('step', models.PositiveIntegerField(default=0)),
+                ('deleted', models.JSONField(blank=True, default=dict)),
+                ('context', models.JSONField(blank=True, default=dict)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'deletion_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='class',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
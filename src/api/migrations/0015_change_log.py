@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('class_id', models.UUIDField()),
+                ('model', models.CharField(choices=[('class', 'Class'), ('task', 'Task'), ('submission', 'Submission')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('op', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted'), ('grant', 'Access granted')], max_length=6)),
+                ('user_id', models.UUIDField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'change_log',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['class_id', 'id'], name='change_log_class_idx'), models.Index(condition=models.Q(('user_id__isnull', False)), fields=['user_id', 'id'], name='change_log_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:28
+
+from django.db import migrations, models
+
+
+def record_current_horizon(apps, schema_editor):
+    # Entries may have been purged already: cursors below the oldest one are expired.
+    ChangeLogEntry = apps.get_model("api", "ChangeLogEntry")
+    ChangeLogHorizon = apps.get_model("api", "ChangeLogHorizon")
+    oldest = ChangeLogEntry.objects.order_by("id").values_list("id", flat=True).first()
+    ChangeLogHorizon.objects.create(purged_through=oldest - 1 if oldest else 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purged_through', models.BigIntegerField(default=0)),
+                ('purged_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'change_log_horizon',
+            },
+        ),
+        migrations.RunPython(record_current_horizon, migrations.RunPython.noop),
+    ]
@@ -16,7 +16,7 @@ from django.utils import timezone
 # 
 
 # ================== Local / App Imports =================
-# 
+from .ids import uuid7
 
 
 # ==================== USER MODEL ====================
@@ -29,7 +29,7 @@ class User(AbstractUser):
     # We are using a UUID for the primary key instead of the default integer ID.
     # This is a good practice for security as it prevents enumeration attacks
     # and hides the total number of users.
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     # An optional field to store the URL of the user's profile picture.
     # `blank=True` allows the field to be empty in forms (like the Django admin).
@@ -42,6 +42,10 @@ class User(AbstractUser):
     is_active = models.BooleanField(default=True)
     firebase_uid = models.CharField(max_length=255, unique=True, null=True, blank=True)
 
+    # Set when the user is deleted; a background DeletionJob removes the rows
+    # (see `api.deletion`). Such users are inactive and hidden from the API.
+    deletion_requested_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     # --- IMPORTANT: Fix for Custom User Models ---
     # When you use a custom user model, you must redefine the many-to-many relationships
     # to Django's built-in Group and Permission models.
@@ -83,7 +87,7 @@ class User(AbstractUser):
 # ==================== CLASS MODEL ====================
 class Class(models.Model):
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     class_name = models.CharField(max_length=255)
     description = models.TextField()
     # A unique, user-friendly code that members can use to join the class.
@@ -100,6 +104,7 @@ class Class(models.Model):
 
     # Automatically records the timestamp when a class is first created.
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # ManyToManyFields to the User model to define different roles within the class.
     # Each has a unique `related_name` to distinguish the relationships from the User's perspective.
@@ -113,6 +118,10 @@ class Class(models.Model):
         settings.AUTH_USER_MODEL, related_name="admin_classes", blank=True
     )
 
+    # Set when the class is deleted; a background DeletionJob removes the rows
+    # (see `api.deletion`). Such classes are hidden from the API.
+    deletion_requested_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     class Meta:
         db_table = "classes"
         ordering = ["-created_at"]
@@ -146,7 +155,7 @@ class Task(models.Model):
     """
  
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     # Links this task to the Class it belongs to.
     # The `related_name` 'tasks' allows access to all tasks for a class instance (e.g., `my_class.tasks.all()`).
@@ -177,6 +186,10 @@ class Task(models.Model):
     class Meta:
         db_table = "tasks"
         ordering = ["-created_at"]
+        indexes = [
+            # Open tasks of a class by due date (pending tasks, class task lists).
+            models.Index(fields=["class_obj", "dueDate"], name="tasks_class_due_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -187,7 +200,7 @@ class Submission(models.Model):
     """
     Represents a user's submission for a specific Task.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     task= models.ForeignKey(
         "Task",
@@ -199,6 +212,7 @@ class Submission(models.Model):
     )
 
     submitted_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     document = models.URLField()
 
@@ -208,6 +222,10 @@ class Submission(models.Model):
     class Meta:
         db_table = "submissions"
         ordering = ["-submitted_at"]
+        indexes = [
+            # "Has this user submitted this task?" (anti-join of pending tasks, submit).
+            models.Index(fields=["user", "task"], name="submissions_user_task_idx"),
+        ]
 
     def __str__(self):
         return f"Submission by {self.user.username} for {self.task.title}"
@@ -218,12 +236,16 @@ class Feedback(models.Model):
     """
     Represents feedback given by a user on a specific Submission.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
+    # No database-level FK: on Postgres `submissions` is partitioned and its
+    # primary key is (id, submitted_at), which an FK on `id` alone cannot
+    # reference. CASCADE is still applied by the ORM.
     submission = models.ForeignKey(
         "Submission",
         on_delete=models.CASCADE,
         related_name="feedbacks",
+        db_constraint=False,
     )
 
     user = models.ForeignKey(
@@ -259,7 +281,7 @@ class Invitation(models.Model):
         ("expired", "Expired"),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     class_obj = models.ForeignKey(
         "Class",
@@ -297,3 +319,257 @@ class Invitation(models.Model):
     def __str__(self):
         return f"Invitation to {self.email} for {self.class_obj.class_name}"
 
+
+
+# ==================== TASK STATS MODEL ====================
+class TaskStats(models.Model):
+    """
+    Per-task aggregates behind the class stats endpoint. Kept up to date
+    incrementally as submissions, votes and feedback are written
+    (see `api.class_stats`); `manage.py rebuild_class_stats` recomputes them.
+    """
+    task = models.OneToOneField(
+        "Task", on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    class_obj = models.ForeignKey(
+        "Class", on_delete=models.CASCADE, related_name="task_stats"
+    )
+
+    submission_count = models.PositiveIntegerField(default=0)
+    on_time_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    user_upvote_count = models.PositiveIntegerField(default=0)
+    expert_upvote_count = models.PositiveIntegerField(default=0)
+    # Submissions by total upvotes: {"0": 12, "1": 7, ..., "10+": 1}
+    upvote_histogram = models.JSONField(default=dict, blank=True)
+    feedback_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "task_stats"
+
+    def __str__(self):
+        return f"Stats for task {self.task_id}"
+
+
+# ==================== REQUEST PROFILE MODEL ====================
+class RequestProfile(models.Model):
+    """
+    A sampled request profile recorded by `api.profiling.SamplingProfilerMiddleware`.
+    Profiles are buffered in memory and written in batches, never one per request.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    route_name = models.CharField(max_length=255, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status_code = models.PositiveSmallIntegerField()
+
+    started_at = models.DateTimeField()
+    duration_ms = models.FloatField()
+    db_time_ms = models.FloatField(default=0)
+    query_count = models.PositiveIntegerField(default=0)
+
+    # [{"sql": "...", "duration_ms": 1.2}, ...]
+    queries = models.JSONField(default=list, blank=True)
+    # Top of the cProfile report, only filled when PROFILING["PYTHON_PROFILER"] is on.
+    python_profile = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "request_profiles"
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.1f} ms)"
+
+
+# ==================== ARCHIVED PARTITION MODEL ====================
+class ArchivedPartition(models.Model):
+    """
+    A month of submissions or feedback moved out of Postgres into a compressed
+    file by `manage.py manage_partitions` (see `api.partitioning`).
+    """
+    table_name = models.CharField(max_length=63)
+    partition_name = models.CharField(max_length=63, unique=True)
+    range_start = models.DateTimeField()
+    range_end = models.DateTimeField()
+    path = models.CharField(max_length=1024)
+    row_count = models.PositiveBigIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "archived_partitions"
+        ordering = ["table_name", "range_start"]
+
+    def __str__(self):
+        return f"{self.partition_name} ({self.row_count} rows)"
+
+
+# ==================== DELETION JOB MODEL ====================
+class DeletionJob(models.Model):
+    """
+    The background deletion of a user or class and everything under it,
+    removed in key-ordered chunks (see `api.deletion`). `step` and `deleted`
+    record progress, so a crashed job resumes where it stopped.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+
+    # "api.user" / "api.class" and the root row's primary key. Not a foreign
+    # key: the job outlives the row it deletes.
+    target_model = models.CharField(max_length=100)
+    target_id = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # Index of the next step of the deletion plan, and rows deleted so far per model.
+    step = models.PositiveIntegerField(default=0)
+    deleted = models.JSONField(default=dict, blank=True)
+    # Data gathered before the first step (e.g. classes whose stats need a rebuild).
+    context = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "deletion_jobs"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Delete {self.target_model} {self.target_id} ({self.status})"
+
+
+# ==================== JOB MODEL ====================
+class Job(models.Model):
+    """
+    A unit of background work in the database-backed queue (see `api.jobs`),
+    run by `manage.py run_worker`.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+
+    # Name of a handler registered with @api.jobs.job, and its keyword arguments.
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    # Higher runs first; among equals, the earliest run_at.
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "jobs"
+        ordering = ["-priority", "run_at"]
+        indexes = [
+            # The claim query: queued jobs that are due, by priority.
+            models.Index(
+                fields=["-priority", "run_at"],
+                name="jobs_queued_due_idx",
+                condition=models.Q(status="queued"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+# ==================== CHANGE LOG MODEL ====================
+class ChangeLogEntry(models.Model):
+    """
+    One change to a class, task or submission, appended by the receivers in
+    `api.sync`. The auto-incrementing id is the cursor of GET /api/sync/.
+    """
+    MODEL_CLASS = "class"
+    MODEL_TASK = "task"
+    MODEL_SUBMISSION = "submission"
+    MODEL_CHOICES = [
+        (MODEL_CLASS, "Class"),
+        (MODEL_TASK, "Task"),
+        (MODEL_SUBMISSION, "Submission"),
+    ]
+    OP_UPSERT = "upsert"
+    OP_DELETE = "delete"
+    # The user in `user_id` got a role in the class: they need all of it.
+    OP_GRANT = "grant"
+    OP_CHOICES = [
+        (OP_UPSERT, "Created or updated"),
+        (OP_DELETE, "Deleted"),
+        (OP_GRANT, "Access granted"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    # Plain ids, not foreign keys: entries outlive the rows they describe.
+    class_id = models.UUIDField()
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.UUIDField()
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    # Set on entries meant for a single user (grants); None means every
+    # user of the class.
+    user_id = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "change_log"
+        ordering = ["id"]
+        indexes = [
+            # The sync query: entries of the user's classes after the cursor...
+            models.Index(fields=["class_id", "id"], name="change_log_class_idx"),
+            # ...and the entries addressed to the user.
+            models.Index(
+                fields=["user_id", "id"],
+                name="change_log_user_idx",
+                condition=models.Q(user_id__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.op} {self.model} {self.object_id}"
+
+
+class ChangeLogHorizon(models.Model):
+    """
+    The single row recording how far `api.sync` purged the change log: every
+    entry with an id up to `purged_through` is gone, so cursors below it
+    have expired.
+    """
+    purged_through = models.BigIntegerField(default=0)
+    purged_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "change_log_horizon"
+
+    def __str__(self):
+        return f"Change log purged through #{self.purged_through}"
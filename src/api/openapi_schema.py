@@ -0,0 +1,183 @@
+"""
+Prebuilt, cached OpenAPI schema.
+
+drf-spectacular builds the schema by introspecting every view and serializer,
+which is far too slow to repeat on every hit of /api/schema/. Instead:
+
+- `manage.py build_openapi_schema` writes the schema once, at build time, to
+  `OPENAPI_SCHEMA_DIR/openapi-<code version>.json`.
+- At runtime the artifact for the current code version is loaded on the first
+  request. Without an artifact the schema is generated once and memoized.
+- Each format (YAML / JSON) is rendered and gzip-compressed once and served
+  with a strong ETag, so clients revalidate with a cheap 304.
+
+The code version is `settings.CODE_VERSION` (e.g. the git SHA set at deploy)
+or, when unset, a hash of the project's Python sources and library versions,
+so a stale artifact is never served after the code changes.
+"""
+
+# ================== Standard Library ==================
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+# ================== Django ============================
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+# ================== DRF ===============================
+import rest_framework
+from rest_framework.utils.encoders import JSONEncoder
+
+# ================== Third-Party =======================
+import drf_spectacular
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+# ================== Local / App Imports =================
+#
+
+logger = logging.getLogger(__name__)
+
+_version = None
+_document = None
+_document_lock = threading.Lock()
+
+
+# ================== CODE VERSION ==================
+def code_version():
+    global _version
+    if _version is None:
+        _version = settings.CODE_VERSION or _hash_sources()
+    return _version
+
+
+def _hash_sources():
+    digest = hashlib.sha256()
+    digest.update(f"drf={rest_framework.VERSION};spectacular={drf_spectacular.__version__}".encode())
+    base_dir = Path(settings.BASE_DIR)
+    for path in sorted(base_dir.rglob("*.py")):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+# ================== ARTIFACT ==================
+def artifact_path(version=None):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f"openapi-{version or code_version()}.json"
+
+
+def generate_schema():
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def write_schema_artifact(path=None):
+    """Generates the schema and writes it atomically. Returns the path written."""
+    path = Path(path or artifact_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(generate_schema(), cls=JSONEncoder))
+    os.replace(tmp_path, path)
+    return path
+
+
+# ================== RENDERED DOCUMENT ==================
+class SchemaDocument:
+    """The schema of one code version, with each format rendered once."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def rendered(self, renderer):
+        """(body, gzipped body, etag) for the renderer's media type."""
+        key = renderer.media_type
+        if key not in self._rendered:
+            with self._lock:
+                if key not in self._rendered:
+                    body = renderer.render(self.schema, renderer_context={})
+                    etag = hashlib.sha256(body).hexdigest()[:32]
+                    self._rendered[key] = (body, gzip.compress(body, compresslevel=9), etag)
+        return self._rendered[key]
+
+
+def get_schema_document():
+    global _document
+    if _document is None:
+        with _document_lock:
+            if _document is None:
+                _document = SchemaDocument(_load_schema())
+    return _document
+
+
+def _load_schema():
+    path = artifact_path()
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        logger.info("No OpenAPI artifact at %s; generating the schema at runtime.", path)
+        return generate_schema()
+
+
+# ================== VIEW ==================
+def accepts_gzip(accept_encoding):
+    """
+    Whether an Accept-Encoding header allows gzip: listed (or `*` when it is
+    not) with a non-zero q-value, e.g. not for "gzip;q=0".
+    """
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    Drop-in replacement for SpectacularAPIView serving the prebuilt schema.
+    Requests for a specific ?version= or ?lang= still generate on the fly.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("version") or request.GET.get("lang"):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        body, gzipped, etag = get_schema_document().rendered(renderer)
+
+        # Strong ETags name exact bytes, so the gzip variant gets its own.
+        use_gzip = accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        etag = f'"{etag}-gzip"' if use_gzip else f'"{etag}"'
+
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if etag in if_none_match or if_none_match == ["*"]:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(gzipped if use_gzip else body, content_type=renderer.media_type)
+            if use_gzip:
+                response["Content-Encoding"] = "gzip"
+            response["Content-Disposition"] = (
+                f'inline; filename="{spectacular_settings.TITLE or "schema"}.{renderer.format}"'
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "public, no-cache"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
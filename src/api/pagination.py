@@ -0,0 +1,27 @@
+# ================== Standard Library ==================
+#
+
+# ================== Django ============================
+#
+
+# ================== DRF ===============================
+from rest_framework.pagination import CursorPagination
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+#
+
+
+class DueDateCursorPagination(CursorPagination):
+    """
+    Cursor pagination by due date, soonest first. The cursor is an opaque
+    position, so pages stay stable while tasks are submitted or created and
+    no OFFSET scan is needed however deep the client pages.
+    """
+
+    ordering = ("dueDate", "id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
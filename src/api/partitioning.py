@@ -0,0 +1,330 @@
+"""
+Monthly range partitions and archival of submissions and feedback (Postgres).
+
+On Postgres, `submissions` is partitioned by `submitted_at` and `feedbacks`
+by `created_at` (migration 0012): one partition per calendar month (UTC),
+named `<table>_yYYYYmMM`, plus a `<table>_default` partition catching
+anything outside the created months. Queries that bound the partition key
+only touch the matching partitions; the hot paths bound submissions by their
+task's (or class's) `created_at`, since nothing is submitted before the task
+exists.
+
+`manage.py manage_partitions` keeps the scheme running:
+
+- it creates partitions MONTHS_AHEAD months in advance, so rows never land
+  in the default partition;
+- it archives months older than ARCHIVE_AFTER_MONTHS: the rows are written to
+  `ARCHIVE_DIR/<table>/<partition>.jsonl.gz` (one JSON object per row), the
+  partition is detached and dropped, and an `ArchivedPartition` row records
+  the file and its time range.
+
+Archived rows stay readable: `iter_archived` / `get_archived` scan only the
+archive files whose range can match. Readers that go through them see
+archived submissions as before (read-only):
+
+- the submission endpoints (a task's submissions, a submission by id);
+- the class aggregates: stats rebuilds, the submission matrix and the export.
+
+The `submissions` lists nested in task and class responses are live-only.
+Class stats (`TaskStats`) are not decremented when a month is archived.
+
+Archive files are never rewritten: deleting a user or a class (api.deletion)
+leaves their archived rows in place. Readers skip them instead: archived
+submissions are only returned for live tasks and users that exist and are not
+marked for deletion.
+
+On other databases the tables are plain and everything here is a no-op.
+"""
+
+# ================== Standard Library ==================
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .ids import uuid7_timestamp_ms
+from .models import ArchivedPartition, Submission, User
+
+# Partitioned table -> partition key column.
+PARTITIONED_TABLES = {
+    "submissions": "submitted_at",
+    "feedbacks": "created_at",
+}
+ARCHIVE_FETCH_SIZE = 2000
+ARCHIVE_HORIZON_CACHE_KEY = "archive-horizon:{table}"
+ARCHIVE_HORIZON_CACHE_SECONDS = 3600
+
+
+def partitioning_supported():
+    return connection.vendor == "postgresql"
+
+
+def _partitioning_setting(name):
+    return settings.PARTITIONING[name]
+
+
+# ================== MONTHS ==================
+def month_of(moment):
+    moment = moment.astimezone(dt_timezone.utc) if timezone.is_aware(moment) else moment
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """[start, end) of a month as aware UTC datetimes."""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end = add_months(month, 1)
+    return start, datetime(end.year, end.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _partition_month(table, name):
+    match = re.fullmatch(rf"{re.escape(table)}_y(\d{{4}})m(\d{{2}})", name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+# ================== PARTITIONS ==================
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions(table):
+    """{month: partition name} of the table's attached monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = {_partition_month(table, name): name for name in names}
+    months.pop(None, None)
+    return months
+
+
+def create_partition(table, month):
+    """
+    Creates a month's partition. Rows of that month already in the default
+    partition are moved into it first (Postgres refuses to create a partition
+    whose range the default partition holds rows for); the default partition
+    is write-locked meanwhile, reads continue.
+    """
+    qn = connection.ops.quote_name
+    name, default = partition_name(table, month), f"{table}_default"
+    column = qn(PARTITIONED_TABLES[table])
+    start, end = month_bounds(month)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(default)} IN EXCLUSIVE MODE")
+        cursor.execute(
+            f"SELECT 1 FROM {qn(default)} WHERE {column} >= %s AND {column} < %s LIMIT 1",
+            [start, end],
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} FOR VALUES {bounds}"
+            )
+            return
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} WHERE {column} >= %s AND {column} < %s "
+            f"RETURNING *) INSERT INTO {qn(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        # Attaching builds the partition's indexes and checks the range.
+        cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES {bounds}")
+
+
+def ensure_partitions(table, months_ahead, now=None):
+    """Creates the partitions of this month and the next `months_ahead`. Returns the new names."""
+    existing = monthly_partitions(table)
+    current = month_of(now or timezone.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            create_partition(table, month)
+            created.append(partition_name(table, month))
+    return created
+
+
+def archivable_partitions(table, older_than_months, now=None):
+    """(month, name) of partitions that ended more than `older_than_months` ago, oldest first."""
+    cutoff = add_months(month_of(now or timezone.now()), -older_than_months)
+    return sorted(
+        (month, name) for month, name in monthly_partitions(table).items() if month < cutoff
+    )
+
+
+# ================== ARCHIVING ==================
+def archive_path(table, name):
+    return Path(_partitioning_setting("ARCHIVE_DIR")) / table / f"{name}.jsonl.gz"
+
+
+def archive_partition(table, month):
+    """
+    Writes a month's rows to a compressed file, then detaches and drops the
+    partition, all in one transaction. The partition is share-locked while it
+    is copied: reads continue, writes to that month wait.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, month)
+    path = archive_path(table, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    start, end = month_bounds(month)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {qn(name)} IN SHARE MODE")
+
+        row_count = 0
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as fh, connection.chunked_cursor() as cursor:
+            cursor.execute(f"SELECT row_to_json(p)::text FROM {qn(name)} p")
+            while rows := cursor.fetchmany(ARCHIVE_FETCH_SIZE):
+                fh.writelines(row[0] + "\n" for row in rows)
+                row_count += len(rows)
+        # If the transaction rolls back below, the file is simply overwritten by the next run.
+        os.replace(tmp_path, path)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+        record, _ = ArchivedPartition.objects.update_or_create(
+            partition_name=name,
+            defaults={
+                "table_name": table,
+                "range_start": start,
+                "range_end": end,
+                "path": str(path),
+                "row_count": row_count,
+            },
+        )
+        transaction.on_commit(
+            lambda: cache.delete(ARCHIVE_HORIZON_CACHE_KEY.format(table=table))
+        )
+    return record
+
+
+# ================== READING ARCHIVES ==================
+def _archived_instance(model, row):
+    instance = model(
+        **{field.attname: field.to_python(row.get(field.column)) for field in model._meta.concrete_fields}
+    )
+    instance._state.adding = False
+    instance._archived = True
+    return instance
+
+
+def archive_horizon(model):
+    """End of the newest archived range of the model's table (None if nothing is archived), cached."""
+    key = ARCHIVE_HORIZON_CACHE_KEY.format(table=model._meta.db_table)
+    horizon = cache.get(key)
+    if horizon is None:
+        latest = (
+            ArchivedPartition.objects.filter(table_name=model._meta.db_table)
+            .order_by("-range_end")
+            .values_list("range_end", flat=True)
+            .first()
+        )
+        horizon = latest.isoformat() if latest else ""
+        cache.set(key, horizon, ARCHIVE_HORIZON_CACHE_SECONDS)
+    return datetime.fromisoformat(horizon) if horizon else None
+
+
+def has_archived(model, since=None):
+    """Whether archived rows of the model may exist at or after `since`; no query when cached."""
+    horizon = archive_horizon(model)
+    return horizon is not None and (since is None or horizon > since)
+
+
+def iter_archived(model, since=None, until=None, **filters):
+    """
+    Yields archived rows of `model` as unsaved instances, reading only the
+    archives whose range overlaps [since, until]. `filters` are exact matches
+    on field attnames (e.g. task_id=..., user_id=...).
+    """
+    records = ArchivedPartition.objects.filter(table_name=model._meta.db_table)
+    if since is not None:
+        records = records.filter(range_end__gt=since)
+    if until is not None:
+        records = records.filter(range_start__lte=until)
+    wanted = {
+        name: model._meta.get_field(name).to_python(value) for name, value in filters.items()
+    }
+
+    for record in records.order_by("range_start"):
+        with gzip.open(record.path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                instance = _archived_instance(model, json.loads(line))
+                if all(getattr(instance, name) == value for name, value in wanted.items()):
+                    yield instance
+
+
+def live_user_ids(user_ids):
+    """The given users that exist and are not marked for deletion."""
+    return set(
+        User.objects.filter(pk__in=user_ids, deletion_requested_at__isnull=True).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+def iter_archived_submissions(task_ids, since=None):
+    """
+    Archived submissions of the given tasks, skipping those of deleted users;
+    no file is read when none can exist. Pass the tasks' (or their class's)
+    creation time as `since`, so older archives are not read at all.
+    """
+    task_ids = set(task_ids)
+    if not task_ids or not has_archived(Submission, since):
+        return
+    submissions = [s for s in iter_archived(Submission, since=since) if s.task_id in task_ids]
+    users = live_user_ids({submission.user_id for submission in submissions})
+    for submission in submissions:
+        if submission.user_id in users:
+            yield submission
+
+
+def get_archived(model, pk):
+    """The archived row with this primary key, or None."""
+    try:
+        pk = model._meta.pk.to_python(pk)
+    except ValidationError:
+        return None
+    since = until = None
+    if getattr(pk, "version", None) == 7:
+        # A UUIDv7 key carries its creation time: only that month's archive is read.
+        created = datetime.fromtimestamp(uuid7_timestamp_ms(pk) / 1000, tz=dt_timezone.utc)
+        since, until = created, created + timedelta(days=1)
+    return next(iter_archived(model, since, until, **{model._meta.pk.attname: pk}), None)
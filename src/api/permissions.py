@@ -2,6 +2,8 @@ from rest_framework import permissions
 
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .utils import user_class_ids
+
 
 class IsCreatorOrAdminOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -19,9 +21,13 @@ class IsCreatorOrAdminOrReadOnly(permissions.BasePermission):
 class IsTaskCreatorOrClassExpert(BasePermission):
     def has_object_permission(self, request, view, obj):
         # Write permissions are only allowed to the creator of the task or a class admin.
-        is_creator = obj.created_by == request.user
-        is_class_expert = request.user in obj.class_obj.experts.all()
-        return is_creator or is_class_expert
+        if obj.created_by_id == request.user.pk:
+            return True
+        # Annotated by TaskViewSet.get_queryset; otherwise ask the database.
+        is_class_expert = getattr(obj, "is_class_expert", None)
+        if is_class_expert is None:
+            is_class_expert = obj.class_obj.experts.filter(pk=request.user.pk).exists()
+        return is_class_expert
 
 
 class IsClassMember(BasePermission):
@@ -30,17 +36,25 @@ class IsClassMember(BasePermission):
         # We need to check if the user is a member of that task's class.
 
         # Ensure the object has a class_obj attribute before proceeding
-        if not hasattr(obj, "class_obj"):
+        if not hasattr(obj, "class_obj_id"):
             return False
 
-        class_instance = obj.class_obj
+        # One query per request for all of the user's classes, shared with the
+        # other checks of the request (and of a batch's sub-requests).
+        return obj.class_obj_id in user_class_ids(request)
+
 
-        is_member = request.user in class_instance.members.all()
-        is_expert = request.user in class_instance.experts.all()
-        is_admin = request.user in class_instance.admins.all()
+class IsClassInstructor(BasePermission):
+    """
+    Allow only the admins and experts of a class (the 'obj' is the Class).
+    """
 
-        # If the user has any of these roles, grant permission.
-        return is_member or is_expert or is_admin
+    def has_object_permission(self, request, view, obj):
+        user_id = request.user.pk
+        return (
+            obj.admins.filter(pk=user_id).exists()
+            or obj.experts.filter(pk=user_id).exists()
+        )
 
 
 class IsSubmissionOwner(permissions.BasePermission):
@@ -49,4 +63,4 @@ class IsSubmissionOwner(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        return obj.user_id == request.user.pk
@@ -0,0 +1,246 @@
+"""
+Sampling request profiler, a low-overhead replacement for always-on Silk.
+
+Only 1 in N requests is profiled (N per route name, configurable at runtime),
+plus any request carrying the profiling header with the right token. Requests
+that are not sampled pay for one dict lookup and one random() call; no SQL
+wrappers, timers or profilers are installed for them.
+
+Sampled profiles (timing, SQL queries and optionally a cProfile report) are
+buffered in memory and written to `RequestProfile` with one bulk INSERT per
+batch instead of several writes per request.
+"""
+
+# ================== Standard Library ==================
+import atexit
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_CONFIG_CACHE_KEY = "profiling:sampling-config"
+
+
+def _profiling_setting(name):
+    return settings.PROFILING[name]
+
+
+# ================== RUNTIME SAMPLING CONFIG ==================
+def get_sampling_config():
+    """
+    Current sampling rates: settings defaults overridden by whatever was set at
+    runtime through `set_sampling_config` (stored in the cache so every worker
+    sharing the cache picks it up).
+    """
+    override = cache.get(SAMPLING_CONFIG_CACHE_KEY) or {}
+    return {
+        "default_rate": override.get(
+            "default_rate", _profiling_setting("DEFAULT_SAMPLE_RATE")
+        ),
+        "route_rates": {
+            **_profiling_setting("ROUTE_SAMPLE_RATES"),
+            **override.get("route_rates", {}),
+        },
+    }
+
+
+def set_sampling_config(default_rate=None, route_rates=None):
+    """
+    Stores a runtime override of the sampling rates. A rate N means "profile 1
+    in N requests"; 0 disables profiling, 1 profiles every request. Route rates
+    are keyed by URL name (e.g. "task-submit") and merged into the current ones.
+    """
+    override = cache.get(SAMPLING_CONFIG_CACHE_KEY) or {}
+    if default_rate is not None:
+        override["default_rate"] = default_rate
+    if route_rates is not None:
+        override["route_rates"] = {**override.get("route_rates", {}), **route_rates}
+    cache.set(SAMPLING_CONFIG_CACHE_KEY, override, timeout=None)
+    sampler.invalidate()
+    return get_sampling_config()
+
+
+class Sampler:
+    """
+    Decides whether a request is profiled. The runtime config is re-read from
+    the cache at most every CONFIG_REFRESH_SECONDS, so the decision itself
+    never leaves the process.
+    """
+
+    def __init__(self):
+        self._config = None
+        self._expires_at = 0.0
+
+    def invalidate(self):
+        self._expires_at = 0.0
+
+    def config(self):
+        now = time.monotonic()
+        if now >= self._expires_at:
+            self._config = get_sampling_config()
+            self._expires_at = now + _profiling_setting("CONFIG_REFRESH_SECONDS")
+        return self._config
+
+    def should_sample(self, request, route_name):
+        header_token = _profiling_setting("HEADER_TOKEN")
+        if header_token and request.META.get(_profiling_setting("HEADER")) == header_token:
+            return True
+
+        config = self.config()
+        rate = config["route_rates"].get(route_name, config["default_rate"])
+        if rate <= 0:
+            return False
+        return rate == 1 or random.random() * rate < 1
+
+
+sampler = Sampler()
+
+
+# ================== PROFILE BUFFER ==================
+class ProfileBuffer:
+    """
+    Thread-safe in-memory buffer of finished profiles. A batch is written once
+    BATCH_SIZE profiles are pending or FLUSH_INTERVAL_SECONDS have passed since
+    the last write. The buffer is bounded: when the database cannot keep up,
+    new profiles are dropped instead of growing memory.
+    """
+
+    def __init__(self):
+        self._items = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.dropped = 0
+
+    def add(self, profile):
+        with self._lock:
+            if len(self._items) >= _profiling_setting("MAX_BUFFERED"):
+                self.dropped += 1
+                return
+            self._items.append(profile)
+            batch = None
+            if (
+                len(self._items) >= _profiling_setting("BATCH_SIZE")
+                or time.monotonic() - self._last_flush
+                >= _profiling_setting("FLUSH_INTERVAL_SECONDS")
+            ):
+                batch = self._take()
+        if batch:
+            self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._write(batch)
+
+    def _take(self):
+        batch, self._items = self._items, []
+        self._last_flush = time.monotonic()
+        return batch
+
+    @staticmethod
+    def _write(batch):
+        try:
+            RequestProfile.objects.bulk_create(batch)
+        except DatabaseError:
+            logger.warning("Dropping %s request profiles: write failed", len(batch), exc_info=True)
+
+
+profile_buffer = ProfileBuffer()
+atexit.register(profile_buffer.flush)
+
+
+# ================== ACTIVE PROFILE ==================
+class ActiveProfile:
+    """Collects timing and SQL for one sampled request."""
+
+    def __init__(self, route_name):
+        self.route_name = route_name
+        self.started_at = timezone.now()
+        self.queries = []
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._record_query))
+        self._profiler = None
+        if _profiling_setting("PYTHON_PROFILER"):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {"sql": sql, "duration_ms": round((time.perf_counter() - start) * 1000, 3)}
+            )
+
+    def stop(self):
+        self._stack.close()
+        if self._profiler is None:
+            return ""
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(30)
+        return out.getvalue()
+
+    def to_model(self, request, response, duration_ms, python_profile):
+        return RequestProfile(
+            route_name=self.route_name,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            started_at=self.started_at,
+            duration_ms=round(duration_ms, 3),
+            db_time_ms=round(sum(q["duration_ms"] for q in self.queries), 3),
+            query_count=len(self.queries),
+            queries=self.queries,
+            python_profile=python_profile,
+        )
+
+
+# ================== MIDDLEWARE ==================
+class SamplingProfilerMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        request._profiling_start = time.perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The route name is only known once the URL is resolved, hence process_view.
+        match = request.resolver_match
+        route_name = match.view_name if match else ""
+        if sampler.should_sample(request, route_name):
+            request._sampled_profile = ActiveProfile(route_name)
+        return None
+
+    def process_response(self, request, response):
+        profile = getattr(request, "_sampled_profile", None)
+        if profile is None:
+            return response
+
+        # Stop collecting before the buffer may flush, so the INSERT isn't profiled.
+        python_profile = profile.stop()
+        duration_ms = (time.perf_counter() - request._profiling_start) * 1000
+        profile_buffer.add(profile.to_model(request, response, duration_ms, python_profile))
+        return response
@@ -0,0 +1,200 @@
+"""
+Per-endpoint SQL query budgets.
+
+Every view/action can be given a maximum number of queries in
+`settings.QUERY_BUDGETS`, keyed "<ViewClass>.<action>" (e.g.
+"ClassViewSet.retrieve": 5). Budgets are enforced in two places:
+
+- Tests: `assert_query_budget("ClassViewSet.retrieve")` fails with the list of
+  repeated query fingerprints when the block runs more queries than budgeted.
+- Runtime: `QueryBudgetMiddleware` records query count, DB time and duplicate
+  fingerprints per request. In DEBUG it adds them as X-Query-* response headers;
+  with QUERY_BUDGET_LOG_VIOLATIONS on it logs a warning for every over-budget
+  request.
+"""
+
+# ================== Standard Library ==================
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+# ================== Django ============================
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+#
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """
+    Normalizes a query so that executions differing only in parameters share a
+    fingerprint. Django keeps parameters out of the SQL string already, so this
+    only folds variable-length IN lists and whitespace.
+    """
+    normalized = _WHITESPACE.sub(" ", _IN_LIST.sub("IN (...)", sql)).strip()
+    return hashlib.md5(normalized.encode()).hexdigest()[:12]
+
+
+def get_query_budget(key):
+    return settings.QUERY_BUDGETS.get(key)
+
+
+def view_action_key(view_func, method):
+    """
+    "<ViewClass>.<action>" for DRF viewsets (list, retrieve, submit, ...) and
+    "<ViewClass>.<http method>" for plain APIViews.
+    """
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+# ================== STATS ==================
+class QueryStats:
+    """Query count, DB time and fingerprints of a block of code."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time_ms = 0.0
+        self.fingerprints = Counter()
+        self.examples = {}
+
+    def record(self, sql, duration_ms):
+        key = fingerprint(sql)
+        self.count += 1
+        self.db_time_ms += duration_ms
+        self.fingerprints[key] += 1
+        self.examples.setdefault(key, sql)
+
+    @property
+    def duplicate_count(self):
+        """Queries that repeat an already executed fingerprint (N+1 suspects)."""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def duplicates(self):
+        return [
+            (self.examples[key], n)
+            for key, n in self.fingerprints.most_common()
+            if n > 1
+        ]
+
+    def describe_duplicates(self, limit=5):
+        return "\n".join(
+            f"  {n}x {sql[:200]}" for sql, n in self.duplicates()[:limit]
+        ) or "  (no repeated queries)"
+
+
+class QueryRecorder:
+    """Installs an execute wrapper on every connection and feeds a QueryStats."""
+
+    def __init__(self):
+        self.stats = QueryStats()
+        self._stack = ExitStack()
+
+    def start(self):
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._wrapper))
+        return self
+
+    def stop(self):
+        self._stack.close()
+        return self.stats
+
+    def _wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.stats.record(sql, (time.perf_counter() - start) * 1000)
+
+
+# ================== TEST HELPER ==================
+@contextmanager
+def assert_query_budget(budget):
+    """
+    Fails if the wrapped block runs more queries than the budget. `budget` is
+    either a "<ViewClass>.<action>" key of settings.QUERY_BUDGETS or a number.
+
+        with assert_query_budget("ClassViewSet.retrieve"):
+            client.get(f"/api/class/{class_code}/")
+    """
+    limit = get_query_budget(budget) if isinstance(budget, str) else budget
+    if limit is None:
+        raise KeyError(f"No query budget declared for '{budget}' in QUERY_BUDGETS.")
+
+    recorder = QueryRecorder().start()
+    try:
+        yield recorder.stats
+    finally:
+        stats = recorder.stop()
+
+    if stats.count > limit:
+        raise AssertionError(
+            f"Query budget exceeded for {budget}: {stats.count} queries, "
+            f"budget is {limit}. Repeated queries:\n{stats.describe_duplicates()}"
+        )
+
+
+# ================== MIDDLEWARE ==================
+class QueryBudgetMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.add_headers = settings.DEBUG
+        self.log_violations = settings.QUERY_BUDGET_LOG_VIOLATIONS
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not (self.add_headers or self.log_violations):
+            return None
+        key = view_action_key(view_func, request.method)
+        # Outside DEBUG only budgeted endpoints pay for the instrumentation.
+        if not self.add_headers and get_query_budget(key) is None:
+            return None
+        request._query_budget_key = key
+        request._query_recorder = QueryRecorder().start()
+        return None
+
+    def process_response(self, request, response):
+        recorder = getattr(request, "_query_recorder", None)
+        if recorder is None:
+            return response
+
+        stats = recorder.stop()
+        key = request._query_budget_key
+        budget = get_query_budget(key)
+
+        if self.add_headers:
+            response["X-Query-Count"] = str(stats.count)
+            response["X-DB-Time-Ms"] = f"{stats.db_time_ms:.3f}"
+            response["X-Duplicate-Queries"] = str(stats.duplicate_count)
+            if budget is not None:
+                response["X-Query-Budget"] = str(budget)
+
+        if self.log_violations and budget is not None and stats.count > budget:
+            logger.warning(
+                "Query budget exceeded for %s: %s queries (budget %s), %.1f ms in DB.\n%s",
+                key,
+                stats.count,
+                budget,
+                stats.db_time_ms,
+                stats.describe_duplicates(),
+            )
+        return response
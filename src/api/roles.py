@@ -0,0 +1,146 @@
+"""
+Set-based role management of a class (PATCH /api/class/{code}/roles/).
+
+A class has three rosters (members, experts, admins: M2M through tables) and
+a user holds at most one role in it. `apply_role_changes` takes any number of
+role changes for users in the class, additions of users with a role, and
+removals, and applies them with a fixed number of queries however many users
+are involved:
+
+- in one transaction, the class row is locked (SELECT ... FOR UPDATE), so
+  concurrent role changes of a class run one after the other;
+- one query loads the users, one the current roles of those users (and,
+  when admins are demoted or removed, one counts the remaining admins: a
+  class never loses its last admin);
+- at most one DELETE and one bulk INSERT per through table.
+
+The raw through-table writes bypass m2m_changed, so the sync change log
+(`api.sync`), the pending-tasks caches and the class events are updated here.
+"""
+
+# ================== Standard Library ==================
+#
+
+# ================== Django ============================
+from django.db import transaction
+from django.db.models import CharField, Value
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from . import events
+from .models import Class, User
+from .sync import record_role_changes
+from .utils import invalidate_pending_tasks
+
+# Role name -> M2M field of Class.
+ROLE_FIELDS = {"member": "members", "expert": "experts", "admin": "admins"}
+
+
+class RoleChangeError(ValueError):
+    """The operations are invalid as a whole; nothing was applied."""
+
+    def __init__(self, detail, errors=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.errors = errors or {}
+
+
+def _through(role):
+    return getattr(Class, ROLE_FIELDS[role]).through
+
+
+def current_roles(class_obj, user_ids):
+    """{user_id: role} of the given users in the class, in one query."""
+    role_rows = [
+        _through(role).objects.filter(class_id=class_obj.pk, user_id__in=user_ids)
+        .annotate(role=Value(role, output_field=CharField()))
+        .values_list("user_id", "role")
+        for role in ROLE_FIELDS
+    ]
+    return dict(role_rows[0].union(*role_rows[1:], all=True))
+
+
+def apply_role_changes(class_obj, changes=(), add=(), remove=()):
+    """
+    `changes` and `add` are (user_id, role) pairs: changed users must already
+    be in the class, added ones must not. `remove` lists user ids to take out
+    of the class. Returns {user_id: new role or None} of the affected users.
+    Raises RoleChangeError (with per-user `errors`) without applying anything.
+    """
+    desired = {}
+    errors = {}
+    for user_id, role in [*changes, *add]:
+        if user_id in desired:
+            errors[str(user_id)] = "Listed more than once."
+        desired[user_id] = role
+    for user_id in remove:
+        if user_id in desired:
+            errors[str(user_id)] = "Listed more than once."
+        desired[user_id] = None
+    if errors:
+        raise RoleChangeError("Each user can appear in only one operation.", errors)
+    if not desired:
+        raise RoleChangeError("No operations given.")
+
+    added = {user_id for user_id, _ in add}
+    with transaction.atomic():
+        # Role changes of a class serialize on its row: two requests cannot both
+        # pass the last-admin check and leave the class without an admin.
+        Class.objects.select_for_update().filter(pk=class_obj.pk).exists()
+        found = set(
+            User.objects.filter(
+                pk__in=desired, is_active=True, deletion_requested_at__isnull=True
+            ).values_list("pk", flat=True)
+        )
+        current = current_roles(class_obj, list(desired))
+
+        for user_id in desired:
+            if user_id not in found:
+                errors[str(user_id)] = "User not found."
+            elif user_id in added and user_id in current:
+                errors[str(user_id)] = f"Already in the class as {current[user_id]}."
+            elif user_id not in added and user_id not in current:
+                errors[str(user_id)] = "Not in the class."
+        if errors:
+            raise RoleChangeError("Some operations are invalid.", errors)
+
+        affected = {
+            user_id: role for user_id, role in desired.items() if current.get(user_id) != role
+        }
+        if not affected:
+            return {}
+
+        if any(current.get(user_id) == "admin" for user_id in affected):
+            admins_left = _through("admin").objects.filter(class_id=class_obj.pk).exclude(
+                user_id__in=list(affected)
+            ).count() + sum(1 for role in affected.values() if role == "admin")
+            if not admins_left:
+                raise RoleChangeError("A class needs at least one admin.")
+
+        for role in ROLE_FIELDS:
+            through = _through(role)
+            leaving = [user_id for user_id in affected if current.get(user_id) == role]
+            if leaving:
+                through.objects.filter(class_id=class_obj.pk, user_id__in=leaving).delete()
+            joining = [user_id for user_id, new_role in affected.items() if new_role == role]
+            if joining:
+                through.objects.bulk_create(
+                    [through(class_id=class_obj.pk, user_id=user_id) for user_id in joining],
+                    ignore_conflicts=True,
+                )
+        record_role_changes(
+            class_obj.pk,
+            [user_id for user_id, role in affected.items() if role and user_id not in current],
+        )
+
+    for user_id, role in affected.items():
+        invalidate_pending_tasks(user_id)
+        events.publish_class_event(
+            class_obj.pk, events.ROLE_CHANGED, {"user_id": str(user_id), "role": role}
+        )
+    return affected
@@ -2,7 +2,7 @@
 #
 
 # ================== Django ============================
-#
+from django.conf import settings
 
 # ================== DRF ===============================p
 from rest_framework import serializers
@@ -12,7 +12,7 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
 # ================== Local / App Imports =================
-from .models import Class, Submission, User, Task
+from .models import Class, DeletionJob, Submission, User, Task
 
 
 class SubmissionSerializer(serializers.ModelSerializer):
@@ -77,6 +77,8 @@ class ClassCreateSerializer(serializers.ModelSerializer):
 
 class TaskSerializer(serializers.ModelSerializer):
 
+    # Live submissions only: those of archived months (api.partitioning) are
+    # served by GET /api/tasks/{id}/submissions/ and GET /api/submissions/{id}/.
     submissions = UserIDSubmissionSerializer(many=True, read_only=True)
 
     class_obj_id = serializers.UUIDField(write_only=True, source="class_obj")
@@ -128,7 +130,7 @@ class ClassDetailSerializer(serializers.ModelSerializer):
     members = BasicUserSerializer(many=True, read_only=True)
     experts = BasicUserSerializer(many=True, read_only=True)
     admins = BasicUserSerializer(many=True, read_only=True)
-    tasks = TaskSerializer(many=True, read_only=True)
+    tasks = TaskSerializer(many=True, read_only=True)  # live submissions only, as TaskSerializer
 
     class Meta:
         model = Class
@@ -173,3 +175,151 @@ class SubmissionSerializer(serializers.ModelSerializer):
             "user_upvotes",
             "expert_upvotes",
         ]
+
+
+#! ==================== PENDING TASK SERIALIZER ====================
+
+
+class PendingTaskSerializer(serializers.ModelSerializer):
+    """A task the current user still has to submit, with the class it belongs to."""
+
+    class_id = serializers.UUIDField(source="class_obj.id", read_only=True)
+    class_code = serializers.CharField(source="class_obj.class_code", read_only=True)
+    class_name = serializers.CharField(source="class_obj.class_name", read_only=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            "id",
+            "title",
+            "description",
+            "dueDate",
+            "document",
+            "created_at",
+            "class_id",
+            "class_code",
+            "class_name",
+        ]
+        read_only_fields = fields
+
+
+#! ==================== DELETION JOB SERIALIZER ====================
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = [
+            "id",
+            "target_model",
+            "target_id",
+            "status",
+            "step",
+            "deleted",
+            "attempts",
+            "error",
+            "created_at",
+            "heartbeat_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+#! ==================== PROFILING SERIALIZER ====================
+
+
+class ProfilingConfigSerializer(serializers.Serializer):
+    # A rate N profiles 1 in N requests; 0 turns profiling off.
+    default_rate = serializers.IntegerField(min_value=0, required=False)
+    route_rates = serializers.DictField(
+        child=serializers.IntegerField(min_value=0), required=False
+    )
+
+
+#! ==================== SYNC SERIALIZERS ====================
+# Flat rows for GET /api/sync/: relations are ids, so a change to one row
+# never requires re-sending another.
+
+
+class SyncClassSerializer(serializers.ModelSerializer):
+    members = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    experts = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    admins = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = Class
+        fields = [
+            "id",
+            "class_name",
+            "description",
+            "class_code",
+            "created_by",
+            "created_at",
+            "updated_at",
+            "members",
+            "experts",
+            "admins",
+        ]
+        read_only_fields = fields
+
+
+class SyncTaskSerializer(serializers.ModelSerializer):
+    class_id = serializers.UUIDField(source="class_obj_id", read_only=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            "id",
+            "class_id",
+            "title",
+            "description",
+            "created_by",
+            "created_at",
+            "updated_at",
+            "dueDate",
+            "document",
+        ]
+        read_only_fields = fields
+
+
+class SyncSubmissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Submission
+        fields = [
+            "id",
+            "task",
+            "user",
+            "submitted_at",
+            "updated_at",
+            "document",
+            "user_upvotes",
+            "expert_upvotes",
+        ]
+        read_only_fields = fields
+
+
+#! ==================== ROLE SERIALIZERS ====================
+
+
+class RoleAssignmentSerializer(serializers.Serializer):
+    user_id = serializers.UUIDField()
+    role = serializers.ChoiceField(choices=["member", "expert", "admin"])
+
+
+class BulkRoleChangeSerializer(serializers.Serializer):
+    # Users already in the class get a new role...
+    changes = RoleAssignmentSerializer(many=True, required=False, default=list)
+    # ...users not in it yet are added with a role...
+    add = RoleAssignmentSerializer(many=True, required=False, default=list)
+    # ...and these users are taken out of the class.
+    remove = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+
+    def validate(self, attrs):
+        total = len(attrs["changes"]) + len(attrs["add"]) + len(attrs["remove"])
+        if not total:
+            raise serializers.ValidationError("Give at least one change, addition or removal.")
+        if total > settings.MAX_BULK_ROLE_CHANGES:
+            raise serializers.ValidationError(
+                f"At most {settings.MAX_BULK_ROLE_CHANGES} operations per request."
+            )
+        return attrs
@@ -0,0 +1,188 @@
+"""
+Compact users × tasks submission matrix for the instructor grid.
+
+Rows are the class roster (members, experts and admins, by user id), columns
+are the class's tasks (by due date). The matrix is built from one grouped
+query (plus any archived months, see api.partitioning) and assembled with
+NumPy, then encoded compactly:
+
+- `submitted` is a row-major bitset (numpy.packbits, most significant bit
+  first) of n_users * n_tasks bits: cell (r, c) is bit r * n_tasks + c.
+- `user_upvotes` / `expert_upvotes` hold one count per *set* bit, in bitset
+  order, so cells without a submission cost nothing.
+
+JSON responses base64-encode the bitset and keep the counts as integer lists.
+With `?format=bin` (or `Accept: application/vnd.group-study.matrix`) the
+response is a little-endian binary blob instead:
+
+    b"GSM1"  uint32 n_users  uint32 n_tasks  uint32 n_submitted
+    n_users  * 16 bytes   user UUIDs
+    n_tasks  * 16 bytes   task UUIDs
+    ceil(n_users * n_tasks / 8) bytes   submitted bitset
+    n_submitted * uint16  user upvotes
+    n_submitted * uint16  expert upvotes
+
+NumPy is imported on first use so it does not weigh on process start-up.
+"""
+
+# ================== Standard Library ==================
+import base64
+import struct
+import uuid
+
+# ================== Django ============================
+from django.db.models import Count, Func, IntegerField, Sum
+from django.db.models.functions import Coalesce
+
+# ================== DRF ===============================
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .models import Class, Submission, Task
+from .partitioning import iter_archived_submissions
+
+BINARY_MAGIC = b"GSM1"
+_HEADER = struct.Struct("<4sIII")
+_COUNT_MAX = 0xFFFF
+
+
+class JSONArrayLength(Func):
+    """Length of a JSON array column (the upvote lists)."""
+
+    function = "json_array_length"
+    output_field = IntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function="jsonb_array_length", **extra_context)
+
+
+# ================== BUILDING ==================
+class SubmissionMatrix:
+    def __init__(self, user_ids, task_ids, submitted, user_upvotes, expert_upvotes):
+        self.user_ids = user_ids
+        self.task_ids = task_ids
+        self.submitted = submitted  # bool array, shape (n_users, n_tasks)
+        self.user_upvotes = user_upvotes  # uint16 arrays, same shape
+        self.expert_upvotes = expert_upvotes
+
+    @property
+    def shape(self):
+        return self.submitted.shape
+
+    def _packed(self):
+        import numpy as np
+
+        bits = np.packbits(self.submitted, axis=None)
+        mask = self.submitted
+        return (
+            bits,
+            self.user_upvotes[mask].astype("<u2"),
+            self.expert_upvotes[mask].astype("<u2"),
+        )
+
+    def to_dict(self):
+        bits, user_upvotes, expert_upvotes = self._packed()
+        return {
+            "users": [str(pk) for pk in self.user_ids],
+            "tasks": [str(pk) for pk in self.task_ids],
+            "shape": list(self.shape),
+            "submitted": base64.b64encode(bits.tobytes()).decode("ascii"),
+            "user_upvotes": user_upvotes.tolist(),
+            "expert_upvotes": expert_upvotes.tolist(),
+        }
+
+    def to_bytes(self):
+        bits, user_upvotes, expert_upvotes = self._packed()
+        n_users, n_tasks = self.shape
+        return b"".join(
+            (
+                _HEADER.pack(BINARY_MAGIC, n_users, n_tasks, len(user_upvotes)),
+                b"".join(_uuid_bytes(pk) for pk in self.user_ids),
+                b"".join(_uuid_bytes(pk) for pk in self.task_ids),
+                bits.tobytes(),
+                user_upvotes.tobytes(),
+                expert_upvotes.tobytes(),
+            )
+        )
+
+
+def _uuid_bytes(pk):
+    return pk.bytes if isinstance(pk, uuid.UUID) else uuid.UUID(str(pk)).bytes
+
+
+def _roster_ids(class_obj):
+    roles = [
+        role.through.objects.filter(class_id=class_obj.pk).values_list("user_id", flat=True)
+        for role in (Class.members, Class.experts, Class.admins)
+    ]
+    # UNION (not UNION ALL) drops users who hold several roles.
+    return sorted(roles[0].union(*roles[1:]), key=str)
+
+
+def build_submission_matrix(class_obj):
+    import numpy as np
+
+    user_ids = _roster_ids(class_obj)
+    task_ids = list(
+        Task.objects.filter(class_obj=class_obj).order_by("dueDate", "id").values_list("id", flat=True)
+    )
+    cells = (
+        Submission.objects.filter(task__class_obj=class_obj, submitted_at__gte=class_obj.created_at)
+        .values("user_id", "task_id")
+        .annotate(
+            n=Count("id"),
+            user_upvotes_count=Coalesce(Sum(JSONArrayLength("user_upvotes")), 0),
+            expert_upvotes_count=Coalesce(Sum(JSONArrayLength("expert_upvotes")), 0),
+        )
+        .values_list("user_id", "task_id", "user_upvotes_count", "expert_upvotes_count")
+    )
+    cells = list(cells)
+    # Months archived out of the database (api.partitioning).
+    cells += (
+        (s.user_id, s.task_id, len(s.user_upvotes or ()), len(s.expert_upvotes or ()))
+        for s in iter_archived_submissions(task_ids, since=class_obj.created_at)
+    )
+    cells = np.array(cells, dtype=object).reshape(-1, 4)
+
+    shape = (len(user_ids), len(task_ids))
+    submitted = np.zeros(shape, dtype=bool)
+    user_upvotes = np.zeros(shape, dtype=np.int64)
+    expert_upvotes = np.zeros(shape, dtype=np.int64)
+
+    row_of = {pk: i for i, pk in enumerate(user_ids)}
+    col_of = {pk: i for i, pk in enumerate(task_ids)}
+    rows = np.fromiter((row_of.get(pk, -1) for pk in cells[:, 0]), dtype=np.int64, count=len(cells))
+    cols = np.fromiter((col_of.get(pk, -1) for pk in cells[:, 1]), dtype=np.int64, count=len(cells))
+    # Submissions of users who have since left the class have no row.
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[keep], cols[keep]
+
+    submitted[rows, cols] = True
+    # A cell can hold both live and archived rows: add, then clip.
+    np.add.at(user_upvotes, (rows, cols), cells[keep, 2].astype(np.int64))
+    np.add.at(expert_upvotes, (rows, cols), cells[keep, 3].astype(np.int64))
+    return SubmissionMatrix(
+        user_ids,
+        task_ids,
+        submitted,
+        np.clip(user_upvotes, 0, _COUNT_MAX).astype(np.uint16),
+        np.clip(expert_upvotes, 0, _COUNT_MAX).astype(np.uint16),
+    )
+
+
+# ================== RENDERING ==================
+class SubmissionMatrixBinaryRenderer(BaseRenderer):
+    """Passes the packed matrix bytes through; errors are rendered as JSON."""
+
+    media_type = "application/vnd.group-study.matrix"
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return JSONRenderer().render(data, renderer_context=renderer_context)
@@ -0,0 +1,382 @@
+"""
+Delta sync of classes, tasks and submissions (GET /api/sync/?since=<cursor>).
+
+Every change is appended to `ChangeLogEntry` by the receivers below: an
+upsert or a tombstone (delete) with the class it belongs to, plus a "grant"
+addressed to a user who got a role in a class. The entry id is the cursor, so
+a sync reads the entries of the user's classes after it through the
+(class_id, id) index and loads only the rows they name: O(changes), however
+big the classes are.
+
+    GET /api/sync/              - Full snapshot, and the cursor to continue from
+    GET /api/sync/?since=1234   - Only what changed after cursor 1234
+
+Responses hold at most PAGE_SIZE tasks and submissions (or change log
+entries); while `has_more` is true the client calls again with the returned
+cursor. Snapshots (a first sync, or a class the user was just given a role
+in) are paged with a keyset cursor over the primary keys of their tasks, then
+submissions, e.g. `1234.all.task.<last task id>`. Rows changed while a
+snapshot is paged are replayed from the change log position it started at.
+
+The response always lists `class_ids`, the classes the user currently has a
+role in: a class missing from it was deleted or left, and the client drops it
+with its tasks and submissions (so classes need no tombstones per user).
+
+Ids are allocated when a row is inserted but become visible when its
+transaction commits, so a reader can see #12 before #11 commits. A sync
+therefore never moves the cursor past a gap younger than GAP_TIMEOUT_SECONDS;
+older gaps are rolled-back transactions. Entries older than RETENTION_DAYS
+are purged by the job worker, which records the last purged id
+(`ChangeLogHorizon`); a client with a cursor below it gets 410 and starts over
+with a full sync.
+
+Bulk writes (bulk_create, queryset.update/delete) bypass the receivers. The
+chunked deletions of `api.deletion` record their tombstones explicitly.
+"""
+
+# ================== Standard Library ==================
+import uuid
+from datetime import timedelta
+
+# ================== Django ============================
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+# ================== DRF ===============================
+#
+
+# ================== Third-Party =======================
+#
+
+# ================== Local / App Imports =================
+from .models import ChangeLogEntry, ChangeLogHorizon, Class, Submission, Task
+from .utils import class_ids_subquery
+
+ROLE_FIELDS = ("members", "experts", "admins")
+# Paged in this order by snapshots.
+SNAPSHOT_TABLES = ("task", "submission")
+ALL_CLASSES = "all"
+
+
+class CursorExpired(Exception):
+    """The entries after the cursor were purged; the client needs a full sync."""
+
+
+def _sync_setting(name):
+    return settings.SYNC[name]
+
+
+# ================== RECORDING ==================
+def record(model, op, class_id, object_id, user_id=None):
+    ChangeLogEntry.objects.create(
+        model=model, op=op, class_id=class_id, object_id=object_id, user_id=user_id
+    )
+
+
+def _role_through_models():
+    return [getattr(Class, field).through for field in ROLE_FIELDS]
+
+
+def record_deletions(model, pks):
+    """
+    Tombstones for rows deleted without signals (e.g. by `api.deletion` chunks).
+    Removed role rows (a deleted user's) change the rosters of their classes.
+    """
+    if model in _role_through_models():
+        class_ids = model.objects.filter(pk__in=pks).values_list("class_id", flat=True).distinct()
+        for class_id in class_ids:
+            record_role_changes(class_id)
+        return
+    if model is Task:
+        rows = Task.objects.filter(pk__in=pks).values_list("pk", "class_obj_id")
+        name = ChangeLogEntry.MODEL_TASK
+    elif model is Submission:
+        rows = Submission.objects.filter(pk__in=pks).values_list("pk", "task__class_obj_id")
+        name = ChangeLogEntry.MODEL_SUBMISSION
+    else:
+        return
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(model=name, op=ChangeLogEntry.OP_DELETE, class_id=class_id, object_id=pk)
+        for pk, class_id in rows
+    )
+
+
+def _submission_class_id(submission):
+    # Views save submissions with their task loaded: no query then.
+    if Submission.task.is_cached(submission):
+        return submission.task.class_obj_id
+    return Task.objects.filter(pk=submission.task_id).values_list("class_obj_id", flat=True).first()
+
+
+@receiver(post_save, sender=Class)
+def _class_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record(ChangeLogEntry.MODEL_CLASS, ChangeLogEntry.OP_UPSERT, instance.pk, instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def _task_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record(ChangeLogEntry.MODEL_TASK, ChangeLogEntry.OP_UPSERT, instance.class_obj_id, instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+def _task_deleted(sender, instance, **kwargs):
+    record(ChangeLogEntry.MODEL_TASK, ChangeLogEntry.OP_DELETE, instance.class_obj_id, instance.pk)
+
+
+@receiver(post_save, sender=Submission)
+def _submission_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    class_id = _submission_class_id(instance)
+    if class_id is not None:
+        record(ChangeLogEntry.MODEL_SUBMISSION, ChangeLogEntry.OP_UPSERT, class_id, instance.pk)
+
+
+@receiver(post_delete, sender=Submission)
+def _submission_deleted(sender, instance, **kwargs):
+    class_id = _submission_class_id(instance)
+    if class_id is not None:
+        record(ChangeLogEntry.MODEL_SUBMISSION, ChangeLogEntry.OP_DELETE, class_id, instance.pk)
+
+
+def record_role_changes(class_id, granted_user_ids=()):
+    """The class's rosters changed; `granted_user_ids` were given a role in it."""
+    entries = [
+        # The rosters are part of the class row, for everyone in it.
+        ChangeLogEntry(
+            model=ChangeLogEntry.MODEL_CLASS, op=ChangeLogEntry.OP_UPSERT,
+            class_id=class_id, object_id=class_id,
+        )
+    ]
+    entries.extend(
+        ChangeLogEntry(
+            model=ChangeLogEntry.MODEL_CLASS, op=ChangeLogEntry.OP_GRANT,
+            class_id=class_id, object_id=class_id, user_id=user_id,
+        )
+        for user_id in granted_user_ids
+    )
+    ChangeLogEntry.objects.bulk_create(entries)
+
+
+def _roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # user.joined_classes.add(...): `instance` is the user, pk_set the classes.
+        class_ids, user_ids = pk_set or (), [instance.pk]
+    else:
+        class_ids, user_ids = [instance.pk], pk_set or ()
+    for class_id in class_ids:
+        record_role_changes(class_id, user_ids if action == "post_add" else ())
+
+
+for _field in ROLE_FIELDS:
+    m2m_changed.connect(
+        _roles_changed,
+        sender=getattr(Class, _field).through,
+        dispatch_uid=f"sync_class_{_field}_changed",
+    )
+
+
+# ================== CURSOR ==================
+def stable_cursor():
+    """
+    The highest id up to which every entry is visible (or rolled back), i.e.
+    the furthest a sync may move a cursor without skipping a commit in flight.
+    """
+    recent_since = timezone.now() - timedelta(seconds=_sync_setting("GAP_TIMEOUT_SECONDS"))
+    entries = ChangeLogEntry.objects.order_by("-id").values_list("id", flat=True)
+    cursor = entries.filter(created_at__lt=recent_since).first() or 0
+    recent = sorted(entries.filter(id__gt=cursor, created_at__gte=recent_since))
+    for entry_id in recent:
+        if entry_id != cursor + 1:
+            break
+        cursor = entry_id
+    return cursor
+
+
+def purge_change_log(now=None):
+    """
+    Deletes entries older than RETENTION_DAYS, and every entry before them,
+    recording the last purged id as the horizon. Returns the count.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=_sync_setting("RETENTION_DAYS"))
+    through = ChangeLogEntry.objects.filter(created_at__lt=cutoff).aggregate(Max("id"))["id__max"]
+    if through is None:
+        return 0
+    with transaction.atomic():
+        horizon, _ = ChangeLogHorizon.objects.select_for_update().get_or_create(pk=1)
+        if through > horizon.purged_through:
+            horizon.purged_through = through
+            horizon.save()
+        deleted, _ = ChangeLogEntry.objects.filter(id__lte=through).delete()
+    return deleted
+
+
+def purge_horizon():
+    """The last purged entry id: cursors below it have expired."""
+    return (
+        ChangeLogHorizon.objects.filter(pk=1).values_list("purged_through", flat=True).first() or 0
+    )
+
+
+# ================== CURSORS ==================
+class SnapshotCursor:
+    """
+    Position in a paged snapshot: of every class of the user (`scope` "all")
+    or of one granted class (its id), resuming after row `last` of `table`.
+    `since` is the change log position to continue from once it is done.
+    """
+
+    def __init__(self, since, scope, table, last=None):
+        self.since, self.scope, self.table, self.last = since, scope, table, last
+
+    def __str__(self):
+        return f"{self.since}.{self.scope}.{self.table}.{self.last or ''}"
+
+
+def parse_cursor(value):
+    """A `since` parameter: an entry id (int) or a SnapshotCursor. ValueError if malformed."""
+    if value.isdigit():
+        return int(value)
+    since, scope, table, last = value.split(".")
+    if not since.isdigit() or table not in SNAPSHOT_TABLES:
+        raise ValueError(value)
+    if scope != ALL_CLASSES:
+        scope = uuid.UUID(scope)
+    return SnapshotCursor(int(since), scope, table, uuid.UUID(last) if last else None)
+
+
+# ================== FEED ==================
+def user_class_queryset(user):
+    return Class.objects.filter(pk__in=class_ids_subquery(user), deletion_requested_at__isnull=True)
+
+
+def _snapshot_page(class_ids, position):
+    """
+    Up to PAGE_SIZE tasks, then submissions, of the classes from `position`
+    on (and the class rows, on the first page). Returns the page and the
+    cursor of the next one (None when the snapshot is complete).
+    """
+    querysets = {
+        "task": Task.objects.filter(class_obj_id__in=class_ids),
+        "submission": Submission.objects.filter(task__class_obj_id__in=class_ids),
+    }
+    first_page = position.table == SNAPSHOT_TABLES[0] and position.last is None
+    page = {
+        "classes": Class.objects.filter(pk__in=class_ids if first_page else ()),
+        "tasks": [],
+        "submissions": [],
+    }
+    budget, last = _sync_setting("PAGE_SIZE"), position.last
+    for table in SNAPSHOT_TABLES[SNAPSHOT_TABLES.index(position.table):]:
+        rows = querysets[table].order_by("pk")
+        if last is not None:
+            rows = rows.filter(pk__gt=last)
+        rows = list(rows[:budget])
+        page[f"{table}s"] = rows
+        budget -= len(rows)
+        if not budget:
+            return page, SnapshotCursor(position.since, position.scope, table, rows[-1].pk)
+        last = None
+    return page, None
+
+
+def _snapshot(class_ids, position):
+    # A granted class is sent if the user still has a role in it.
+    scope = class_ids if position.scope == ALL_CLASSES else class_ids & {position.scope}
+    page, next_position = _snapshot_page(scope, position)
+    return {
+        # A finished snapshot of a granted class resumes the change log after the grant.
+        "cursor": next_position or position.since,
+        "has_more": next_position is not None or position.scope != ALL_CLASSES,
+        "class_ids": class_ids,
+        "deleted": {"tasks": [], "submissions": []},
+        **page,
+    }
+
+
+def changes_for(user, since=None):
+    """
+    What changed in the user's classes after cursor `since` (an entry id, a
+    SnapshotCursor, or None for a full snapshot). Returns a dict of querysets
+    or lists and ids (see SyncView), with the cursor to send next time and
+    whether more is pending.
+    """
+    class_ids = set(user_class_queryset(user).values_list("pk", flat=True))
+    if since is None:
+        # Taken first: changes while the snapshot is paged are replayed after it.
+        since = SnapshotCursor(stable_cursor(), ALL_CLASSES, SNAPSHOT_TABLES[0])
+    if isinstance(since, SnapshotCursor):
+        if since.since < purge_horizon():
+            raise CursorExpired()
+        return _snapshot(class_ids, since)
+
+    if since < purge_horizon():
+        raise CursorExpired()
+    # Taken first: changes while the rows are read are replayed next time.
+    cursor = stable_cursor()
+    if since >= cursor:
+        # Nothing new (or a commit in flight): keep the client's cursor.
+        cursor = since
+
+    page_size = _sync_setting("PAGE_SIZE")
+    entries = list(
+        ChangeLogEntry.objects.filter(id__gt=since, id__lte=cursor, class_id__in=class_ids)
+        .filter(Q(user_id__isnull=True) | Q(user_id=user.pk))
+        .order_by("id")
+        .values_list("id", "model", "op", "class_id", "object_id")[:page_size]
+    )
+    has_more = len(entries) == page_size
+    if has_more:
+        cursor = entries[-1][0]
+
+    # A class granted to the user is sent whole, as a snapshot of its own: the
+    # page stops before the grant, or, when it starts with one, is the snapshot.
+    grants = [index for index, entry in enumerate(entries) if entry[2] == ChangeLogEntry.OP_GRANT]
+    if grants and grants[0] == 0:
+        entry_id, _, _, class_id, _ = entries[0]
+        return _snapshot(class_ids, SnapshotCursor(entry_id, class_id, SNAPSHOT_TABLES[0]))
+    if grants:
+        entries = entries[: grants[0]]
+        cursor, has_more = entries[-1][0], True
+
+    # The last operation on each row wins.
+    latest = {}
+    for _, model, op, class_id, object_id in entries:
+        latest[model, object_id] = op
+
+    def changed(model, op):
+        return [
+            object_id
+            for (entry_model, object_id), entry_op in latest.items()
+            if entry_model == model and entry_op == op
+        ]
+
+    return {
+        "cursor": cursor,
+        "has_more": has_more,
+        "class_ids": class_ids,
+        "classes": Class.objects.filter(
+            pk__in=changed(ChangeLogEntry.MODEL_CLASS, ChangeLogEntry.OP_UPSERT),
+        ),
+        "tasks": Task.objects.filter(
+            pk__in=changed(ChangeLogEntry.MODEL_TASK, ChangeLogEntry.OP_UPSERT),
+            class_obj_id__in=class_ids,
+        ),
+        "submissions": Submission.objects.filter(
+            pk__in=changed(ChangeLogEntry.MODEL_SUBMISSION, ChangeLogEntry.OP_UPSERT),
+            task__class_obj_id__in=class_ids,
+        ),
+        "deleted": {
+            "tasks": changed(ChangeLogEntry.MODEL_TASK, ChangeLogEntry.OP_DELETE),
+            "submissions": changed(ChangeLogEntry.MODEL_SUBMISSION, ChangeLogEntry.OP_DELETE),
+        },
+    }
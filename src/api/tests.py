@@ -1,3 +1,1132 @@
-from django.test import TestCase
+"""
+API tests. They run against the configured Postgres database:
 
-# Create your tests here.
+    python manage.py test api
+
+or, without a Postgres server, against local SQLite databases:
+
+    python manage.py test api --settings=group-study-review-drf-server.test_settings
+"""
+
+# ================== Standard Library ==================
+import asyncio
+import gzip
+import json
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from itertools import chain
+from unittest import mock, skipUnless
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+# ================== DRF ===============================
+from rest_framework.test import APIClient
+
+# ================== Third-Party =======================
+from asgiref.sync import sync_to_async
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# ================== Local / App Imports =================
+from . import db_router, events
+from .class_stats import COUNTER_FIELDS, rebuild_class_stats
+from .deletion import request_deletion
+from .export import iter_row_chunks
+from .ids import uuid7, uuid7_at, uuid7_timestamp_ms
+from .jobs import claim, enqueue, execute, job, renew_lock, requeue_stale, run_pending
+from .models import (
+    ChangeLogEntry,
+    Class,
+    Feedback,
+    Job,
+    RequestProfile,
+    Submission,
+    Task,
+    TaskStats,
+    User,
+)
+from .openapi_schema import SchemaDocument
+from .partitioning import (
+    PARTITIONED_TABLES,
+    add_months,
+    archive_partition,
+    create_partition,
+    is_partitioned,
+    month_bounds,
+    month_of,
+    monthly_partitions,
+)
+from .profiling import ProfileBuffer, profile_buffer, sampler, set_sampling_config
+from .query_budget import assert_query_budget
+from .roles import RoleChangeError, apply_role_changes
+from .submission_matrix import build_submission_matrix
+from .sync import purge_change_log
+from .throttling import CacheBucketStore, get_store
+from .utils import generate_tokens_for_user
+
+
+def make_user(name, **fields):
+    return User.objects.create(username=name, email=f"{name}@example.com", **fields)
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Bearer " + generate_tokens_for_user(user)["access"])
+    return client
+
+
+class ClassFixtureMixin:
+    """A class with an admin, an expert, three members, three tasks and some submissions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user("admin")
+        cls.expert = make_user("expert")
+        cls.members = [make_user(f"member{i}") for i in range(3)]
+        cls.class_obj = Class.objects.create(
+            class_name="Algorithms", description="", class_code="ALG0001", created_by=cls.admin
+        )
+        cls.class_obj.admins.add(cls.admin)
+        cls.class_obj.experts.add(cls.expert)
+        cls.class_obj.members.add(*cls.members)
+        due = timezone.now() + timedelta(days=7)
+        cls.tasks = [
+            Task.objects.create(
+                class_obj=cls.class_obj,
+                title=f"Task {i}",
+                description="",
+                created_by=cls.expert,
+                dueDate=due + timedelta(days=i),
+            )
+            for i in range(3)
+        ]
+        for member in cls.members:
+            for task in cls.tasks[:2]:
+                Submission.objects.create(
+                    task=task, user=member, document="https://example.com/doc"
+                )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # Token buckets live in process memory; start every test with full ones.
+        get_store()._buckets.clear()
+
+
+class QueryBudgetTests(ClassFixtureMixin, TestCase):
+    """Every budgeted endpoint stays within its QUERY_BUDGETS entry."""
+
+    def assertWithinBudget(self, budget, client, method, path, data=None, status=200):
+        with assert_query_budget(budget):
+            response = getattr(client, method)(path, data, format="json")
+        # Streamed bodies are read outside the block: budgets cover the queries
+        # before the first byte only.
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(response.status_code, status, body[:300])
+        return response
+
+    def test_user_endpoints(self):
+        client = client_for(self.members[0])
+        self.assertWithinBudget("UserProfileView.get", client, "get", "/api/me/")
+        self.assertWithinBudget("UserViewSet.list", client, "get", "/api/users/")
+        found = self.assertWithinBudget(
+            "UserViewSet.list", client, "get", "/api/users/", {"search": "MEMBER1"}
+        )
+        self.assertEqual([user["username"] for user in found.json()], ["member1"])
+
+    def test_class_reads(self):
+        client = client_for(self.members[0])
+        code = self.class_obj.class_code
+        self.assertWithinBudget("ClassViewSet.list", client, "get", "/api/class/")
+        self.assertWithinBudget("ClassViewSet.retrieve", client, "get", f"/api/class/{code}/")
+        self.assertWithinBudget("ClassTaskViewSet.list", client, "get", f"/api/class/{code}/tasks/")
+
+    def test_join(self):
+        client = client_for(make_user("newcomer"))
+        self.assertWithinBudget(
+            "ClassViewSet.join", client, "post", f"/api/class/{self.class_obj.class_code}/join/"
+        )
+
+    def test_task_reads(self):
+        client = client_for(self.members[0])
+        task = self.tasks[0]
+        self.assertWithinBudget("TaskViewSet.list", client, "get", "/api/tasks/")
+        self.assertWithinBudget("TaskViewSet.retrieve", client, "get", f"/api/tasks/{task.pk}/")
+        self.assertWithinBudget(
+            "TaskViewSet.list_submissions", client, "get", f"/api/tasks/{task.pk}/submissions/"
+        )
+
+    def test_submit(self):
+        client = client_for(self.members[0])
+        self.assertWithinBudget(
+            "TaskViewSet.submit",
+            client,
+            "post",
+            f"/api/tasks/{self.tasks[2].pk}/submit/",
+            {"document": "https://example.com/answer"},
+            status=201,
+        )
+
+    def test_submission_list(self):
+        client = client_for(self.members[0])
+        response = self.assertWithinBudget(
+            "SubmissionViewSet.list", client, "get", "/api/submissions/"
+        )
+        self.assertEqual(len(response.json()), 2)
+
+    def test_instructor_views(self):
+        client = client_for(self.expert)
+        code = self.class_obj.class_code
+        self.assertWithinBudget("ClassViewSet.stats", client, "get", f"/api/class/{code}/stats/")
+        self.assertWithinBudget(
+            "ClassViewSet.submission_matrix", client, "get", f"/api/class/{code}/submission-matrix/"
+        )
+        self.assertWithinBudget("ClassViewSet.export", client, "get", f"/api/class/{code}/export/")
+
+    def test_roles(self):
+        client = client_for(self.admin)
+        self.assertWithinBudget(
+            "ClassViewSet.roles",
+            client,
+            "patch",
+            f"/api/class/{self.class_obj.class_code}/roles/",
+            {
+                "changes": [{"user_id": str(self.members[0].pk), "role": "expert"}],
+                "add": [{"user_id": str(make_user("newcomer").pk), "role": "member"}],
+                "remove": [str(self.members[1].pk)],
+            },
+        )
+
+    def test_pending_tasks(self):
+        member = self.members[0]
+        client = client_for(member)
+        # Cache miss: the user and the anti-join.
+        response = self.assertWithinBudget(
+            "PendingTasksView.get", client, "get", "/api/me/pending-tasks/"
+        )
+        self.assertEqual([task["id"] for task in response.json()["results"]], [str(self.tasks[2].pk)])
+        # Cache hit: only the user.
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get("/api/me/pending-tasks/").json(), response.json())
+        # Submitting invalidates the user's cached pages.
+        client.post(f"/api/tasks/{self.tasks[2].pk}/submit/", {"document": "https://example.com/a"})
+        response = self.assertWithinBudget(
+            "PendingTasksView.get", client, "get", "/api/me/pending-tasks/"
+        )
+        self.assertEqual(response.json()["results"], [])
+
+    def test_sync(self):
+        client = client_for(self.members[0])
+        self.assertWithinBudget("SyncView.get", client, "get", "/api/sync/")
+
+
+@skipUnless("replica_1" in settings.DATABASES, "needs a second database (see test_settings)")
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Two unreplicated databases: a user exists on both under different names,
+    so the name a response shows tells which database served the read.
+    """
+
+    # The runner sets up the databases of skipped tests too.
+    databases = {"default", "replica_1"} & settings.DATABASES.keys()
+
+    def setUp(self):
+        # Entered per test, so the flush after it still sees replica_1 as migratable.
+        self.enterContext(override_settings(DATABASE_REPLICAS=["replica_1"]))
+        cache.clear()
+        self.user = make_user("on-primary")
+        User.objects.using("replica_1").create(
+            pk=self.user.pk, username="on-replica", email=self.user.email
+        )
+        self.token = generate_tokens_for_user(self.user)["access"]
+
+    def token_client(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        return client
+
+    def served_by(self, client):
+        name = client.get("/api/me/").json()["username"]
+        return {"on-primary": "default", "on-replica": "replica_1"}[name]
+
+    def test_safe_reads_go_to_the_replica(self):
+        self.assertEqual(self.served_by(self.token_client()), "replica_1")
+
+    def test_writes_go_to_the_primary(self):
+        response = self.token_client().post("/api/class/", {"class_name": "Routed", "description": "Replica routing"})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(Class.objects.using("default").filter(class_name="Routed").exists())
+        self.assertFalse(Class.objects.using("replica_1").filter(class_name="Routed").exists())
+
+    def test_writers_read_their_writes(self):
+        client = self.token_client()
+        client.post("/api/class/", {"class_name": "Routed", "description": "Replica routing"})
+        self.assertIn(db_router.STICKY_COOKIE_NAME, client.cookies)
+        self.assertEqual(self.served_by(client), "default")
+        # Without the cookie, the cache marker keyed by user id pins them.
+        self.assertEqual(self.served_by(self.token_client()), "default")
+        cache.clear()
+        self.assertEqual(self.served_by(self.token_client()), "replica_1")
+
+    def test_replica_mode_ends_with_the_request(self):
+        self.assertEqual(self.served_by(self.token_client()), "replica_1")
+        # Same thread, next unit of work (e.g. a reused worker thread).
+        self.assertTrue(db_router._use_primary.get())
+        self.assertEqual(User.objects.get(pk=self.user.pk).username, "on-primary")
+
+
+class AsgiStreamingTests(ClassFixtureMixin, TestCase):
+    """Under ASGI, streamed bodies are read piece by piece, not buffered whole by Django."""
+
+    def setUp(self):
+        super().setUp()
+        self.tokens = {
+            user.pk: generate_tokens_for_user(user)["access"] for user in (self.expert, self.members[0])
+        }
+
+    async def assertStreamsLikeWsgi(self, user, path):
+        token = self.tokens[user.pk]
+        response = await AsyncClient().get(path, headers={"authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b"".join([piece async for piece in response.streaming_content])
+        self.assertEqual(body, await sync_to_async(self.read_wsgi)(user, path))
+
+    def read_wsgi(self, user, path):
+        return b"".join(client_for(user).get(path).streaming_content)
+
+    async def test_export(self):
+        code = self.class_obj.class_code
+        await self.assertStreamsLikeWsgi(self.expert, f"/api/class/{code}/export/")
+        await self.assertStreamsLikeWsgi(self.expert, f"/api/class/{code}/export/?format=ndjson")
+
+    async def test_streamed_list(self):
+        await self.assertStreamsLikeWsgi(self.members[0], "/api/submissions/?stream=1")
+
+
+class AsyncViewTests(ClassFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        token = generate_tokens_for_user(self.members[0])["access"]
+        self.headers = {"authorization": f"Bearer {token}"}
+
+    async def test_profile_lists_the_users_submissions(self):
+        response = await AsyncClient().get("/api/async/me/", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["submissions"]), 2)
+
+    async def test_tasks_of_classes_being_deleted_are_hidden(self):
+        path = f"/api/async/tasks/{self.tasks[0].pk}/"
+        self.assertEqual((await AsyncClient().get(path, headers=self.headers)).status_code, 200)
+        await sync_to_async(request_deletion)(self.class_obj)
+        self.assertEqual((await AsyncClient().get(path, headers=self.headers)).status_code, 404)
+
+    @override_settings(THROTTLES={**settings.THROTTLES, "STORE": "cache"})
+    async def test_login_rate_limit_checks_the_cache_off_the_event_loop(self):
+        threads = []
+
+        def consume(store, key, burst, rate):
+            threads.append(threading.get_ident())
+            return 0
+
+        with (
+            mock.patch("api.throttling._store", None),
+            mock.patch.object(CacheBucketStore, "consume", consume),
+        ):
+            response = await AsyncClient().post("/api/async/login/", {})
+        self.assertEqual(response.status_code, 400)  # no Firebase token
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+
+class BatchTests(ClassFixtureMixin, TestCase):
+    def batch(self, *requests, user=None):
+        client = client_for(user or self.members[0])
+        return client.post("/api/batch/", {"requests": list(requests)}, format="json")
+
+    def assertRejected(self, *requests):
+        response = self.batch(*requests)
+        self.assertEqual(response.status_code, 400, response.content)
+
+    def test_sub_requests_share_the_batch_user(self):
+        with mock.patch.object(JWTAuthentication, "authenticate") as authenticate:
+            response = self.batch(
+                {"id": "me", "path": "/api/me/"},
+                {"id": "task", "path": f"/api/tasks/{self.tasks[0].pk}/"},
+            )
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        me, task = response.json()["responses"]
+        self.assertEqual((me["id"], me["status"]), ("me", 200))
+        self.assertEqual(me["body"]["username"], self.members[0].username)
+        self.assertEqual((task["status"], task["body"]["id"]), (200, str(self.tasks[0].pk)))
+
+    def test_each_response_keeps_its_status(self):
+        response = self.batch(
+            {"path": f"/api/tasks/{self.tasks[0].pk}/"},
+            {"path": f"/api/tasks/{uuid7()}/"},
+            {"path": "/api/nowhere/"},
+            {"path": f"/api/class/{self.class_obj.class_code}/submission-matrix/"},  # experts only
+            {"path": "/api/batch/"},
+            {"path": "/api/submissions/?stream=1"},
+        )
+        self.assertEqual(response.status_code, 200)
+        statuses = [item["status"] for item in response.json()["responses"]]
+        # Nested batches and streams (which a batch would buffer) are refused.
+        self.assertEqual(statuses, [200, 404, 404, 403, 400, 400])
+
+    @override_settings(BATCH={**settings.BATCH, "MAX_REQUESTS": 2})
+    def test_malformed_batches_are_rejected(self):
+        self.assertRejected()
+        self.assertRejected({"path": "/api/me/", "method": "POST"})
+        self.assertRejected({"path": "/admin/"})
+        self.assertRejected({"path": "https://example.com/api/me/"})
+        self.assertRejected(*[{"path": "/api/me/"}] * 3)
+
+
+@override_settings(
+    THROTTLES={
+        **settings.THROTTLES,
+        "BUCKETS": {
+            "login": {"ip": {"RATE": "1/min", "BURST": 3}},
+            "submit": {
+                "user": {"RATE": "1/min", "BURST": 2},
+                "ip": {"RATE": "1/min", "BURST": 3},
+            },
+        },
+    }
+)
+class ThrottleTests(ClassFixtureMixin, TestCase):
+    def submit(self, user, ip="10.0.0.1"):
+        return client_for(user).post(
+            f"/api/tasks/{self.tasks[2].pk}/submit/",
+            {"document": "https://example.com/doc"},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_burst_passes_then_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(APIClient().post("/api/login/", {}).status_code, 400)  # no token
+        response = APIClient().post("/api/login/", {})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 60)
+
+    def test_user_and_ip_buckets_are_separate(self):
+        for _ in range(2):
+            self.assertNotEqual(self.submit(self.members[0]).status_code, 429)
+        # The user's bucket is empty, from any address.
+        self.assertEqual(self.submit(self.members[0], ip="10.0.0.2").status_code, 429)
+        # Another user from the same address takes the address's last token.
+        self.assertNotEqual(self.submit(self.members[1]).status_code, 429)
+        self.assertEqual(self.submit(self.members[2]).status_code, 429)
+        self.assertNotEqual(self.submit(self.members[2], ip="10.0.0.3").status_code, 429)
+
+    def test_throttled_requests_run_no_query(self):
+        for _ in range(2):
+            self.submit(self.members[0])
+        client = client_for(self.members[0])
+        with self.assertNumQueries(0):
+            response = client.post(
+                f"/api/tasks/{self.tasks[2].pk}/submit/", {"document": "https://example.com/doc"}
+            )
+        self.assertEqual(response.status_code, 429)
+
+    def test_cache_store_counts_in_a_shared_cache(self):
+        self.assertEqual(
+            settings.CACHES["default"]["BACKEND"], "django.core.cache.backends.locmem.LocMemCache"
+        )
+        store = CacheBucketStore()
+        self.assertEqual([store.consume("scope:ip:a", 3, 1 / 60) for _ in range(3)], [0, 0, 0])
+        self.assertTrue(0 < store.consume("scope:ip:a", 3, 1 / 60) <= 180)
+        self.assertEqual(store.consume("scope:ip:b", 3, 1 / 60), 0)
+        # A second store (another worker) sees the same counts.
+        self.assertTrue(CacheBucketStore().consume("scope:ip:a", 3, 1 / 60) > 0)
+
+        with (
+            override_settings(THROTTLES={**settings.THROTTLES, "STORE": "cache"}),
+            mock.patch("api.throttling._store", None),
+        ):
+            for _ in range(3):
+                self.assertEqual(APIClient().post("/api/login/", {}).status_code, 400)
+            self.assertEqual(APIClient().post("/api/login/", {}).status_code, 429)
+
+
+class ClassStatsTests(ClassFixtureMixin, TestCase):
+    """The deltas applied on every write add up to what a rebuild computes."""
+
+    def assertMatchesRebuild(self):
+        def snapshot():
+            return list(
+                TaskStats.objects.filter(class_obj=self.class_obj).order_by("task_id").values_list(
+                    "task_id", *COUNTER_FIELDS, "upvote_histogram"
+                )
+            )
+
+        incremental = snapshot()
+        rebuild_class_stats(self.class_obj.pk)
+        self.assertEqual(incremental, snapshot())
+
+    def test_deltas_match_a_rebuild(self):
+        self.assertMatchesRebuild()
+
+        response = client_for(self.members[0]).post(
+            f"/api/tasks/{self.tasks[2].pk}/submit/", {"document": "https://example.com/doc"}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertMatchesRebuild()
+
+        submission = Submission.objects.get(task=self.tasks[0], user=self.members[1])
+        submission.submitted_at = self.tasks[0].dueDate + timedelta(hours=1)  # now late
+        submission.save()
+        self.assertMatchesRebuild()
+
+        submission.user_upvotes = [str(member.pk) for member in self.members]
+        submission.expert_upvotes = [str(self.expert.pk)]
+        submission.save(update_fields=["user_upvotes", "expert_upvotes"])
+        self.assertMatchesRebuild()
+
+        submission.task = self.tasks[2]  # moved to another task
+        submission.save()
+        self.assertMatchesRebuild()
+
+        feedback = Feedback.objects.create(submission=submission, user=self.expert, content="ok")
+        Feedback.objects.create(submission=submission, user=self.admin, content="ok too")
+        self.assertMatchesRebuild()
+        feedback.delete()
+        self.assertMatchesRebuild()
+
+        Submission.objects.get(task=self.tasks[1], user=self.members[2]).delete()
+        submission.delete()  # its remaining feedback goes with it
+        self.assertMatchesRebuild()
+
+
+@mock.patch("api.events.get_backend", mock.Mock())
+class EventBrokerTests(SimpleTestCase):
+    def event(self, class_id, number):
+        return {"type": events.TASK_CREATED, "class_id": class_id, "data": {"n": number}}
+
+    async def received(self, subscription):
+        await asyncio.sleep(0)  # deliveries are scheduled on the loop
+        items = []
+        while not subscription.queue.empty():
+            items.append(await subscription.get())
+        return items
+
+    async def test_events_fan_out_to_the_class_subscribers(self):
+        broker = events.EventBroker()
+        first, second = broker.subscribe("a"), broker.subscribe("a")
+        other = broker.subscribe("b")
+        broker.deliver(self.event("a", 1))
+
+        self.assertEqual(await self.received(first), [self.event("a", 1)])
+        self.assertEqual(await self.received(second), [self.event("a", 1)])
+        self.assertEqual(await self.received(other), [])
+
+        broker.unsubscribe(first)
+        broker.deliver(self.event("a", 2))
+        self.assertEqual(await self.received(first), [])
+        self.assertEqual(await self.received(second), [self.event("a", 2)])
+        self.assertEqual((broker.subscriber_count("a"), broker.subscriber_count()), (1, 2))
+
+    @override_settings(CLASS_EVENTS={**settings.CLASS_EVENTS, "QUEUE_SIZE": 2})
+    async def test_a_full_queue_collapses_to_one_overflow_event(self):
+        broker = events.EventBroker()
+        subscription = broker.subscribe("a")
+        for number in range(4):
+            broker.deliver(self.event("a", number))
+
+        [overflow] = await self.received(subscription)
+        self.assertEqual((overflow["type"], overflow["class_id"]), (events.STREAM_OVERFLOW, "a"))
+        broker.deliver(self.event("a", 5))
+        self.assertEqual(await self.received(subscription), [])
+
+
+class Uuid7Tests(SimpleTestCase):
+    def test_version_and_variant(self):
+        key = uuid7()
+        self.assertEqual((key.version, key.variant), (7, uuid.RFC_4122))
+
+    def test_keys_increase_within_one_millisecond(self):
+        frozen_ms = 1_700_000_000_123
+        with (
+            mock.patch.multiple("api.ids", _last_ms=0, _counter=0),
+            mock.patch("api.ids.time.time_ns", return_value=frozen_ms * 1_000_000),
+        ):
+            keys = [uuid7() for _ in range(5000)]  # more than the 12-bit counter holds
+        self.assertEqual(keys, sorted(set(keys)))
+        # A counter overflow borrows from the next millisecond.
+        self.assertEqual(uuid7_timestamp_ms(keys[0]), frozen_ms)
+        self.assertEqual(uuid7_timestamp_ms(keys[-1]), frozen_ms + 1)
+
+    def test_timestamp_round_trip(self):
+        before = time.time_ns() // 1_000_000
+        key = uuid7()
+        after = time.time_ns() // 1_000_000
+        self.assertTrue(before <= uuid7_timestamp_ms(key) <= after)
+
+
+class MetricsTests(ClassFixtureMixin, TestCase):
+    def responses(self, route, status="200"):
+        labels = {"route": route, "method": "GET", "status": status}
+        return REGISTRY.get_sample_value("http_responses_total", labels) or 0
+
+    def test_requests_are_labelled_by_route_name(self):
+        before = self.responses("task-detail"), self.responses("unmatched", "404")
+        client = client_for(self.members[0])
+        for task in self.tasks:
+            self.assertEqual(client.get(f"/api/tasks/{task.pk}/").status_code, 200)
+        self.client.get("/nowhere/")
+
+        after = self.responses("task-detail"), self.responses("unmatched", "404")
+        self.assertEqual((after[0] - before[0], after[1] - before[1]), (3, 1))
+        exposition = self.client.get("/metrics").content.decode()
+        self.assertNotIn(str(self.tasks[0].pk), exposition)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_require_the_token_when_set(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(
+            self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403
+        )
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"http_responses_total", response.content)
+
+
+class SamplingProfilerTests(ClassFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        sampler.invalidate()
+        self.addCleanup(sampler.invalidate)
+
+    def sampled(self, route_name, requests=50):
+        request = RequestFactory().get("/")
+        return sum(sampler.should_sample(request, route_name) for _ in range(requests))
+
+    def test_rate_zero_never_samples_and_one_always_does(self):
+        self.assertEqual(self.sampled("task-detail"), 0)  # DEFAULT_SAMPLE_RATE is 0 in tests
+        set_sampling_config(route_rates={"task-detail": 1})
+        self.assertEqual(self.sampled("task-detail"), 50)
+        self.assertEqual(self.sampled("class-detail"), 0)
+        set_sampling_config(default_rate=1, route_rates={"task-detail": 0})
+        self.assertEqual((self.sampled("task-detail"), self.sampled("class-detail")), (0, 50))
+
+    def test_sampled_requests_are_written_in_batches(self):
+        set_sampling_config(route_rates={"task-detail": 1})
+        profile_buffer.flush()  # restarts the flush interval
+        client = client_for(self.members[0])
+        with override_settings(PROFILING={**settings.PROFILING, "BATCH_SIZE": 3}):
+            for _ in range(2):
+                client.get(f"/api/tasks/{self.tasks[0].pk}/")
+            self.assertFalse(RequestProfile.objects.exists())
+            client.get(f"/api/tasks/{self.tasks[0].pk}/")
+        profiles = RequestProfile.objects.all()
+        self.assertEqual({profile.route_name for profile in profiles}, {"task-detail"})
+        self.assertEqual(len(profiles), 3)
+        self.assertTrue(all(profile.query_count > 0 for profile in profiles))
+
+    @override_settings(PROFILING={**settings.PROFILING, "MAX_BUFFERED": 2, "BATCH_SIZE": 10})
+    def test_the_buffer_is_bounded_until_flushed(self):
+        buffer = ProfileBuffer()
+        for _ in range(3):
+            buffer.add(
+                RequestProfile(
+                    method="GET", path="/", status_code=200, started_at=timezone.now(), duration_ms=1
+                )
+            )
+        self.assertEqual(buffer.dropped, 1)
+        self.assertFalse(RequestProfile.objects.exists())
+        buffer.flush()
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+
+class OpenApiSchemaTests(TestCase):
+    def setUp(self):
+        # A small stand-in for the prebuilt schema: generating it takes seconds.
+        document = SchemaDocument({"openapi": "3.0.3", "info": {"title": "t"}, "paths": {}})
+        self.enterContext(mock.patch("api.openapi_schema._document", document))
+
+    def get(self, **headers):
+        return self.client.get("/api/schema/", HTTP_ACCEPT="application/json", **headers)
+
+    def test_revalidation_with_the_etag_returns_304(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("openapi", json.loads(response.content))
+        etag = response["ETag"]
+
+        revalidated = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], etag)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_the_gzip_variant_has_its_own_etag(self):
+        plain = self.get()
+        gzipped = self.get(HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gzipped.content), plain.content)
+        self.assertNotEqual(gzipped["ETag"], plain["ETag"])
+        revalidated = self.get(HTTP_IF_NONE_MATCH=plain["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(revalidated.status_code, 200)
+        not_modified = self.get(HTTP_IF_NONE_MATCH=gzipped["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(not_modified.status_code, 304)
+        for response in (plain, gzipped, not_modified):
+            self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_gzip_refused_with_a_zero_q_value_is_not_sent(self):
+        for header in ("gzip;q=0", "deflate, gzip; q=0.0", "*;q=0", "identity"):
+            with self.subTest(header):
+                response = self.get(HTTP_ACCEPT_ENCODING=header)
+                self.assertFalse(response.has_header("Content-Encoding"))
+        for header in ("gzip;q=0.5", "br, *", "GZIP"):
+            with self.subTest(header):
+                self.assertEqual(self.get(HTTP_ACCEPT_ENCODING=header)["Content-Encoding"], "gzip")
+
+
+# Ids skipped by the rolled-back transactions of earlier tests are not commits in flight.
+@override_settings(SYNC={**settings.SYNC, "GAP_TIMEOUT_SECONDS": 0})
+class SyncTests(ClassFixtureMixin, TestCase):
+    def test_deleted_user_leaves_synced_rosters(self):
+        client = client_for(self.members[0])
+        cursor = client.get("/api/sync/").json()["cursor"]
+        victim = self.members[1]
+        request_deletion(victim)
+        run_pending()
+
+        changes = client.get("/api/sync/", {"since": cursor}).json()
+        (synced,) = [item for item in changes["classes"] if item["id"] == str(self.class_obj.pk)]
+        self.assertNotIn(str(victim.pk), synced["members"])
+
+    def sync_all(self, client, since=None):
+        """Pages through the sync from `since`. Returns the pages and the final cursor."""
+        pages = []
+        while True:
+            response = client.get("/api/sync/", {} if since is None else {"since": since})
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            since = pages[-1]["cursor"]
+            if not pages[-1]["has_more"]:
+                return pages, since
+
+    def synced_ids(self, pages, key):
+        return sorted({item["id"] for page in pages for item in page[key]})
+
+    @override_settings(SYNC={**settings.SYNC, "GAP_TIMEOUT_SECONDS": 0, "PAGE_SIZE": 2})
+    def test_full_sync_is_paged(self):
+        pages, cursor = self.sync_all(client_for(self.members[0]))
+
+        self.assertEqual(len(pages), 5)
+        self.assertTrue(all(len(page["tasks"]) + len(page["submissions"]) <= 2 for page in pages))
+        self.assertEqual(self.synced_ids(pages, "classes"), [str(self.class_obj.pk)])
+        self.assertEqual(self.synced_ids(pages, "tasks"), sorted(str(t.pk) for t in self.tasks))
+        submissions = Submission.objects.filter(task__class_obj=self.class_obj)
+        self.assertEqual(
+            self.synced_ids(pages, "submissions"), sorted(str(s.pk) for s in submissions)
+        )
+        self.assertTrue(cursor.isdigit())
+
+    @override_settings(SYNC={**settings.SYNC, "GAP_TIMEOUT_SECONDS": 0, "PAGE_SIZE": 2})
+    def test_granted_class_is_sent_as_a_paged_snapshot(self):
+        newcomer = make_user("newcomer")
+        client = client_for(newcomer)
+        _, cursor = self.sync_all(client)
+        self.class_obj.members.add(newcomer)
+
+        pages, _ = self.sync_all(client, cursor)
+
+        self.assertEqual(self.synced_ids(pages, "classes"), [str(self.class_obj.pk)])
+        self.assertEqual(self.synced_ids(pages, "tasks"), sorted(str(t.pk) for t in self.tasks))
+        self.assertEqual(len(self.synced_ids(pages, "submissions")), 6)
+
+    def test_rolled_back_ids_do_not_expire_cursors(self):
+        client = client_for(self.members[0])
+        cursor = client.get("/api/sync/").json()["cursor"]
+        self.tasks[0].save()
+        self.tasks[1].save()
+        # As if the first entry after the cursor was rolled back, and older ones purged.
+        first = ChangeLogEntry.objects.filter(id__gt=cursor).order_by("id").first()
+        ChangeLogEntry.objects.filter(id__lte=first.id).delete()
+
+        response = client.get("/api/sync/", {"since": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["id"] for item in response.json()["tasks"]], [str(self.tasks[1].pk)])
+
+    def test_cursors_below_the_purge_horizon_expire(self):
+        client = client_for(self.members[0])
+        cursor = client.get("/api/sync/").json()["cursor"]
+        self.tasks[0].save()
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=365))
+        purge_change_log()
+
+        self.assertEqual(client.get("/api/sync/", {"since": cursor}).status_code, 410)
+        snapshot = f"{cursor}.all.task."
+        self.assertEqual(client.get("/api/sync/", {"since": snapshot}).status_code, 410)
+        self.assertEqual(client.get("/api/sync/", {"since": "1.all.nope."}).status_code, 400)
+
+
+class DeletionTests(ClassFixtureMixin, TestCase):
+    def test_deleting_a_user_hides_the_classes_they_created(self):
+        client = client_for(self.members[0])
+        code = self.class_obj.class_code
+        request_deletion(self.admin)
+
+        self.assertEqual(client.get(f"/api/class/{code}/").status_code, 404)
+        self.assertEqual(client.get(f"/api/tasks/{self.tasks[0].pk}/").status_code, 404)
+        submit = client.post(
+            f"/api/tasks/{self.tasks[2].pk}/submit/", {"document": "https://example.com/a"}
+        )
+        self.assertEqual(submit.status_code, 404)
+        run_pending()
+        self.assertFalse(Class.objects.filter(pk=self.class_obj.pk).exists())
+        self.assertFalse(Submission.objects.filter(task__class_obj=self.class_obj).exists())
+
+
+@skipUnless(connection.vendor == "postgresql", "needs row locks (SELECT ... FOR UPDATE)")
+class ConcurrentRoleChangeTests(TransactionTestCase):
+    def test_concurrent_demotions_keep_an_admin(self):
+        admins = [make_user("admin-a"), make_user("admin-b")]
+        class_obj = Class.objects.create(
+            class_name="Race", description="", class_code="RACE001", created_by=admins[0]
+        )
+        class_obj.admins.add(*admins)
+        barrier = threading.Barrier(len(admins))
+        outcomes = []
+
+        def demote(user):
+            barrier.wait()
+            try:
+                apply_role_changes(class_obj, changes=[(user.pk, "member")])
+                outcomes.append("demoted")
+            except RoleChangeError:
+                outcomes.append("refused")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=demote, args=(user,)) for user in admins]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ["demoted", "refused"])
+        self.assertEqual(class_obj.admins.count(), 1)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs partitioned tables")
+class PartitionMigrationTests(TransactionTestCase):
+    before, partitioned = "0011_uuid7_primary_keys", "0012_partition_submissions_feedbacks"
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("api", target)])
+        return executor.loader.project_state([("api", target)]).apps
+
+    def tearDown(self):
+        (latest,) = MigrationExecutor(connection).loader.graph.leaf_nodes("api")
+        self.migrate(latest[1])
+        super().tearDown()
+
+    def rows(self, apps):
+        return {
+            model: list(apps.get_model("api", model).objects.order_by("pk").values_list())
+            for model in ("Submission", "Feedback")
+        }
+
+    def test_existing_rows_are_moved_into_monthly_partitions_and_back(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model("api", "User").objects.create(username="u", email="u@example.com")
+        class_obj = apps.get_model("api", "Class").objects.create(
+            class_name="Old", description="", class_code="OLD0001", created_by=user
+        )
+        task = apps.get_model("api", "Task").objects.create(
+            class_obj=class_obj, title="T", description="", created_by=user, dueDate=timezone.now()
+        )
+        for days_ago in (400, 40, 0):
+            moment = timezone.now() - timedelta(days=days_ago)
+            submission = apps.get_model("api", "Submission").objects.create(
+                task=task, user=user, document="https://example.com/doc"
+            )
+            apps.get_model("api", "Submission").objects.filter(pk=submission.pk).update(
+                submitted_at=moment
+            )
+            feedback = apps.get_model("api", "Feedback").objects.create(
+                submission=submission, user=user, content="ok"
+            )
+            apps.get_model("api", "Feedback").objects.filter(pk=feedback.pk).update(
+                created_at=moment
+            )
+        rows = self.rows(apps)
+
+        apps = self.migrate(self.partitioned)
+        self.assertEqual(self.rows(apps), rows)
+        for table in PARTITIONED_TABLES:
+            self.assertTrue(is_partitioned(table))
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT tableoid::regclass::text FROM {table}")
+                holders = [row[0] for row in cursor.fetchall()]
+            self.assertEqual(len(set(holders)), 3)
+            self.assertNotIn(f"{table}_default", holders)
+
+        apps = self.migrate(self.before)
+        self.assertEqual(self.rows(apps), rows)
+        self.assertFalse(any(is_partitioned(table) for table in PARTITIONED_TABLES))
+
+
+@skipUnless(connection.vendor == "postgresql", "needs partitioned tables")
+class ArchiveTests(ClassFixtureMixin, TestCase):
+    """Readers of archived months, against the same readers before archiving."""
+
+    def setUp(self):
+        super().setUp()
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        self.enterContext(
+            override_settings(PARTITIONING={**settings.PARTITIONING, "ARCHIVE_DIR": archive_dir})
+        )
+        # A month older than the test database's partitions: its rows sit in the default ones.
+        self.month = add_months(month_of(timezone.now()), -30)
+        moment = month_bounds(self.month)[0] + timedelta(days=3)
+        Class.objects.filter(pk=self.class_obj.pk).update(created_at=moment - timedelta(days=1))
+        Task.objects.filter(class_obj=self.class_obj).update(created_at=moment - timedelta(days=1))
+        self.class_obj.refresh_from_db()
+        Submission.objects.filter(task=self.tasks[0], user=self.members[0]).delete()
+        # Keyed with a UUIDv7 of that month, as it would have been when submitted.
+        key = uuid7_at(int(moment.timestamp() * 1000), uuid7().int)
+        self.old = Submission.objects.create(
+            id=key, task=self.tasks[0], user=self.members[0], document="https://example.com/doc"
+        )
+        Submission.objects.filter(pk=self.old.pk).update(submitted_at=moment)
+        feedback = Feedback.objects.create(submission=self.old, user=self.expert, content="ok")
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=moment)
+        Feedback.objects.create(submission=self.old, user=self.admin, content="still live")
+
+    def snapshot(self):
+        rebuild_class_stats(self.class_obj.pk)
+        return (
+            list(TaskStats.objects.order_by("task_id").values_list(
+                "task_id", "submission_count", "on_time_count", "late_count",
+                "feedback_count", "upvote_histogram",
+            )),
+            build_submission_matrix(self.class_obj).to_dict(),
+            list(chain.from_iterable(iter_row_chunks(self.class_obj))),
+        )
+
+    def archive(self):
+        count = Submission.objects.count()
+        for table in PARTITIONED_TABLES:
+            create_partition(table, self.month)
+            self.assertIn(self.month, monthly_partitions(table))
+        self.assertEqual(Submission.objects.count(), count)
+        for table in PARTITIONED_TABLES:
+            archive_partition(table, self.month)
+        cache.clear()  # the archive horizon is dropped on commit
+        self.assertFalse(Submission.objects.filter(pk=self.old.pk).exists())
+
+    def test_aggregates_include_archived_months(self):
+        before = self.snapshot()
+        self.archive()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_submission_endpoints_include_archived_months(self):
+        self.archive()
+        client = client_for(self.members[0])
+        listed = client.get(f"/api/tasks/{self.tasks[0].pk}/submissions/").json()
+        self.assertIn(str(self.old.pk), [submission["id"] for submission in listed])
+        self.assertEqual(client.get(f"/api/submissions/{self.old.pk}/").status_code, 200)
+
+    def test_archived_submissions_of_classes_being_deleted_are_hidden(self):
+        self.archive()
+        request_deletion(self.class_obj)
+        response = client_for(self.members[0]).get(f"/api/submissions/{self.old.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_stats_rebuilds_skip_archives_older_than_the_class(self):
+        self.archive()
+        Class.objects.filter(pk=self.class_obj.pk).update(created_at=timezone.now())
+        with mock.patch("api.partitioning.gzip.open") as open_archive:
+            rebuild_class_stats(self.class_obj.pk)
+        open_archive.assert_not_called()
+
+    def test_archived_rows_of_deleted_users_are_skipped(self):
+        self.archive()
+        request_deletion(self.members[0])
+        run_pending()  # the deletion job rebuilds the class stats at the end
+
+        stats = TaskStats.objects.get(task=self.tasks[0])
+        live = Submission.objects.filter(task=self.tasks[0])
+        self.assertEqual(stats.submission_count, live.count())
+        self.assertEqual(stats.feedback_count, Feedback.objects.filter(submission__in=live).count())
+        exported = chain.from_iterable(iter_row_chunks(self.class_obj))
+        self.assertNotIn(self.members[0].pk, [row[0] for row in exported])
+
+    def test_nested_submission_lists_are_live_only(self):
+        self.archive()
+        client = client_for(self.members[0])
+        task = client.get(f"/api/tasks/{self.tasks[0].pk}/").json()
+        self.assertNotIn(str(self.old.pk), [submission["id"] for submission in task["submissions"]])
+        self.assertEqual(len(task["submissions"]), len(self.members) - 1)
+
+
+# Handlers of the job queue tests.
+_job_calls = []
+_lock_times = []
+
+
+@job("tests.heartbeat")
+def _heartbeat_job(job_id):
+    for _ in range(3):
+        time.sleep(0.1)
+        _lock_times.append(Job.objects.get(pk=job_id).locked_at)
+
+
+@job("tests.record")
+def _record_job(label):
+    _job_calls.append(label)
+
+
+@job("tests.fail", max_attempts=3)
+def _failing_job():
+    raise RuntimeError("boom")
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    @override_settings(JOBS={**settings.JOBS, "HEARTBEAT_SECONDS": 0.02})
+    def test_running_jobs_renew_their_lock(self):
+        _lock_times.clear()
+        job_obj = enqueue("tests.heartbeat")
+        Job.objects.filter(pk=job_obj.pk).update(payload={"job_id": str(job_obj.pk)})
+        [claimed] = claim("worker", names=["tests.heartbeat"])
+
+        self.assertEqual(execute(claimed), "done")
+        self.assertLess(claimed.locked_at, _lock_times[0])
+        self.assertLess(_lock_times[0], _lock_times[-1])
+
+
+class JobQueueTests(TestCase):
+    names = ["tests.record", "tests.fail"]
+
+    def setUp(self):
+        _job_calls.clear()
+
+    def run_jobs(self):
+        return run_pending(names=self.names)
+
+    def make_due(self, job_obj):
+        Job.objects.filter(pk=job_obj.pk).update(run_at=timezone.now())
+
+    def test_highest_priority_runs_first_then_oldest(self):
+        now = timezone.now()
+        enqueue("tests.record", {"label": "low, newer"}, run_at=now - timedelta(minutes=1))
+        enqueue("tests.record", {"label": "high"}, priority=5, run_at=now)
+        enqueue("tests.record", {"label": "low, older"}, run_at=now - timedelta(minutes=2))
+
+        self.assertEqual(self.run_jobs(), 3)
+        self.assertEqual(_job_calls, ["high", "low, older", "low, newer"])
+
+    def test_jobs_wait_for_run_at(self):
+        job_obj = enqueue("tests.record", {"label": "later"}, delay=60)
+        self.assertEqual(self.run_jobs(), 0)
+        self.make_due(job_obj)
+        self.assertEqual(self.run_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=job_obj.pk).status, Job.STATUS_DONE)
+
+    def test_failures_back_off_until_max_attempts(self):
+        job_obj = enqueue("tests.fail")
+        for attempt in (1, 2):
+            with self.assertLogs("api.jobs", "WARNING"):
+                self.assertEqual(self.run_jobs(), 1)
+            job_obj.refresh_from_db()
+            self.assertEqual((job_obj.status, job_obj.attempts), (Job.STATUS_QUEUED, attempt))
+            backoff = settings.JOBS["BACKOFF_SECONDS"] * 2 ** (attempt - 1)
+            delay = (job_obj.run_at - timezone.now()).total_seconds()
+            self.assertTrue(0.8 * backoff - 1 < delay <= 1.2 * backoff, delay)
+            self.assertEqual(self.run_jobs(), 0)  # not due yet
+            self.make_due(job_obj)
+
+        with self.assertLogs("api.jobs", "WARNING"):
+            self.assertEqual(self.run_jobs(), 1)
+        job_obj.refresh_from_db()
+        self.assertEqual((job_obj.status, job_obj.attempts), (Job.STATUS_FAILED, 3))
+        self.assertIn("RuntimeError: boom", job_obj.last_error)
+        self.assertIsNotNone(job_obj.finished_at)
+
+    def test_jobs_of_dead_workers_are_requeued(self):
+        stale = enqueue("tests.record", {"label": "stale"})
+        live = enqueue("tests.record", {"label": "live"})
+        self.assertEqual(len(claim("worker", names=self.names, limit=2)), 2)
+        timeout = settings.JOBS["VISIBILITY_TIMEOUT_SECONDS"]
+        Job.objects.filter(pk=stale.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=timeout + 1)
+        )
+
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, Job.STATUS_QUEUED)
+        self.assertEqual(Job.objects.get(pk=live.pk).status, Job.STATUS_RUNNING)
+        self.assertEqual(self.run_jobs(), 1)
+        self.assertEqual(_job_calls, ["stale"])
+
+    def test_only_the_worker_holding_the_lock_renews_it_and_records_the_outcome(self):
+        job_obj = enqueue("tests.record", {"label": "slow"})
+        [first] = claim("first", names=self.names)
+        timeout = settings.JOBS["VISIBILITY_TIMEOUT_SECONDS"]
+        Job.objects.filter(pk=job_obj.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=timeout + 1)
+        )
+        self.assertTrue(renew_lock(first))
+        self.assertEqual(requeue_stale(), 0)
+
+        # The first worker stalls past the timeout; a second one takes the job over.
+        Job.objects.filter(pk=job_obj.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=timeout + 1)
+        )
+        self.assertEqual(requeue_stale(), 1)
+        [second] = claim("second", names=self.names)
+        self.assertFalse(renew_lock(first))
+        with self.assertLogs("api.jobs", "WARNING"):
+            self.assertEqual(execute(first), "lost")
+        job_obj.refresh_from_db()
+        self.assertEqual((job_obj.status, job_obj.locked_by), (Job.STATUS_RUNNING, "second"))
+
+        self.assertEqual(execute(second), "done")
+        self.assertEqual(Job.objects.get(pk=job_obj.pk).status, Job.STATUS_DONE)
+        self.assertEqual(_job_calls, ["slow", "slow"])
+
+    def test_conditional_update_claims_a_job_once(self):
+        """Without row locks, a worker that loses the race between SELECT and UPDATE gets nothing."""
+        job_obj = enqueue("tests.record", {"label": "contested"})
+        update = QuerySet.update
+        rival = {}
+
+        def update_after_rival(queryset, **fields):
+            if not rival:
+                rival["claimed"] = None
+                rival["claimed"] = claim("rival", names=self.names)
+            return update(queryset, **fields)
+
+        with (
+            mock.patch.object(connection.features, "has_select_for_update_skip_locked", False),
+            mock.patch.object(QuerySet, "update", update_after_rival),
+        ):
+            claimed = claim("worker", names=self.names)
+
+        self.assertEqual(claimed, [])
+        self.assertEqual(rival["claimed"], [job_obj])
+        self.assertEqual(Job.objects.get(pk=job_obj.pk).locked_by, "rival")
@@ -0,0 +1,267 @@
+"""
+Token-bucket rate limiting for the expensive write endpoints.
+
+Login verifies a Firebase token over the network, and join / submit write to
+the database. Each of them gets a scope in `settings.THROTTLES["BUCKETS"]`
+with a per-user and / or per-IP bucket:
+
+    "submit": {"user": {"RATE": "30/min", "BURST": 10}, ...}
+
+A bucket holds BURST tokens and refills at RATE; a request takes one token
+from every bucket of its scope and is answered 429 (with Retry-After) when one
+is empty. Buckets live in a shared store (THROTTLES["STORE"]):
+
+- "local": exact token buckets in process memory, behind a lock. Right for a
+  single process (tests, runserver) only; the default under DEBUG.
+- "cache": a Django cache shared by all workers (Redis, see CACHES), the
+  default otherwise; a system check warns when that cache is per process. Caches have no
+  compare-and-set, so the bucket is approximated by a sliding window of
+  BURST / RATE seconds counted with atomic `incr` (same steady rate and burst
+  as the token bucket). A client over its limit is rejected after one
+  `get_many`, without writing.
+
+Rejection has to be cheap, so the DRF views mix in `ThrottleFirstMixin`:
+throttles run before authentication, and the user bucket is keyed by the
+user id claim of the (signature-checked) JWT instead of a database lookup.
+"""
+
+# ================== Standard Library ==================
+import threading
+import time
+
+# ================== Django ============================
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+# ================== DRF ===============================
+from rest_framework.throttling import BaseThrottle
+
+# ================== Third-Party =======================
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+# ================== Local / App Imports =================
+from .metrics import THROTTLED_REQUESTS
+
+STORES = {
+    "local": "api.throttling.LocalBucketStore",
+    "cache": "api.throttling.CacheBucketStore",
+}
+RATE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Cache backends whose data each process keeps to itself.
+PER_PROCESS_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+_jwt_auth = JWTAuthentication()
+_store = None
+_store_lock = threading.Lock()
+
+
+def _throttle_setting(name):
+    return settings.THROTTLES[name]
+
+
+def parse_rate(rate):
+    """'30/min' -> tokens per second (0.5). Periods as in DRF: s, m, h, d."""
+    count, period = rate.split("/")
+    return int(count) / RATE_PERIODS[period[0]]
+
+
+# ================== STORES ==================
+class LocalBucketStore:
+    """Exact token buckets in process memory."""
+
+    # Above this many buckets, full (idle) ones are dropped on the next write.
+    MAX_BUCKETS = 100_000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, burst, rate):
+        """Takes a token. Returns 0 when allowed, else the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+                if len(self._buckets) >= self.MAX_BUCKETS and key not in self._buckets:
+                    self._prune(now)
+            # The third item is when the bucket is full again, i.e. can be forgotten.
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+    def _prune(self, now):
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+        }
+
+
+class CacheBucketStore:
+    """Sliding-window buckets in a Django cache, shared by every worker."""
+
+    def __init__(self):
+        self.cache = caches[_throttle_setting("CACHE_ALIAS")]
+
+    def consume(self, key, burst, rate):
+        """Takes a token. Returns 0 when allowed, else the seconds until one is available."""
+        window = burst / rate
+        now = time.time()
+        index, offset = divmod(now, window)
+        current_key = f"throttle:{key}:{int(index)}"
+        previous_key = f"throttle:{key}:{int(index) - 1}"
+        counts = self.cache.get_many([previous_key, current_key])
+        previous = counts.get(previous_key, 0)
+        # The previous window still counts for the part of it inside the sliding window.
+        carried = previous * (1 - offset / window)
+
+        current = counts.get(current_key, 0)
+        if carried + current < burst:
+            # add() is a no-op if another worker created the counter meanwhile.
+            self.cache.add(current_key, 0, timeout=int(2 * window) + 1)
+            try:
+                current = self.cache.incr(current_key)
+            except ValueError:
+                # Expired between add() and incr(): start the window again.
+                self.cache.set(current_key, 1, timeout=int(2 * window) + 1)
+                current = 1
+            if carried + current <= burst:
+                return 0
+
+        excess = carried + current - burst + 1
+        until_next_window = window - offset
+        if previous:
+            return min(excess * window / previous, until_next_window)
+        return until_next_window
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(STORES[_throttle_setting("STORE")])()
+    return _store
+
+
+@register(Tags.caches)
+def check_shared_store(app_configs, **kwargs):
+    """Outside DEBUG, every worker process has to count against the same buckets."""
+    if settings.DEBUG:
+        return []
+    if _throttle_setting("STORE") == "local":
+        return [
+            Warning(
+                "THROTTLES['STORE'] is 'local': each worker process has its own buckets.",
+                hint="Use the 'cache' store with a shared cache (set REDIS_URL).",
+                id="api.W001",
+            )
+        ]
+    alias = _throttle_setting("CACHE_ALIAS")
+    if settings.CACHES[alias]["BACKEND"] in PER_PROCESS_CACHES:
+        return [
+            Warning(
+                f"The throttle cache '{alias}' is not shared between worker processes.",
+                hint="Set REDIS_URL, or point THROTTLES['CACHE_ALIAS'] at a shared cache.",
+                id="api.W002",
+            )
+        ]
+    return []
+
+
+# ================== RATE LIMITS ==================
+def _token_user_id(request):
+    """The user id claim of a valid bearer token, without a database lookup."""
+    header = _jwt_auth.get_header(request)
+    raw_token = _jwt_auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return _jwt_auth.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def check_rate_limit(scope, request):
+    """
+    Takes a token from each bucket of `scope` for this request. Returns 0 when
+    allowed, else the seconds to wait. Works on DRF and plain Django requests.
+    """
+    buckets = _throttle_setting("BUCKETS").get(scope)
+    if not buckets:
+        return 0
+    idents = {}
+    if "user" in buckets:
+        user_id = _token_user_id(request)
+        if user_id is not None:
+            idents["user"] = user_id
+    if "ip" in buckets:
+        idents["ip"] = BaseThrottle().get_ident(request)
+
+    store = get_store()
+    for kind, ident in idents.items():
+        bucket = buckets[kind]
+        wait = store.consume(
+            f"{scope}:{kind}:{ident}", bucket["BURST"], parse_rate(bucket["RATE"])
+        )
+        if wait:
+            THROTTLED_REQUESTS.labels(scope, kind).inc()
+            return wait
+    return 0
+
+
+async def acheck_rate_limit(scope, request):
+    """check_rate_limit for async views: the cache store's network I/O runs in a thread."""
+    if isinstance(get_store(), LocalBucketStore) or not _throttle_setting("BUCKETS").get(scope):
+        return check_rate_limit(scope, request)
+    return await sync_to_async(check_rate_limit, thread_sensitive=False)(scope, request)
+
+
+# ================== DRF ==================
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over the buckets of `scope` in settings.THROTTLES."""
+
+    scope = None
+
+    def allow_request(self, request, view):
+        self._wait = check_rate_limit(self.scope, request)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scope = "login"
+
+
+class JoinClassThrottle(TokenBucketThrottle):
+    scope = "join"
+
+
+class SubmitThrottle(TokenBucketThrottle):
+    scope = "submit"
+
+
+class ThrottleFirstMixin:
+    """
+    Runs the view's throttles before authentication and permission checks,
+    so throttled requests cost no database query.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        self._throttles_checked = True
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        if not getattr(self, "_throttles_checked", False):
+            super().check_throttles(request)
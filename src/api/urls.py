@@ -10,13 +10,19 @@ from rest_framework.routers import DefaultRouter
 # ================== Third-Party =======================
 from rest_framework_nested import routers 
 # ================== Local / App Imports =================
+from . import async_views
 from .views import (
     # You no longer need ClassListCreateView or ClassRetrieveUpdateDestroyView
 
     ClassViewSet,
+    DatabaseHealthView,
+    DeletionJobView,
     FirebaseLoginView,
     LogoutView,
+    PendingTasksView,
+    ProfilingConfigView,
     SubmissionViewSet,
+    SyncView,
     UserByEmailView,
     UserProfileView,
     UserViewSet,
@@ -41,4 +47,18 @@ path("api/", include(class_router.urls)),
     path("api/login/", FirebaseLoginView.as_view(), name="login"),
     path("api/logout/", LogoutView.as_view(), name="logout"),
     path("api/me/", UserProfileView.as_view(), name="user-profile"),
+    path("api/me/pending-tasks/", PendingTasksView.as_view(), name="pending-tasks"),
+    path("api/health/db/", DatabaseHealthView.as_view(), name="health-db"),
+    path("api/deletion-jobs/<uuid:pk>/", DeletionJobView.as_view(), name="deletion-job"),
+    path("api/sync/", SyncView.as_view(), name="sync"),
+    path("api/profiling/config/", ProfilingConfigView.as_view(), name="profiling-config"),
+    # Native async counterparts (served on the event loop under ASGI)
+    path("api/async/login/", async_views.login_view, name="async-login"),
+    path("api/async/me/", async_views.profile_view, name="async-user-profile"),
+    path("api/async/class/", async_views.class_list_view, name="async-class-list"),
+    path("api/async/class/<str:class_code>/", async_views.class_detail_view, name="async-class-detail"),
+    path("api/async/class/<str:class_code>/tasks/", async_views.class_tasks_view, name="async-class-tasks"),
+    path("api/async/tasks/<uuid:pk>/", async_views.task_detail_view, name="async-task-detail"),
+    path("api/class/<str:class_code>/events/", async_views.class_events_view, name="class-events"),
+    path("api/batch/", async_views.batch_view, name="batch"),
 ]
\ No newline at end of file
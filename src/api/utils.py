@@ -1,6 +1,9 @@
 
+from django.core.cache import cache
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .models import Class
+
 def generate_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
     
@@ -10,4 +13,60 @@ def generate_tokens_for_user(user):
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
-    }
\ No newline at end of file
+    }
+
+
+PENDING_TASKS_GENERATION_KEY = "pending-tasks-gen:{user_id}"
+
+
+def pending_tasks_cache_generation(user_id):
+    return cache.get(PENDING_TASKS_GENERATION_KEY.format(user_id=user_id), 0)
+
+
+def invalidate_pending_tasks(user_id):
+    """
+    Drops every cached page of the user's pending tasks by bumping the
+    generation that is part of their cache keys.
+    """
+    key = PENDING_TASKS_GENERATION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def request_cache(request):
+    """
+    A dict memoizing lookups for the duration of one request (DRF or Django
+    request). The sub-requests of a batch (api.batch) share their parent's.
+    """
+    request = getattr(request, "_request", request)
+    try:
+        return request._request_cache
+    except AttributeError:
+        request._request_cache = {}
+        return request._request_cache
+
+
+def class_ids_subquery(user):
+    """
+    The ids of the classes `user` has any role in, as a subquery for
+    `class_obj_id__in=...`: the membership check runs in the database.
+    """
+    return (
+        Class.members.through.objects.filter(user=user).values("class_id")
+        .union(
+            Class.experts.through.objects.filter(user=user).values("class_id"),
+            Class.admins.through.objects.filter(user=user).values("class_id"),
+        )
+    )
+
+
+def user_class_ids(request):
+    """Ids of the classes the request's user has any role in, loaded once per request."""
+    user = request.user
+    key = ("class_ids", user.pk)
+    cached = request_cache(request)
+    if key not in cached:
+        cached[key] = frozenset(row["class_id"] for row in class_ids_subquery(user))
+    return cached[key]
@@ -5,49 +5,86 @@ import string
 from django.conf import settings
 
 # ================== Django ============================
+from django.core.cache import cache
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
 # ================== DRF-Spectacular ===================
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from firebase_admin import auth
 
 # ================== DRF ===============================
-from rest_framework import status, viewsets, mixins
+from rest_framework import generics, status, viewsets, mixins
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.filters import SearchFilter
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 # ================== Third-Party =======================
 from rest_framework_simplejwt.views import TokenRefreshView
-from api.utils import generate_tokens_for_user
+from api import events
+from api.db_pool import check_database, get_pool_stats
+from api.deletion import request_deletion
+from api.job_handlers import schedule_task_deadline
+from api.metrics import record_cache_lookup
+from api.partitioning import get_archived, has_archived, iter_archived
+from api.firebase_auth import verify_firebase_token
+from api.profiling import get_sampling_config, set_sampling_config
+from api.sync import CursorExpired, changes_for, parse_cursor
+from api.utils import (
+    class_ids_subquery,
+    generate_tokens_for_user,
+    invalidate_pending_tasks,
+    pending_tasks_cache_generation,
+    user_class_ids,
+)
 
 # ================== Local / App Imports =================
-from .models import Class, Submission, User, Task
+from .models import Class, DeletionJob, Submission, User, Task, TaskStats
 from .serializers import (
+    BulkRoleChangeSerializer,
     ClassCreateSerializer,
     ClassDetailSerializer,
+    DeletionJobSerializer,
+    PendingTaskSerializer,
+    ProfilingConfigSerializer,
     SubmissionSerializer,
+    SyncClassSerializer,
+    SyncSubmissionSerializer,
+    SyncTaskSerializer,
     UserSerializer,
     TaskSerializer,
 )
 from .permissions import (
-    IsClassMember,
+    IsClassInstructor,
     IsTaskCreatorOrClassExpert,
     IsSubmissionOwner,
 )  # Import custom permissions
+from .export import (
+    CSVExportRenderer,
+    NDJSONExportRenderer,
+    iter_csv,
+    iter_ndjson_gzip,
+    iter_row_chunks,
+)
+from .pagination import DueDateCursorPagination
+from .roles import RoleChangeError, apply_role_changes, current_roles
+from .streaming import StreamingListMixin, streaming_response
+from .submission_matrix import SubmissionMatrixBinaryRenderer, build_submission_matrix
+from .throttling import JoinClassThrottle, LoginThrottle, SubmitThrottle, ThrottleFirstMixin
 
 
 #! ==================== AUTH MODEL VIEWS ====================
-class FirebaseLoginView(APIView):
+class FirebaseLoginView(ThrottleFirstMixin, APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginThrottle]
 
     def post(self, request):
         firebase_token = request.data.get("token")
-        print("ALL DATA:", request.data)
 
         if not firebase_token:
             return Response(
@@ -57,7 +94,7 @@ class FirebaseLoginView(APIView):
 
         try:
             # Verify the token with Firebase
-            decoded_token = auth.verify_id_token(firebase_token)
+            decoded_token = verify_firebase_token(firebase_token)
             firebase_uid = decoded_token["uid"]
             email = decoded_token.get("email")
             username = decoded_token.get("name", email)  # Use name, fallback to email
@@ -176,6 +213,56 @@ class CookieTokenRefreshView(TokenRefreshView):
             )
 
 
+#! ==================== HEALTH VIEWS ====================
+@extend_schema(tags=["Health"])
+class DatabaseHealthView(APIView):
+    """
+    GET /api/health/db/ - Database health probe plus this worker's pool statistics
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Database health and connection pool statistics",
+        description="Runs `SELECT 1` and returns its latency together with the connection pool statistics of the worker that served the request.",
+    )
+    def get(self, request):
+        health = check_database()
+        data = {**health, "pool": get_pool_stats()}
+        http_status = (
+            status.HTTP_200_OK if health["ok"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        return Response(data, status=http_status)
+
+
+@extend_schema(tags=["Health"])
+class ProfilingConfigView(APIView):
+    """
+    GET   /api/profiling/config/ - Current sampling rates of the request profiler
+    PATCH /api/profiling/config/ - Change the default and/or per-route sampling rates
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Get request profiler sampling rates",
+        responses=ProfilingConfigSerializer,
+    )
+    def get(self, request):
+        return Response(get_sampling_config())
+
+    @extend_schema(
+        summary="Update request profiler sampling rates",
+        description="A rate N profiles 1 in N requests, 0 disables profiling. `route_rates` is keyed by URL name and merged into the current rates.",
+        request=ProfilingConfigSerializer,
+        responses=ProfilingConfigSerializer,
+    )
+    def patch(self, request):
+        serializer = ProfilingConfigSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(set_sampling_config(**serializer.validated_data))
+
+
 #! ==================== USER MODEL VIEWS ====================
 @extend_schema(tags=["Authentication"])
 class UserProfileView(APIView):
@@ -192,20 +279,77 @@ class UserProfileView(APIView):
         return Response(serializer.data)
 
 
+@extend_schema(tags=["Authentication"])
+class PendingTasksView(generics.ListAPIView):
+    """
+    GET /api/me/pending-tasks/ - Open tasks across all of the user's classes
+    that the user has not submitted yet, soonest due first (cursor-paginated).
+
+    One query: tasks due from now on, whose class has the user in any role,
+    anti-joined (NOT EXISTS) against the user's submissions. Pages are cached
+    per user for PENDING_TASKS_CACHE_SECONDS; the user's own submit / join /
+    leave / role changes invalidate them immediately.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = PendingTaskSerializer
+    pagination_class = DueDateCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        return (
+            Task.objects.filter(
+                class_obj_id__in=class_ids_subquery(user),
+                class_obj__deletion_requested_at__isnull=True,
+                dueDate__gte=timezone.now(),
+            )
+            .filter(
+                ~Exists(
+                    # Bounding submitted_at lets Postgres prune the submission partitions.
+                    Submission.objects.filter(
+                        task=OuterRef("pk"), user=user, submitted_at__gte=OuterRef("created_at")
+                    )
+                )
+            )
+            .select_related("class_obj")
+        )
+
+    @extend_schema(summary="List the current user's pending tasks")
+    def list(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        cache_key = (
+            f"pending-tasks:{user_id}:{pending_tasks_cache_generation(user_id)}:"
+            f"{request.GET.urlencode()}"
+        )
+        data = cache.get(cache_key)
+        record_cache_lookup("pending_tasks", data is not None)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, timeout=settings.PENDING_TASKS_CACHE_SECONDS)
+        return Response(data)
+
+
 @extend_schema(tags=["Users (by ID)"])
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """
     Automatic CRUD by ID:
     GET    /api/users/          - List all
+    GET    /api/users/?stream=1 - List all, streamed as a chunked JSON array
     POST   /api/users/          - Create
     GET    /api/users/{id}/     - Retrieve by ID
     PATCH  /api/users/{id}/     - Partial update by ID
     PUT    /api/users/{id}/     - Full update by ID
-    DELETE /api/users/{id}/     - Delete by ID
+    DELETE /api/users/{id}/     - Delete by ID (in the background)
     """
 
-    queryset = User.objects.all()
+    # UserSerializer nests submissions with `user` as a plain pk: nothing more to prefetch.
+    queryset = User.objects.filter(deletion_requested_at__isnull=True).prefetch_related(
+        "submissions"
+    )
     serializer_class = UserSerializer
+    # ?search= matches usernames (case-insensitive substring).
+    filter_backends = [SearchFilter]
+    search_fields = ["username"]
 
     @extend_schema(
         summary="List and search all users",
@@ -216,7 +360,13 @@ class UserViewSet(viewsets.ModelViewSet):
                 description="Search term for username",
                 required=False,
                 type=str,
-            )
+            ),
+            OpenApiParameter(
+                name="stream",
+                description="Set to 1 to stream the list as a chunked JSON array",
+                required=False,
+                type=bool,
+            ),
         ],
     )
     def list(self, request, *args, **kwargs):
@@ -255,14 +405,14 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Delete a user by ID",
-        description="Permanently delete a specific user by their ID.",
+        description=(
+            "Deactivates the user at once and deletes them with everything they own in the "
+            "background. Returns the deletion job; poll /api/deletion-jobs/{id}/ for progress."
+        ),
     )
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.delete()
-        return Response(
-            {"message": "User deleted successfully"}, status=status.HTTP_204_NO_CONTENT
-        )
+        return deletion_accepted_response(request_deletion(instance), "User")
 
 
 @extend_schema(tags=["Users (by Email)"])
@@ -271,7 +421,7 @@ class UserByEmailView(APIView):
     GET    /api/users/email/{email}/  - Retrieve by email
     PATCH  /api/users/email/{email}/  - Partial update by email
     PUT    /api/users/email/{email}/  - Full update by email
-    DELETE /api/users/email/{email}/  - Delete by email
+    DELETE /api/users/email/{email}/  - Delete by email (in the background)
     """
 
     #! add permissions later for faster development
@@ -281,7 +431,7 @@ class UserByEmailView(APIView):
         description="Get the details of a specific user by their email address.",
     )
     def get(self, request, email):
-        user = get_object_or_404(User, email=email)
+        user = get_object_or_404(User, email=email, deletion_requested_at__isnull=True)
         serializer = UserSerializer(user)
         return Response(serializer.data)
 
@@ -290,7 +440,7 @@ class UserByEmailView(APIView):
         description="Partially update one or more fields of a specific user by their email address.",
     )
     def patch(self, request, email):
-        user = get_object_or_404(User, email=email)
+        user = get_object_or_404(User, email=email, deletion_requested_at__isnull=True)
         serializer = UserSerializer(user, data=request.data, partial=True)
         return self._validate_and_save_serializer(serializer)
 
@@ -299,7 +449,7 @@ class UserByEmailView(APIView):
         description="Fully update all fields of a specific user by their email address.",
     )
     def put(self, request, email):
-        user = get_object_or_404(User, email=email)
+        user = get_object_or_404(User, email=email, deletion_requested_at__isnull=True)
         serializer = UserSerializer(user, data=request.data)
         return self._validate_and_save_serializer(serializer)
 
@@ -310,20 +460,102 @@ class UserByEmailView(APIView):
 
     @extend_schema(
         summary="Delete a user by email",
-        description="Permanently delete a specific user by their email address.",
+        description=(
+            "Deactivates the user at once and deletes them with everything they own in the "
+            "background. Returns the deletion job; poll /api/deletion-jobs/{id}/ for progress."
+        ),
     )
     def delete(self, request, email):
-        user = get_object_or_404(User, email=email)
-        user.delete()
+        user = get_object_or_404(User, email=email, deletion_requested_at__isnull=True)
+        return deletion_accepted_response(request_deletion(user), "User")
+
+
+#! ==================== DELETION JOB VIEWS ====================
+def deletion_accepted_response(job, label):
+    return Response(
+        {
+            "message": f"{label} scheduled for deletion",
+            "deletion_job": DeletionJobSerializer(job).data,
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+class DeletionJobView(generics.RetrieveAPIView):
+    """
+    GET /api/deletion-jobs/{id}/ - (Staff) Progress of a background deletion
+    """
+
+    queryset = DeletionJob.objects.all()
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAdminUser]
+
+
+#! ==================== SYNC VIEWS ====================
+@extend_schema(tags=["Sync"])
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<cursor> - Classes, tasks and submissions of the user's
+    classes created, updated or deleted after the cursor (everything without one)
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Delta sync of the user's classes",
+        description=(
+            "Without `since`, a full snapshot. With it, only the rows changed after that "
+            "cursor plus tombstones (`deleted`). Classes missing from `class_ids` were "
+            "deleted or left. Continue with the returned `cursor`; while `has_more` is "
+            "true, call again right away. 410 means the cursor expired: sync from scratch."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description="Cursor returned by the previous sync",
+                required=False,
+                type=str,
+            ),
+        ],
+    )
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = parse_cursor(since)
+            except ValueError:
+                return Response(
+                    {"detail": "since must be a cursor returned by this endpoint."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            changes = changes_for(request.user, since)
+        except CursorExpired:
+            return Response(
+                {"detail": "The cursor has expired; sync again without since.", "resync": True},
+                status=status.HTTP_410_GONE,
+            )
+        classes = changes["classes"].prefetch_related("members", "experts", "admins")
         return Response(
-            {"message": "User deleted successfully"}, status=status.HTTP_204_NO_CONTENT
+            {
+                "cursor": str(changes["cursor"]),
+                "has_more": changes["has_more"],
+                "class_ids": sorted(str(pk) for pk in changes["class_ids"]),
+                "classes": SyncClassSerializer(classes, many=True).data,
+                "tasks": SyncTaskSerializer(changes["tasks"], many=True).data,
+                "submissions": SyncSubmissionSerializer(changes["submissions"], many=True).data,
+                "deleted": {
+                    model: [str(pk) for pk in pks] for model, pks in changes["deleted"].items()
+                },
+            }
         )
 
 
 #! ==================== CLASS MODEL VIEWS ====================
 
 
-class ClassViewSet(viewsets.ModelViewSet):
+class ClassViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """
     Automatic CRUD by Class Code:
     GET    /api/class/                - List all classes of a user
@@ -331,15 +563,20 @@ class ClassViewSet(viewsets.ModelViewSet):
     GET    /api/class/{class_code}/   - Retrieve a class by its code
     PATCH  /api/class/{class_code}/   - Partially update a class by its code
     PUT    /api/class/{class_code}/   - Fully update a class by its code
-    DELETE /api/class/{class_code}/   - Delete a class by its code
+    DELETE /api/class/{class_code}/   - Delete a class by its code (in the background)
 
     Custom Actions:
     POST   /api/class/{class_code}/join/        - Join a class
     POST   /api/class/{class_code}/leave/       - Leave a class
     PATCH  /api/class/{class_code}/change_role/ - (Admin) Change a user's role in the class
+    PATCH  /api/class/{class_code}/roles/       - (Admin) Bulk role changes, additions and removals
+    GET    /api/class/{class_code}/stats/       - (Admin/Expert) Per-task analytics
+    GET    /api/class/{class_code}/submission-matrix/ - (Admin/Expert) Users x tasks grid
+    GET    /api/class/{class_code}/export/      - (Admin/Expert) Streamed gradebook (CSV / NDJSON)
     """
 
-    queryset = Class.objects.all()
+    # Classes being deleted in the background are gone as far as the API is concerned.
+    queryset = Class.objects.filter(deletion_requested_at__isnull=True)
     # permission_classes = [IsAuthenticated,IsCreatorOrAdminOrReadOnly]
     lookup_field = "class_code"
 
@@ -347,12 +584,19 @@ class ClassViewSet(viewsets.ModelViewSet):
         """
         Overrides the default queryset.
         - For the 'list' action, it returns only classes the user is a part of.
-        - For all other actions, it uses the default queryset (Class.objects.all()),
+        - For all other actions, it uses the default queryset (every class not being deleted),
           allowing actions like 'join' to find any class.
         """
         # Get the original queryset
         queryset = super().get_queryset()
 
+        # list/retrieve render ClassDetailSerializer, which walks every role and
+        # every task with its submissions; load them up front instead of per row.
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.select_related("created_by").prefetch_related(
+                "members", "experts", "admins", "tasks__submissions"
+            )
+
         # If the action is to list classes, filter it by the current user.
         if self.action == "list":
             user = self.request.user
@@ -372,10 +616,8 @@ class ClassViewSet(viewsets.ModelViewSet):
 
     # ================== HELPER METHODS ==================
     def _is_user_in_class(self, user, class_obj):
-        is_member = class_obj.members.filter(pk=user.pk).exists()
-        is_expert = class_obj.experts.filter(pk=user.pk).exists()
-        is_admin = class_obj.admins.filter(pk=user.pk).exists()
-        return is_member or is_expert or is_admin
+        # One UNION query over the three rosters.
+        return user.pk in current_roles(class_obj, [user.pk])
 
     def _remove_user_from_all_roles(self, user, class_obj):
         class_obj.members.remove(user)
@@ -399,9 +641,18 @@ class ClassViewSet(viewsets.ModelViewSet):
         )
         class_instance.admins.add(self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        class_obj = self.get_object()
+        return deletion_accepted_response(request_deletion(class_obj), "Class")
+
     # ================== CUSTOM ACTIONS ==================
 
-    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[JoinClassThrottle],
+    )
     def join(self, request, class_code=None):
         class_obj = self.get_object()
         user = request.user
@@ -413,6 +664,10 @@ class ClassViewSet(viewsets.ModelViewSet):
             )
 
         class_obj.members.add(user)
+        invalidate_pending_tasks(user.pk)
+        events.publish_class_event(
+            class_obj.pk, events.ROLE_CHANGED, {"user_id": str(user.pk), "role": "member"}
+        )
         return Response(
             {"detail": "You have successfully joined the class."},
             status=status.HTTP_200_OK,
@@ -430,6 +685,10 @@ class ClassViewSet(viewsets.ModelViewSet):
             )
 
         self._remove_user_from_all_roles(user, class_obj)
+        invalidate_pending_tasks(user.pk)
+        events.publish_class_event(
+            class_obj.pk, events.ROLE_CHANGED, {"user_id": str(user.pk), "role": None}
+        )
         return Response(
             {"detail": "You have successfully left the class."},
             status=status.HTTP_200_OK,
@@ -485,6 +744,12 @@ class ClassViewSet(viewsets.ModelViewSet):
             class_obj.experts.add(target_user)
         elif new_role == "admin":
             class_obj.admins.add(target_user)
+        invalidate_pending_tasks(target_user.pk)
+        events.publish_class_event(
+            class_obj.pk,
+            events.ROLE_CHANGED,
+            {"user_id": str(target_user.pk), "role": new_role},
+        )
 
         return Response(
             {
@@ -493,11 +758,152 @@ class ClassViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(detail=True, methods=["patch"], permission_classes=[IsAuthenticated])
+    def roles(self, request, class_code=None):
+        """
+        Applies many role operations at once, all or nothing:
+        {"changes": [{"user_id": "<uuid>", "role": "expert"}, ...],
+         "add": [{"user_id": "<uuid>", "role": "member"}, ...],
+         "remove": ["<uuid>", ...]}
+        The users are validated in one query and the through tables written
+        set-wise in one transaction (see api.roles).
+        """
+        class_obj = self.get_object()
+        if not class_obj.admins.filter(pk=request.user.pk).exists():
+            return Response(
+                {"detail": "You do not have permission to change roles."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = BulkRoleChangeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            affected = apply_role_changes(
+                class_obj,
+                changes=[(item["user_id"], item["role"]) for item in data["changes"]],
+                add=[(item["user_id"], item["role"]) for item in data["add"]],
+                remove=data["remove"],
+            )
+        except RoleChangeError as e:
+            return Response(
+                {"detail": e.detail, "errors": e.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"roles": {str(user_id): role for user_id, role in affected.items()}},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[IsAuthenticated, IsClassInstructor],
+    )
+    def stats(self, request, class_code=None):
+        """
+        Per-task submission rate, on-time vs. late counts, upvotes and feedback
+        volume. Reads the incrementally maintained TaskStats rows, one per
+        task, so the cost does not depend on how many submissions exist.
+        """
+        class_obj = self.get_object()
+        roster_size = sum(
+            role.through.objects.filter(class_id=class_obj.pk).count()
+            for role in (Class.members, Class.experts, Class.admins)
+        )
+        tasks = Task.objects.filter(class_obj=class_obj).select_related("stats").order_by(
+            "dueDate"
+        )
+
+        rows = []
+        for task in tasks:
+            try:
+                stats = task.stats
+            except TaskStats.DoesNotExist:
+                # Not built yet (e.g. data loaded in bulk); run rebuild_class_stats.
+                stats = TaskStats(task=task, class_obj=class_obj)
+            rows.append(
+                {
+                    "task_id": task.pk,
+                    "title": task.title,
+                    "dueDate": task.dueDate,
+                    "submission_count": stats.submission_count,
+                    "submission_rate": (
+                        round(stats.submission_count / roster_size, 4) if roster_size else 0
+                    ),
+                    "on_time_count": stats.on_time_count,
+                    "late_count": stats.late_count,
+                    "user_upvote_count": stats.user_upvote_count,
+                    "expert_upvote_count": stats.expert_upvote_count,
+                    "upvote_histogram": stats.upvote_histogram,
+                    "feedback_count": stats.feedback_count,
+                }
+            )
+
+        return Response(
+            {
+                "class_code": class_obj.class_code,
+                "roster_size": roster_size,
+                "tasks": rows,
+            }
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="submission-matrix",
+        permission_classes=[IsAuthenticated, IsClassInstructor],
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            SubmissionMatrixBinaryRenderer,
+        ],
+    )
+    def submission_matrix(self, request, class_code=None):
+        """
+        Whether each roster user submitted each task, and the upvotes they got,
+        as ID arrays plus a packed bitset (see api.submission_matrix for the
+        layout). ?format=bin returns the same matrix as a binary blob.
+        """
+        class_obj = self.get_object()
+        matrix = build_submission_matrix(class_obj)
+        if request.accepted_renderer.format == SubmissionMatrixBinaryRenderer.format:
+            return Response(matrix.to_bytes())
+        return Response({"class_code": class_obj.class_code, **matrix.to_dict()})
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[IsAuthenticated, IsClassInstructor],
+        renderer_classes=[CSVExportRenderer, NDJSONExportRenderer],
+    )
+    def export(self, request, class_code=None):
+        """
+        The roster with each user's submission status and upvote counts per
+        task, streamed as CSV or, with ?format=ndjson, gzipped NDJSON (see
+        api.export). Memory and time to first byte do not grow with the class.
+        """
+        class_obj = self.get_object()
+        rows = iter_row_chunks(class_obj)
+        if request.accepted_renderer.format == NDJSONExportRenderer.format:
+            response = streaming_response(
+                request, iter_ndjson_gzip(rows), content_type="application/gzip"
+            )
+            filename = f"{class_obj.class_code}-gradebook.ndjson.gz"
+        else:
+            response = streaming_response(
+                request, iter_csv(rows), content_type="text/csv; charset=utf-8"
+            )
+            filename = f"{class_obj.class_code}-gradebook.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Streamed"] = "true"
+        return response
+
 
 #! ==================== TASK MODEL VIEWS ====================
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """
     Provides CRUD functionality for Tasks.
     - Create: POST /api/tasks/
@@ -512,20 +918,61 @@ class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated, IsTaskCreatorOrClassExpert]
 
+    def get_queryset(self):
+        """
+        Only tasks of classes the user has a role in (and, for writes, tasks
+        they created) are ever loaded: the membership check is a subquery of
+        the SQL, so lists scale with the user's classes and other tasks 404.
+        Writes also annotate whether the user is an expert of the class, which
+        IsTaskCreatorOrClassExpert reads instead of loading the experts.
+        """
+        user = self.request.user
+        visible = Q(class_obj_id__in=class_ids_subquery(user))
+        if self.action not in ("list", "retrieve", "submit", "list_submissions"):
+            visible |= Q(created_by=user)
+        queryset = super().get_queryset().filter(
+            visible, class_obj__deletion_requested_at__isnull=True
+        )
+        if self.action in ("list", "retrieve"):
+            # Only these render TaskSerializer.submissions; submit & co. fetch just the task.
+            queryset = queryset.prefetch_related("submissions")
+        if self.action in ("update", "partial_update", "destroy"):
+            queryset = queryset.annotate(
+                is_class_expert=Exists(
+                    Class.experts.through.objects.filter(
+                        class_id=OuterRef("class_obj_id"), user=user
+                    )
+                )
+            )
+        return queryset
+
     def get_permissions(self):
         """
         Instantiates and returns the list of permissions that this view requires.
-        - 'list' and 'retrieve' actions require the user to be a member of the class.
-        - Other actions (create, update, destroy) require the user to be the task creator or a class admin.
+        - Reading and submitting only need a role in the class, which get_queryset
+          already enforces.
+        - Other actions (create, update, destroy) require the user to be the task creator or a class expert.
         """
-        if self.action in ["retrieve", "submit","list_submissions"]:
-            return [IsAuthenticated(), IsClassMember(),]
+        if self.action in ["list", "retrieve", "submit", "list_submissions"]:
+            return [IsAuthenticated()]
         return super().get_permissions()
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        task = serializer.save(created_by=self.request.user)
+        schedule_task_deadline(task)
+        events.publish_class_event(
+            task.class_obj_id,
+            events.TASK_CREATED,
+            {"task_id": str(task.pk), "title": task.title, "due_date": task.dueDate},
+        )
+
+    def perform_update(self, serializer):
+        previous_due_date = serializer.instance.dueDate
+        task = serializer.save()
+        if task.dueDate != previous_due_date:
+            schedule_task_deadline(task)
 
-    @action(detail=True, methods=["post"])
+    @action(detail=True, methods=["post"], throttle_classes=[SubmitThrottle])
     def submit(self, request, pk=None):
         """
         Handles a user's submission for this specific task.
@@ -543,7 +990,9 @@ class TaskViewSet(viewsets.ModelViewSet):
             )
 
         # Prevent duplicate submissions by the same user
-        if Submission.objects.filter(task=task, user=user).exists():
+        if Submission.objects.filter(
+            task=task, user=user, submitted_at__gte=task.created_at
+        ).exists():
             return Response(
                 {"detail": "You have already submitted a solution for this task."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -554,7 +1003,17 @@ class TaskViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
 
         # Save the submission, linking it to the current task and user
-        serializer.save(task=task, user=user)
+        submission = serializer.save(task=task, user=user)
+        invalidate_pending_tasks(user.pk)
+        events.publish_class_event(
+            task.class_obj_id,
+            events.SUBMISSION_ADDED,
+            {
+                "task_id": str(task.pk),
+                "submission_id": str(submission.pk),
+                "user_id": str(user.pk),
+            },
+        )
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -567,10 +1026,16 @@ class TaskViewSet(viewsets.ModelViewSet):
         task = self.get_object() # This gets the task instance (with ID=pk)
         
         # Filter submissions by the task and the logged-in user
-        user_submissions = Submission.objects.filter(
-            task=task,
-            user=request.user
+        user_submissions = list(
+            Submission.objects.filter(
+                task=task, user=request.user, submitted_at__gte=task.created_at
+            ).select_related("user")
         )
+        # Old months may have been archived out of the database (api.partitioning).
+        if has_archived(Submission, since=task.created_at):
+            user_submissions += iter_archived(
+                Submission, since=task.created_at, task_id=task.pk, user_id=request.user.pk
+            )
         
         # Serialize the data
         serializer = SubmissionSerializer(user_submissions, many=True)
@@ -592,18 +1057,18 @@ class ClassTaskViewSet(viewsets.ReadOnlyModelViewSet):
         for the class as determined by the class_code portion of the URL.
         """
         class_code = self.kwargs["class_class_code"]
-        return Task.objects.filter(class_obj__class_code=class_code)
+        return Task.objects.filter(
+            class_obj__class_code=class_code, class_obj__deletion_requested_at__isnull=True
+        ).prefetch_related(
+            "submissions"
+        )
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
 
         # Check if the user is a member of the class
         class_obj = get_object_or_404(Class, class_code=self.kwargs["class_class_code"])
-        if (
-            request.user not in class_obj.members.all()
-            and request.user not in class_obj.experts.all()
-            and request.user not in class_obj.admins.all()
-        ):
+        if class_obj.pk not in user_class_ids(request):
             return Response(
                 {"detail": "You are not a member of this class."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -622,6 +1087,7 @@ class ClassTaskViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class SubmissionViewSet(
+    StreamingListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -630,16 +1096,36 @@ class SubmissionViewSet(
     """
     Provides access to submissions.
     - List:     GET /api/submissions/ (Lists user's own submissions)
+    - Stream:   GET /api/submissions/?stream=1 (Same list, streamed as a chunked JSON array)
     - Retrieve: GET /api/submissions/{id}/
     - Update:   PUT /api/submissions/{id}/
     - Partial Update: PATCH /api/submissions/{id}/ (e.g., to update the document)
     Not enabling DELETE submission
     """
 
-    queryset = Submission.objects.all()
+    # SubmissionSerializer nests the user.
+    queryset = Submission.objects.select_related("user")
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated, IsSubmissionOwner]
 
     def get_queryset(self):
-        return Submission.objects.filter(user=self.request.user)
+        # Owner only, in SQL; submissions of classes being deleted are hidden.
+        return super().get_queryset().filter(
+            user=self.request.user, task__class_obj__deletion_requested_at__isnull=True
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # The submission may live in an archived partition (read-only).
+            submission = get_archived(Submission, kwargs["pk"])
+            if submission is None or submission.user_id != request.user.pk:
+                raise
+            # Archives keep the rows of deleted classes: apply get_queryset's filter.
+            if not Task.objects.filter(
+                pk=submission.task_id, class_obj__deletion_requested_at__isnull=True
+            ).exists():
+                raise
+            return Response(self.get_serializer(submission).data)
     
@@ -2,5 +2,8 @@
 echo "Running migrations..."
 python manage.py migrate
 
+echo "Creating upcoming submission/feedback partitions..."
+python manage.py manage_partitions --no-archive
+
 echo "Starting server..."
 python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
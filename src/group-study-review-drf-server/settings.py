@@ -3,8 +3,6 @@ from datetime import timedelta
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-import firebase_admin
-from firebase_admin import credentials
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.0/howto/deployment/checklist/
@@ -30,7 +28,6 @@ INSTALLED_APPS = [
     "django_extensions",
     "api",
     "rest_framework",
-    "silk",
     "rest_framework_simplejwt",
     "corsheaders",
     "drf_spectacular",
@@ -50,17 +47,78 @@ SESSION_COOKIE_SECURE = SECURE_COOKIES
 CSRF_COOKIE_SECURE = SECURE_COOKIES
 
 MIDDLEWARE = [
+    # Outermost, so the latency histogram covers the whole middleware stack.
+    "api.metrics.PrometheusMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "silk.middleware.SilkyMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.db_router.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.profiling.SamplingProfilerMiddleware",
+    "api.query_budget.QueryBudgetMiddleware",
 ]
 
+# Prometheus scrape endpoint (/metrics). When set, scrapers must send
+# `Authorization: Bearer <METRICS_TOKEN>`. For multi-process aggregation under
+# gunicorn, also set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py).
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Maximum SQL queries per "<ViewClass>.<action>" (see api.query_budget).
+# Enforced in tests with assert_query_budget(); reported as X-Query-* headers in
+# DEBUG; logged as warnings when QUERY_BUDGET_LOG_VIOLATIONS is on.
+# Counts include the JWT user lookup and must not grow with the number of rows.
+QUERY_BUDGETS = {
+    "UserProfileView.get": 2,
+    "UserViewSet.list": 3,
+    "ClassViewSet.list": 7,
+    "ClassViewSet.retrieve": 7,
+    "ClassViewSet.join": 7,
+    "ClassTaskViewSet.list": 9,
+    "TaskViewSet.list": 3,
+    "TaskViewSet.retrieve": 7,
+    "TaskViewSet.submit": 9,
+    "TaskViewSet.list_submissions": 8,
+    "SubmissionViewSet.list": 3,
+    "PendingTasksView.get": 2,
+    "ClassViewSet.stats": 8,
+    "ClassViewSet.submission_matrix": 8,
+    "ClassViewSet.roles": 14,
+    # Only the queries before the first byte; the rows are read while streaming.
+    "ClassViewSet.export": 4,
+    "SyncView.get": 12,
+}
+QUERY_BUDGET_LOG_VIOLATIONS = (
+    os.environ.get("QUERY_BUDGET_LOG_VIOLATIONS", "false").lower() == "true"
+)
+
+# Silk records every request to the database; only turn it on for local debugging.
+# Day-to-day profiling is done by the sampling profiler configured in PROFILING.
+# When off, silk is not even imported (app, middleware and /silk/ URLs).
+SILK_ENABLED = os.environ.get("SILK_ENABLED", "false").lower() == "true"
+if SILK_ENABLED:
+    INSTALLED_APPS.append("silk")
+    MIDDLEWARE.insert(2, "silk.middleware.SilkyMiddleware")
+
+# Sampling profiler (api.profiling). A rate N profiles 1 in N requests; 0 is off.
+# Rates can be changed at runtime through PATCH /api/profiling/config/.
+PROFILING = {
+    "DEFAULT_SAMPLE_RATE": int(os.environ.get("PROFILING_SAMPLE_RATE", "100")),
+    # URL name -> rate, e.g. {"task-submit": 10}
+    "ROUTE_SAMPLE_RATES": {},
+    # Requests sending `X-Profile-Request: <PROFILING_HEADER_TOKEN>` are always profiled.
+    "HEADER": "HTTP_X_PROFILE_REQUEST",
+    "HEADER_TOKEN": os.environ.get("PROFILING_HEADER_TOKEN", ""),
+    "PYTHON_PROFILER": False,
+    "BATCH_SIZE": 50,
+    "FLUSH_INTERVAL_SECONDS": 30,
+    "MAX_BUFFERED": 1000,
+    "CONFIG_REFRESH_SECONDS": 10,
+}
+
 ALLOWED_HOSTS = ["*"]
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -91,6 +149,22 @@ WSGI_APPLICATION = "group-study-review-drf-server.wsgi.application"
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
 
+# Connection pooling (psycopg3 pool, one pool per worker process).
+# Connections are borrowed per request and handed back instead of being closed,
+# so requests skip the TCP + auth handshake. With CONN_HEALTH_CHECKS on, Django
+# makes the pool ping a connection before lending it out, so connections killed
+# by Postgres or the network are replaced.
+# Set DB_POOL_ENABLED=false to fall back to persistent per-thread connections.
+DB_POOL_ENABLED = os.environ.get("DB_POOL_ENABLED", "true").lower() == "true"
+DB_POOL_OPTIONS = {
+    "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+    # Seconds an idle connection above min_size is kept before being closed.
+    "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+    # Seconds a request waits for a free connection before erroring out.
+    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -101,15 +175,161 @@ DATABASES = {
             "DB_HOST", "localhost"
         ),  # This should match the service name in docker-compose.yml
         "PORT": os.environ.get("DB_PORT", "5432"),
+        # Pooling and persistent connections are mutually exclusive in Django.
+        "CONN_MAX_AGE": 0 if DB_POOL_ENABLED else int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pool": DB_POOL_OPTIONS} if DB_POOL_ENABLED else {},
+    }
+}
+
+# Read replicas: DB_REPLICA_HOSTS="replica1:5432,replica2:5432" adds one alias per
+# host, sharing the primary's credentials. Safe-method reads are spread across them
+# by api.db_router; writes and reads right after a write stay on the primary.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    replica_host, _, replica_port = replica.strip().partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": replica_port or DATABASES["default"]["PORT"],
+        # Tests run against the primary's test database instead of a real replica.
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+
+# Caches. Throttle buckets (THROTTLES), replica pins, pending-tasks pages and
+# archive horizons have to be shared by every worker process: REDIS_URL (e.g.
+# redis://redis:6379/0) puts the default cache in Redis. Without it each process
+# keeps its own local-memory cache, which is only right for DEBUG / one process.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
 }
 
+DATABASE_ROUTERS = ["api.db_router.PrimaryReplicaRouter"]
+# Seconds a client keeps reading from the primary after a successful write.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "5"))
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        # Same as DRF's defaults, but the JSON renderer reports its encoding time
+        # to the Prometheus metrics.
+        "api.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
 }
+# Per-user cache of GET /api/me/pending-tasks/ pages. Kept short: tasks created
+# in the user's classes show up after at most this long.
+PENDING_TASKS_CACHE_SECONDS = int(os.environ.get("PENDING_TASKS_CACHE_SECONDS", "30"))
+
+# Real-time class events (api.events), streamed over SSE by the ASGI app.
+# LocalBackend only reaches streams of the publishing process; with several
+# workers use "api.events.PostgresNotifyBackend".
+CLASS_EVENTS = {
+    "BACKEND": os.environ.get("CLASS_EVENTS_BACKEND", "api.events.LocalBackend"),
+    "PG_CHANNEL": "class_events",
+    "QUEUE_SIZE": int(os.environ.get("CLASS_EVENTS_QUEUE_SIZE", "100")),
+    "KEEPALIVE_SECONDS": 15,
+    "RETRY_MS": 3000,
+}
+
+# Monthly partitions of submissions / feedbacks (Postgres only), maintained by
+# `manage.py manage_partitions`: created MONTHS_AHEAD in advance, and months older
+# than ARCHIVE_AFTER_MONTHS moved to compressed files under ARCHIVE_DIR.
+PARTITIONING = {
+    "MONTHS_AHEAD": 3,
+    "ARCHIVE_AFTER_MONTHS": int(os.environ.get("PARTITION_ARCHIVE_AFTER_MONTHS", "24")),
+    "ARCHIVE_DIR": Path(os.environ.get("PARTITION_ARCHIVE_DIR", BASE_DIR / "archive")),
+}
+
+# Background deletion of users and classes (see api.deletion), run by the job
+# worker; `manage.py process_deletions` resumes jobs whose heartbeat is older
+# than STALE_AFTER_SECONDS.
+DELETION = {
+    "CHUNK_SIZE": int(os.environ.get("DELETION_CHUNK_SIZE", "1000")),
+    "STALE_AFTER_SECONDS": 300,
+}
+
+# Sender of invitation emails (delivered by the job worker).
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@group-study-review.local")
+
+# Database-backed job queue (api.jobs), run by `manage.py run_worker`.
+JOBS = {
+    "MAX_ATTEMPTS": 5,
+    # Retry n waits BACKOFF_SECONDS * 2**(n-1) (+-20%), at most BACKOFF_MAX_SECONDS.
+    "BACKOFF_SECONDS": 10,
+    "BACKOFF_MAX_SECONDS": 3600,
+    # A running job's worker renews its lock every HEARTBEAT_SECONDS; a job
+    # whose lock is not renewed for VISIBILITY_TIMEOUT_SECONDS is requeued.
+    "HEARTBEAT_SECONDS": 60,
+    "VISIBILITY_TIMEOUT_SECONDS": 1800,
+    "KEEP_FINISHED_DAYS": 7,
+    "POLL_INTERVAL_SECONDS": 1.0,
+}
+
+# Token-bucket rate limits (api.throttling) of login, class join and task submit:
+# per scope, a "user" and / or "ip" bucket of BURST tokens refilled at RATE.
+# STORE "local" keeps buckets in process memory (one process only); "cache"
+# shares them across workers through the CACHE_ALIAS cache, and is the default
+# outside DEBUG (that cache must then be shared too, see CACHES).
+THROTTLES = {
+    "STORE": os.environ.get("THROTTLE_STORE", "local" if DEBUG else "cache"),
+    "CACHE_ALIAS": "default",
+    "BUCKETS": {
+        "login": {"ip": {"RATE": "10/min", "BURST": 20}},
+        "join": {
+            "user": {"RATE": "10/min", "BURST": 5},
+            "ip": {"RATE": "60/min", "BURST": 30},
+        },
+        "submit": {
+            "user": {"RATE": "30/min", "BURST": 10},
+            "ip": {"RATE": "120/min", "BURST": 60},
+        },
+    },
+}
+
+# POST /api/batch/ (api.batch): GET sub-requests per batch, and how many of
+# them run at once under ASGI.
+BATCH = {
+    "MAX_REQUESTS": int(os.environ.get("BATCH_MAX_REQUESTS", "25")),
+    "CONCURRENCY": int(os.environ.get("BATCH_CONCURRENCY", "8")),
+}
+
+# GET /api/sync/ (api.sync): rows or change log entries per response, how long an id
+# gap may be a commit in flight, and how long entries (i.e. cursors) stay valid.
+SYNC = {
+    "PAGE_SIZE": 1000,
+    "GAP_TIMEOUT_SECONDS": 60,
+    "RETENTION_DAYS": int(os.environ.get("SYNC_RETENTION_DAYS", "30")),
+}
+
+# PATCH /api/class/{code}/roles/ (api.roles): changes, additions and removals
+# per request. The query count does not depend on it, the statement sizes do.
+MAX_BULK_ROLE_CHANGES = int(os.environ.get("MAX_BULK_ROLE_CHANGES", "500"))
+
+# GET /api/class/{code}/export/ (api.export): roster users read (and rows
+# written) per chunk; memory is bounded by CHUNK_SIZE x tasks of the class.
+EXPORT = {
+    "CHUNK_SIZE": int(os.environ.get("EXPORT_CHUNK_SIZE", "500")),
+}
+
+# Identifies the deployed code (e.g. the git SHA); the prebuilt OpenAPI schema
+# artifact is keyed by it. Left empty, a hash of the sources is used instead.
+CODE_VERSION = os.environ.get("CODE_VERSION", "")
+# Written by `manage.py build_openapi_schema`, served by /api/schema/.
+OPENAPI_SCHEMA_DIR = Path(os.environ.get("OPENAPI_SCHEMA_DIR", BASE_DIR / "openapi"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "group-study-review API",
     "DESCRIPTION": "Comprehensive API documentation for group-study-review",
@@ -181,18 +401,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # .resolve().parent.parent gives us /app
 
 # ==============================================================================
-# FIREBASE ADMIN SDK INITIALIZATION
+# FIREBASE ADMIN SDK
 # ==============================================================================
+# Initialized lazily on the first token verification (api.firebase_auth), so
+# migrations, management commands and worker boot don't import the SDK.
 
 SERVICE_ACCOUNT_KEY_PATH = BASE_DIR / "firebase-service-account.json"
-
-if not firebase_admin._apps:
-    if SERVICE_ACCOUNT_KEY_PATH.exists():
-        cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
-        firebase_admin.initialize_app(cred)
-        print("✅ Firebase Admin SDK initialized successfully.")
-    else:
-        print(
-            f"⚠️ Firebase service account key not found at: {SERVICE_ACCOUNT_KEY_PATH}"
-        )
-        print("⚠️ Firebase Admin SDK was not initialized.")
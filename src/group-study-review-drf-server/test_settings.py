@@ -0,0 +1,30 @@
+"""
+Settings for running the test suite without a Postgres server:
+
+    python manage.py test api --settings=group-study-review-drf-server.test_settings
+
+Two local SQLite databases stand in for the primary and a read replica.
+Replica routing stays off (DATABASE_REPLICAS is empty) except in the tests
+that turn it on, so every other test reads what it wrote. Postgres-only tests
+(partitioning) are skipped; run `python manage.py test api` against the
+configured Postgres database for those.
+"""
+
+from .settings import *
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test-default.sqlite3",
+    },
+    "replica_1": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test-replica_1.sqlite3",
+    },
+}
+DATABASE_REPLICAS = []
+
+# Deterministic query counts: no sampled profiling writes, no shared caches.
+PROFILING = {**PROFILING, "DEFAULT_SAMPLE_RATE": 0}
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+THROTTLES = {**THROTTLES, "STORE": "local"}
@@ -2,6 +2,7 @@
 # 
 
 # ================== Django ============================
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
@@ -9,11 +10,7 @@ from django.urls import include, path
 # 
 
 # ================== Third-Party =======================
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -21,16 +18,18 @@ from rest_framework_simplejwt.views import (
 )
 
 # ================== Local / App Imports =================
+from api.metrics import metrics_view
+from api.openapi_schema import CachedSpectacularAPIView
 from api.views import CookieTokenRefreshView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("api.urls")),
-    path("silk/", include("silk.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", CookieTokenRefreshView.as_view(), name="token_refresh"),
     path("api/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/schema/", CachedSpectacularAPIView.as_view(), name="schema"),
     path(
         "api/docs/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -40,3 +39,6 @@ urlpatterns = [
         "api/docs/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"
     ),
 ]
+
+if settings.SILK_ENABLED:
+    urlpatterns.append(path("silk/", include("silk.urls")))
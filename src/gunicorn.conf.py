@@ -0,0 +1,15 @@
+# gunicorn configuration: `gunicorn -c gunicorn.conf.py group-study-review-drf-server.wsgi`
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+
+def child_exit(server, worker):
+    # Prometheus multiprocess mode: drop the live gauges of a dead worker.
+    # PROMETHEUS_MULTIPROC_DIR must point at an empty directory on startup.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)